@@ -0,0 +1,40 @@
+"""Add notification coalescing columns
+
+Revision ID: b8d1f3a6c9e2
+Revises: a2c7e4f9b3d1
+Create Date: 2026-02-16 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8d1f3a6c9e2'
+down_revision: Union[str, Sequence[str], None] = 'a2c7e4f9b3d1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('notifications', sa.Column('coalesce_key', sa.String(length=255), nullable=True))
+    op.add_column('notifications', sa.Column('coalesced_count', sa.Integer(), server_default=sa.text('1'), nullable=False))
+    op.add_column('notifications', sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True))
+    op.create_index(
+        'uq_notifications_user_coalesce_key',
+        'notifications',
+        ['user_id', 'coalesce_key'],
+        unique=True,
+        postgresql_where=sa.text('coalesce_key IS NOT NULL'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_notifications_user_coalesce_key', table_name='notifications')
+    op.drop_column('notifications', 'updated_at')
+    op.drop_column('notifications', 'coalesced_count')
+    op.drop_column('notifications', 'coalesce_key')
@@ -0,0 +1,60 @@
+"""Add hot-path indexes
+
+Revision ID: c4d2e7a9b1f3
+Revises: b3c8a1f2d9e0
+Create Date: 2026-02-10 00:00:00.000000
+
+Indexes are built CONCURRENTLY so the tables stay writable during the build.
+CREATE INDEX CONCURRENTLY cannot run inside a transaction, hence the
+autocommit block. users(email) is not listed: its UNIQUE constraint already
+has an index.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d2e7a9b1f3'
+down_revision: Union[str, Sequence[str], None] = 'b3c8a1f2d9e0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, table, columns, partial WHERE clause)
+INDEXES = [
+    ('ix_messages_channel_sent_at', 'messages', ['channel_id', 'sent_at', 'message_id'], None),
+    ('ix_notifications_user_created_at', 'notifications', ['user_id', 'created_at', 'notification_id'], None),
+    ('ix_notifications_user_unread', 'notifications', ['user_id', 'created_at'], 'is_read = false'),
+    ('ix_tasks_sprint_status', 'tasks', ['sprint_id', 'status'], None),
+    ('ix_team_members_student_id', 'team_members', ['student_id'], None),
+    ('ix_class_enrollments_class_student', 'class_enrollments', ['class_id', 'student_id'], None),
+    ('ix_sprints_team_id', 'sprints', ['team_id'], None),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_concurrently=True,
+                postgresql_where=sa.text(where) if where else None,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _columns, _where in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
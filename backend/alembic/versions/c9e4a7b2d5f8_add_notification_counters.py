@@ -0,0 +1,47 @@
+"""Add notification_counters table
+
+Revision ID: c9e4a7b2d5f8
+Revises: b8d1f3a6c9e2
+Create Date: 2026-02-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9e4a7b2d5f8'
+down_revision: Union[str, Sequence[str], None] = 'b8d1f3a6c9e2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'notification_counters',
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('notification_type', sa.String(length=50), nullable=False),
+        sa.Column('total', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.Column('unread', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'notification_type'),
+    )
+    # Backfill from the existing notifications
+    op.execute(
+        """
+        INSERT INTO notification_counters (user_id, notification_type, total, unread)
+        SELECT user_id, notification_type, count(*), count(*) FILTER (WHERE NOT is_read)
+        FROM notifications
+        WHERE user_id IS NOT NULL
+        GROUP BY user_id, notification_type
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('notification_counters')
@@ -0,0 +1,42 @@
+"""Add reminder_log table and reminder look-ahead indexes
+
+Revision ID: d1f6b8e3a4c7
+Revises: c9e4a7b2d5f8
+Create Date: 2026-02-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd1f6b8e3a4c7'
+down_revision: Union[str, Sequence[str], None] = 'c9e4a7b2d5f8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'reminder_log',
+        sa.Column('kind', sa.String(length=20), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('offset_minutes', sa.Integer(), nullable=False),
+        sa.Column('due_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('sent_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('kind', 'entity_id', 'offset_minutes', 'due_at'),
+    )
+    op.create_index('ix_meetings_start_time', 'meetings', ['start_time'])
+    op.create_index('ix_milestones_due_date', 'milestones', ['due_date'])
+    op.create_index('ix_sprints_end_date', 'sprints', ['end_date'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_sprints_end_date', table_name='sprints')
+    op.drop_index('ix_milestones_due_date', table_name='milestones')
+    op.drop_index('ix_meetings_start_time', table_name='meetings')
+    op.drop_table('reminder_log')
@@ -0,0 +1,121 @@
+"""Partition messages by month on sent_at
+
+Revision ID: d7e3f1a8c2b4
+Revises: c4d2e7a9b1f3
+Create Date: 2026-02-17 00:00:00.000000
+
+messages becomes a RANGE-partitioned table with one partition per month
+(messages_pYYYYMM) plus a DEFAULT partition. Existing rows are copied into
+the new table. The primary key becomes (message_id, sent_at) because a
+partitioned table's unique constraints must include the partition key;
+message_id keeps its sequence and stays unique.
+
+Future partitions are created by app/services/message_partitions.py
+(on startup and daily). Old partitions can be detached into the
+"archive" schema with scripts/archive_message_partitions.py.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7e3f1a8c2b4'
+down_revision: Union[str, Sequence[str], None] = 'c4d2e7a9b1f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Months created ahead of the current one
+MONTHS_AHEAD = 3
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE SCHEMA IF NOT EXISTS archive")
+
+    # Keep the old table aside; detach its sequence so dropping it later keeps ids
+    op.execute("ALTER TABLE messages RENAME TO messages_legacy")
+    op.execute("ALTER INDEX messages_pkey RENAME TO messages_legacy_pkey")
+    op.execute("ALTER INDEX IF EXISTS ix_messages_channel_sent_at RENAME TO ix_messages_legacy_channel_sent_at")
+    op.execute("ALTER SEQUENCE messages_message_id_seq OWNED BY NONE")
+
+    op.execute("""
+        CREATE TABLE messages (
+            message_id INTEGER NOT NULL DEFAULT nextval('messages_message_id_seq'),
+            channel_id INTEGER NOT NULL REFERENCES channels (channel_id) ON DELETE CASCADE,
+            sender_id UUID NOT NULL REFERENCES users (user_id),
+            content TEXT,
+            sent_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            CONSTRAINT messages_pkey PRIMARY KEY (message_id, sent_at)
+        ) PARTITION BY RANGE (sent_at)
+    """)
+    op.execute("ALTER SEQUENCE messages_message_id_seq OWNED BY messages.message_id")
+    op.execute(
+        "CREATE INDEX ix_messages_channel_sent_at "
+        "ON messages (channel_id, sent_at, message_id)"
+    )
+
+    # One partition per month from the oldest message up to MONTHS_AHEAD ahead
+    op.execute(f"""
+        DO $$
+        DECLARE
+            month_start timestamptz;
+            last_month timestamptz := date_trunc('month', now() AT TIME ZONE 'UTC')
+                                      AT TIME ZONE 'UTC' + interval '{MONTHS_AHEAD} months';
+        BEGIN
+            SELECT COALESCE(
+                date_trunc('month', min(sent_at) AT TIME ZONE 'UTC') AT TIME ZONE 'UTC',
+                date_trunc('month', now() AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'
+            ) INTO month_start FROM messages_legacy;
+
+            WHILE month_start <= last_month LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF messages FOR VALUES FROM (%L) TO (%L)',
+                    'messages_p' || to_char(month_start AT TIME ZONE 'UTC', 'YYYYMM'),
+                    month_start,
+                    month_start + interval '1 month'
+                );
+                month_start := month_start + interval '1 month';
+            END LOOP;
+        END $$;
+    """)
+    op.execute("CREATE TABLE messages_default PARTITION OF messages DEFAULT")
+
+    op.execute("""
+        INSERT INTO messages (message_id, channel_id, sender_id, content, sent_at)
+        SELECT message_id, channel_id, sender_id, content, COALESCE(sent_at, now())
+        FROM messages_legacy
+    """)
+    op.execute("DROP TABLE messages_legacy")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE messages RENAME TO messages_partitioned")
+    op.execute("ALTER INDEX messages_pkey RENAME TO messages_partitioned_pkey")
+    op.execute("ALTER INDEX ix_messages_channel_sent_at RENAME TO ix_messages_partitioned_channel_sent_at")
+    op.execute("ALTER SEQUENCE messages_message_id_seq OWNED BY NONE")
+
+    op.execute("""
+        CREATE TABLE messages (
+            message_id INTEGER NOT NULL DEFAULT nextval('messages_message_id_seq'),
+            channel_id INTEGER NOT NULL REFERENCES channels (channel_id) ON DELETE CASCADE,
+            sender_id UUID NOT NULL REFERENCES users (user_id),
+            content TEXT,
+            sent_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            CONSTRAINT messages_pkey PRIMARY KEY (message_id)
+        )
+    """)
+    op.execute("ALTER SEQUENCE messages_message_id_seq OWNED BY messages.message_id")
+    op.execute(
+        "CREATE INDEX ix_messages_channel_sent_at "
+        "ON messages (channel_id, sent_at, message_id)"
+    )
+    # Archived (detached) partitions are not copied back
+    op.execute("""
+        INSERT INTO messages (message_id, channel_id, sender_id, content, sent_at)
+        SELECT message_id, channel_id, sender_id, content, sent_at
+        FROM messages_partitioned
+    """)
+    op.execute("DROP TABLE messages_partitioned CASCADE")
@@ -0,0 +1,39 @@
+"""Add notification_preferences table
+
+Revision ID: e7a2c5f9d3b6
+Revises: d1f6b8e3a4c7
+Create Date: 2026-02-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a2c5f9d3b6'
+down_revision: Union[str, Sequence[str], None] = 'd1f6b8e3a4c7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'notification_preferences',
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('muted_types', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.Column('muted_channel_ids', postgresql.ARRAY(sa.Integer()), server_default=sa.text("'{}'"), nullable=False),
+        sa.Column('quiet_hours', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.Column('utc_offset_minutes', sa.SmallInteger(), server_default=sa.text('0'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('notification_preferences')
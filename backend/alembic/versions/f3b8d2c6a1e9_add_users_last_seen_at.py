@@ -0,0 +1,29 @@
+"""Add users.last_seen_at
+
+Revision ID: f3b8d2c6a1e9
+Revises: e5a9c3d1f7b2
+Create Date: 2026-02-12 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b8d2c6a1e9'
+down_revision: Union[str, Sequence[str], None] = 'e5a9c3d1f7b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Nullable, no default: metadata-only change, no table rewrite
+    op.add_column('users', sa.Column('last_seen_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'last_seen_at')
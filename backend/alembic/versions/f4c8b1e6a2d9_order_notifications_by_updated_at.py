@@ -0,0 +1,72 @@
+"""Order notifications by updated_at
+
+Revision ID: f4c8b1e6a2d9
+Revises: e7a2c5f9d3b6
+Create Date: 2026-02-20 00:00:00.000000
+
+The feed and socket resume now follow updated_at (the last merge of a
+coalesced row). When updated_at was added, existing rows got the migration
+time instead of their creation time; rows without a coalesce_key are never
+merged, so theirs is reset to created_at. The created_at indexes are
+replaced CONCURRENTLY (see c4d2e7a9b1f3).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4c8b1e6a2d9'
+down_revision: Union[str, Sequence[str], None] = 'e7a2c5f9d3b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, columns, partial WHERE clause)
+NEW_INDEXES = [
+    ('ix_notifications_user_updated_at', ['user_id', 'updated_at', 'notification_id'], None),
+    ('ix_notifications_user_unread_updated_at', ['user_id', 'updated_at'], 'is_read = false'),
+]
+OLD_INDEXES = [
+    ('ix_notifications_user_created_at', ['user_id', 'created_at', 'notification_id'], None),
+    ('ix_notifications_user_unread', ['user_id', 'created_at'], 'is_read = false'),
+]
+
+
+def _create(indexes) -> None:
+    for name, columns, where in indexes:
+        op.create_index(
+            name,
+            'notifications',
+            columns,
+            postgresql_concurrently=True,
+            postgresql_where=sa.text(where) if where else None,
+            if_not_exists=True,
+        )
+
+
+def _drop(indexes) -> None:
+    for name, _columns, _where in indexes:
+        op.drop_index(name, table_name='notifications', postgresql_concurrently=True, if_exists=True)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        "UPDATE notifications SET updated_at = created_at "
+        "WHERE coalesce_key IS NULL AND updated_at IS DISTINCT FROM created_at"
+    )
+    op.execute("UPDATE notifications SET updated_at = now() WHERE updated_at IS NULL")
+    op.alter_column('notifications', 'updated_at', nullable=False)
+    with op.get_context().autocommit_block():
+        _create(NEW_INDEXES)
+        _drop(OLD_INDEXES)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        _create(OLD_INDEXES)
+        _drop(NEW_INDEXES)
+    op.alter_column('notifications', 'updated_at', nullable=True)
@@ -5,7 +5,16 @@ Only use in development!
 from fastapi import APIRouter, HTTPException
 from sqlalchemy import text
 
+from app.core.cache import invalidation_bus
 from app.db.session import AsyncSessionLocal, engine
+from app.db.pool_metrics import pool_metrics
+from app.services.notification_digest import notification_digest
+from app.services.password_hasher import password_hasher
+from app.services.outbox import outbox_dispatcher
+from app.services.presence_service import presence_service
+from app.services.reminder_scheduler import reminder_scheduler
+from app.services.socket_manager import sio
+from app.services.typing_aggregator import typing_aggregator
 from app.models.all_models import Base, Role
 
 router = APIRouter()
@@ -78,3 +87,29 @@ async def check_database_status():
             "status": "not_initialized",
             "error": str(e)
         }
+
+
+@router.get("/db-pool", tags=["admin"])
+async def check_database_pool():
+    """Connection pool metrics: checkouts, overflow, wait times, connection age, pre-ping failures."""
+    return pool_metrics.snapshot(engine.sync_engine.pool)
+
+
+@router.get("/password-hasher", tags=["admin"])
+async def check_password_hasher():
+    """Password hashing pool: queue depth, in-flight work, wait/run times, rejections."""
+    return password_hasher.stats()
+
+
+@router.get("/realtime", tags=["admin"])
+async def check_realtime():
+    """Socket.IO traffic shaping counters (typing coalescing, presence, outbound queues, outbox, digests, reminders, cache invalidation)."""
+    return {
+        "typing": typing_aggregator.stats(),
+        "presence": presence_service.stats(),
+        "outbound": sio.backpressure_stats(),
+        "outbox": outbox_dispatcher.stats(),
+        "notification_digest": notification_digest.stats(),
+        "reminders": reminder_scheduler.stats(),
+        "cache_invalidation": invalidation_bus.stats() if invalidation_bus is not None else None,
+    }
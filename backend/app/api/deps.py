@@ -1,6 +1,4 @@
 """Dependencies for API endpoints."""
-from typing import AsyncGenerator
-
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 # --- SỬA DÒNG NÀY: Dùng JWTError thay vì ValidationError ---
@@ -11,8 +9,9 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core import config, security
-from app.db.session import AsyncSessionLocal
+from app.db.session import get_db
 from app.models.all_models import User
+from app.services.principal_cache import principal_cache
 
 # OAuth2 scheme
 reusable_oauth2 = OAuth2PasswordBearer(
@@ -20,15 +19,6 @@ reusable_oauth2 = OAuth2PasswordBearer(
 )
 
 
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    """Dependency for getting async database session."""
-    async with AsyncSessionLocal() as session:
-        try:
-            yield session
-        finally:
-            await session.close()
-
-
 async def get_current_user(
     db: AsyncSession = Depends(get_db),
     token: str = Depends(reusable_oauth2)
@@ -37,9 +27,7 @@ async def get_current_user(
     Validate JWT token and return current user.
     """
     try:
-        payload = jwt.decode(
-            token, config.settings.SECRET_KEY, algorithms=[config.settings.ALGORITHM]
-        )
+        payload = security.decode_access_token(token)
         token_data = payload.get("sub")
         if token_data is None:
             raise HTTPException(
@@ -54,12 +42,17 @@ async def get_current_user(
             detail="Could not validate credentials",
         )
 
-    # Fetch user from DB
-    result = await db.execute(select(User).where(User.user_id == token_data))
-    user = result.scalars().first()
+    # Principal cache hit: no database round trip
+    user = await principal_cache.get_user(db, token_data)
+    if user is None:
+        # Fetch user from DB
+        result = await db.execute(select(User).where(User.user_id == token_data))
+        user = result.scalars().first()
+
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
 
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+        await principal_cache.put(user)
     
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
@@ -3,7 +3,16 @@
 from fastapi import APIRouter, HTTPException
 from sqlalchemy import text
 
+from app.core.cache import invalidation_bus
 from app.db.session import AsyncSessionLocal, engine
+from app.db.pool_metrics import pool_metrics
+from app.services.notification_digest import notification_digest
+from app.services.password_hasher import password_hasher
+from app.services.outbox import outbox_dispatcher
+from app.services.presence_service import presence_service
+from app.services.reminder_scheduler import reminder_scheduler
+from app.services.socket_manager import sio
+from app.services.typing_aggregator import typing_aggregator
 from app.models.all_models import Base, Role
 
 # Create the main API router
@@ -159,6 +168,32 @@ async def check_database_status():
             "error": str(e)
         }
 
+
+@api_router.get("/admin/db-pool", tags=["admin"])
+async def check_database_pool():
+    """Connection pool metrics: checkouts, overflow, wait times, connection age, pre-ping failures."""
+    return pool_metrics.snapshot(engine.sync_engine.pool)
+
+
+@api_router.get("/admin/password-hasher", tags=["admin"])
+async def check_password_hasher():
+    """Password hashing pool: queue depth, in-flight work, wait/run times, rejections."""
+    return password_hasher.stats()
+
+
+@api_router.get("/admin/realtime", tags=["admin"])
+async def check_realtime():
+    """Socket.IO traffic shaping counters (typing coalescing, presence, outbound queues, outbox, digests, reminders, cache invalidation)."""
+    return {
+        "typing": typing_aggregator.stats(),
+        "presence": presence_service.stats(),
+        "outbound": sio.backpressure_stats(),
+        "outbox": outbox_dispatcher.stats(),
+        "notification_digest": notification_digest.stats(),
+        "reminders": reminder_scheduler.stats(),
+        "cache_invalidation": invalidation_bus.stats() if invalidation_bus is not None else None,
+    }
+
 # Test endpoint
 @api_router.get("/test", tags=["system"])
 async def test_endpoint():
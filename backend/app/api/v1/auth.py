@@ -3,7 +3,7 @@ from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api import deps
@@ -12,6 +12,8 @@ from app.core.config import settings
 from app.models.all_models import Role, User
 from app.schemas import token as token_schema
 from app.schemas import user as user_schema
+from app.services.password_hasher import password_hasher
+from app.services.refresh_token_service import refresh_token_service
 
 router = APIRouter()
 
@@ -27,8 +29,11 @@ async def login_access_token(
     result = await db.execute(select(User).where(User.email == form_data.username))
     user = result.scalars().first()
 
-    # 2. Kiểm tra mật khẩu
-    if not user or not security.verify_password(form_data.password, user.password_hash):
+    # 2. Kiểm tra mật khẩu (chạy trong process pool, không block event loop)
+    password_ok, upgraded_hash = False, None
+    if user:
+        password_ok, upgraded_hash = await password_hasher.verify(form_data.password, user.password_hash)
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Incorrect email or password",
@@ -37,13 +42,57 @@ async def login_access_token(
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
 
-    # 3. Tạo Token
+    # Stored hash uses an older work factor / scheme: save the rehashed one
+    # (committed together with the refresh token below). A Core UPDATE: the
+    # password is the same, so this is not a password change that logs the
+    # user out everywhere (refresh_token_service listener)
+    if upgraded_hash:
+        await db.execute(
+            update(User).where(User.user_id == user.user_id).values(password_hash=upgraded_hash)
+        )
+
+    # 3. Tạo Token (access token + refresh token mới cho phiên đăng nhập này)
+    refresh_token = await refresh_token_service.issue(db, user.user_id)
+    return _token_response(user.user_id, refresh_token)
+
+
+@router.post("/refresh", response_model=token_schema.Token)
+async def refresh_access_token(
+    body: token_schema.RefreshTokenRequest,
+    db: AsyncSession = Depends(deps.get_db),
+) -> Any:
+    """
+    Exchange a refresh token for a new access token (no password check).
+
+    The refresh token is rotated: use the one returned by this call next time.
+    Reusing an old refresh token logs that session out.
+    """
+    user_id, refresh_token = await refresh_token_service.rotate(db, body.refresh_token)
+    return _token_response(user_id, refresh_token)
+
+
+@router.post("/logout")
+async def logout(
+    body: token_schema.RefreshTokenRequest,
+    db: AsyncSession = Depends(deps.get_db),
+) -> Any:
+    """
+    Revoke the refresh token (and the tokens rotated from it).
+    Access tokens already issued stay valid until they expire.
+    """
+    await refresh_token_service.revoke(db, body.refresh_token)
+    return {"message": "Logged out"}
+
+
+def _token_response(user_id: Any, refresh_token: str) -> dict:
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     return {
         "access_token": security.create_access_token(
-            subject=user.user_id, expires_delta=access_token_expires
+            subject=user_id, expires_delta=access_token_expires
         ),
         "token_type": "bearer",
+        "refresh_token": refresh_token,
+        "expires_in": int(access_token_expires.total_seconds()),
     }
 
 @router.post("/register", response_model=user_schema.UserResponse)
@@ -66,7 +115,7 @@ async def register_user(
 
     # 2. Hash password và tạo User
     try:
-        hashed_password = security.get_password_hash(user_in.password)
+        hashed_password = await password_hasher.hash(user_in.password)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
@@ -8,8 +8,9 @@ from sqlalchemy import select, func
 from typing import List
 
 from app.api.deps import get_db, get_current_user
-from app.models.all_models import Channel, TeamMember, User, Message
+from app.models.all_models import Channel, User, Message
 from app.schemas.channel import ChannelCreate, ChannelUpdate, ChannelResponse
+from app.services.membership_service import membership_service
 
 router = APIRouter()
 
@@ -24,17 +25,10 @@ async def create_channel(
     Tạo channel mới trong team.
     Chỉ team members mới có quyền tạo.
     """
-    member_check = await db.execute(
-        select(TeamMember).where(
-            TeamMember.team_id == channel_data.team_id,
-            TeamMember.user_id == current_user.user_id
-        )
+    await membership_service.require_member(
+        db, current_user.user_id, channel_data.team_id,
+        detail="Bạn phải là thành viên của team mới có thể tạo channel"
     )
-    if not member_check.scalar():
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Bạn phải là thành viên của team mới có thể tạo channel"
-        )
 
     new_channel = Channel(
         team_id=channel_data.team_id,
@@ -65,17 +59,10 @@ async def list_channels(
     Lấy danh sách tất cả channels trong team.
     Chỉ team members mới có quyền xem.
     """
-    member_check = await db.execute(
-        select(TeamMember).where(
-            TeamMember.team_id == team_id,
-            TeamMember.user_id == current_user.user_id
-        )
+    await membership_service.require_member(
+        db, current_user.user_id, team_id,
+        detail="Bạn phải là thành viên của team mới có thể xem channels"
     )
-    if not member_check.scalar():
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Bạn phải là thành viên của team mới có thể xem channels"
-        )
 
     result = await db.execute(
         select(Channel).where(Channel.team_id == team_id)
@@ -115,17 +102,10 @@ async def get_channel(
             detail="Channel không tồn tại"
         )
 
-    member_check = await db.execute(
-        select(TeamMember).where(
-            TeamMember.team_id == channel.team_id,
-            TeamMember.user_id == current_user.user_id
-        )
+    await membership_service.require_member(
+        db, current_user.user_id, channel.team_id,
+        detail="Bạn không có quyền xem channel này"
     )
-    if not member_check.scalar():
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Bạn không có quyền xem channel này"
-        )
 
     msg_count = await db.execute(
         select(func.count()).where(Message.channel_id == channel_id)
@@ -1,12 +1,13 @@
 from fastapi import APIRouter, HTTPException, Depends, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import and_
+from sqlalchemy import and_, func, or_
 from typing import List
 from uuid import UUID
 import logging
 
 from app.api.deps import get_db
+from app.db.mutations import guarded_update
 from app.models.all_models import ClassEnrollment, AcademicClass, User
 from app.schemas.class_enrollments import (
     ClassEnrollmentCreate,
@@ -208,28 +209,52 @@ async def get_student_enrollments(
 # UPDATE & DELETE
 # ==========================================
 
+# Enrollment status -> statuses it may change to ("completed" is final)
+ENROLLMENT_TRANSITIONS = {
+    "active": ["dropped", "completed"],
+    "dropped": ["active"],
+    "completed": [],
+}
+
 @router.put("/{enrollment_id}", response_model=ClassEnrollmentResponse)
 async def update_enrollment(
     enrollment_id: int,
     enrollment_update: ClassEnrollmentUpdate,
     db: AsyncSession = Depends(get_db)
 ):
-    """Cập nhật trạng thái enrollment (active, dropped, completed)"""
-    
-    query = select(ClassEnrollment).where(ClassEnrollment.enrollment_id == enrollment_id)
-    result = await db.execute(query)
-    db_enrollment = result.scalar_one_or_none()
+    """
+    Cập nhật trạng thái enrollment (active, dropped, completed).
     
-    if not db_enrollment:
-        raise HTTPException(status_code=404, detail="Enrollment not found")
+    Checked and written in one UPDATE ... RETURNING (404 / 409 like the
+    other status changes); resending the current status is accepted.
+    """
+    if enrollment_update.status is None:
+        db_enrollment = await db.get(ClassEnrollment, enrollment_id)
+        if not db_enrollment:
+            raise HTTPException(status_code=404, detail="Enrollment not found")
+        return db_enrollment
     
-    if enrollment_update.status is not None:
-        db_enrollment.status = enrollment_update.status
+    new_status = enrollment_update.status.lower()
+    if new_status not in ENROLLMENT_TRANSITIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Status must be one of: {list(ENROLLMENT_TRANSITIONS)}"
+        )
+    # NULL status counts as active
+    sources = [current for current, allowed in ENROLLMENT_TRANSITIONS.items() if new_status in allowed]
+    current_status = func.lower(func.coalesce(ClassEnrollment.status, "active"))
     
-    await db.commit()
-    await db.refresh(db_enrollment)
+    def conflict(current: ClassEnrollment) -> str:
+        return f"Invalid enrollment status transition: {(current.status or 'active').lower()} → {new_status}"
     
-    return db_enrollment
+    result = await guarded_update(
+        db, ClassEnrollment, enrollment_id,
+        {"status": new_status},
+        where=[or_(current_status == new_status, current_status.in_(sources))],
+        not_found="Enrollment not found",
+        conflict=conflict,
+    )
+    return result.obj
 
 @router.delete("/{enrollment_id}", status_code=204)
 async def delete_enrollment(
@@ -15,6 +15,7 @@ from app.schemas.task import (
     TaskStatus,
     TaskUpdate,
 )
+from app.services.membership_service import membership_service
 
 router = APIRouter()
 
@@ -65,7 +66,7 @@ async def create_task(
     
     # FIX BUG-01: Check team membership (unless admin/lecturer)
     if current_user.role_id == 5:  # Student
-        await check_team_membership(db, current_user, task_in.team_id)
+        await membership_service.require_member(db, current_user.user_id, task_in.team_id)
     
     task = Task(
         title=task_in.title,
@@ -186,7 +187,7 @@ async def update_task(
     
     # FIX BUG-01: Check authorization
     if current_user.role_id == 5:  # Student
-        await check_team_membership(db, current_user, task.team_id)
+        await membership_service.require_member(db, current_user.user_id, task.team_id)
 
     # Handle status transition validation
     if task_in.status:
@@ -21,6 +21,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.api import deps
+from app.db.mutations import guarded_update
 from app.models.all_models import Team, TeamMember, User, ClassEnrollment, Project
 from app.schemas.team import (
     TeamCreate,
@@ -560,23 +561,20 @@ async def lock_team(
             detail="Only lecturers can lock/unlock teams"
         )
     
-    result = await db.execute(
-        select(Team).where(Team.team_id == team_id)
-    )
-    team = result.scalar_one_or_none()
-    
-    if not team:
-        raise HTTPException(status_code=404, detail="Team not found")
-    
     if payload.is_locked:
-        # Lock: remove join code
-        team.join_code = None
+        # Lock: remove join code (locking a locked team is a no-op)
+        await guarded_update(
+            db, Team, team_id, {"join_code": None},
+            where=[Team.join_code.is_not(None)],
+            not_found="Team not found",
+            conflict=lambda current: None,
+        )
     else:
         # Unlock: regenerate join code
-        team.join_code = _generate_join_code()
-    
-    await db.commit()
-    await db.refresh(team)
+        await guarded_update(
+            db, Team, team_id, {"join_code": _generate_join_code()},
+            not_found="Team not found",
+        )
     
     return await _get_team_with_members(db, team_id)
 
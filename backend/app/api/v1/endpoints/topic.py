@@ -170,14 +170,7 @@ async def approve_topic(
         )
     
     dao = TopicDAO(db)
-    query = select(Topic).where(Topic.topic_id == topic_id)
-    result = await db.execute(query)
-    topic = result.scalar()
-    
-    if not topic:
-        raise HTTPException(status_code=404, detail="Topic not found")
-
-    updated_topic = await dao.update_topic_status(topic, "APPROVED", current_user.user_id)
+    updated_topic = await dao.update_topic_status(topic_id, "APPROVED", current_user.user_id)
     
     return {
         "topic_id": updated_topic.topic_id,
@@ -202,14 +195,7 @@ async def reject_topic(
         )
     
     dao = TopicDAO(db)
-    query = select(Topic).where(Topic.topic_id == topic_id)
-    result = await db.execute(query)
-    topic = result.scalar()
-    
-    if not topic:
-        raise HTTPException(status_code=404, detail="Topic not found")
-
-    updated_topic = await dao.update_topic_status(topic, "REJECTED", current_user.user_id)
+    updated_topic = await dao.update_topic_status(topic_id, "REJECTED", current_user.user_id)
     
     return {
         "topic_id": updated_topic.topic_id,
@@ -6,7 +6,7 @@ Author: BE1
 Created: Feb 2026
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from typing import List, Optional
@@ -14,7 +14,9 @@ from uuid import UUID
 from datetime import datetime, timezone
 
 from app.api.deps import get_db, get_current_user
-from app.models.all_models import MentoringLog, Team, TeamMember, User, Task, Sprint, PeerReview
+from app.db.loaders import get_loaders
+from app.models.all_models import MentoringLog, Team, User, Task, Sprint, PeerReview
+from app.services.membership_service import membership_service
 from app.services.ai_service import ai_service
 from app.services.notification_service import NotificationService
 
@@ -208,13 +210,7 @@ async def list_mentoring_logs(
     Team members vÃ  Lecturers cÃ³ thá»ƒ xem.
     """
     # Kiá»ƒm tra quyá»n truy cáº­p
-    member_check = await db.execute(
-        select(TeamMember).where(
-            TeamMember.team_id == team_id,
-            TeamMember.user_id == current_user.user_id
-        )
-    )
-    is_member = member_check.scalar() is not None
+    is_member = await membership_service.is_member(db, current_user.user_id, team_id)
     is_lecturer = current_user.role_id in [1, 4]
     
     if not is_member and not is_lecturer:
@@ -232,9 +228,11 @@ async def list_mentoring_logs(
     )
     logs = result.scalars().all()
     
+    mentors = await get_loaders(db).users.load_many(log.mentor_id for log in logs)
+    
     response = []
     for log in logs:
-        mentor = await db.get(User, log.mentor_id)
+        mentor = mentors.get(log.mentor_id)
         response.append(MentoringLogResponse(
             log_id=log.log_id,
             team_id=log.team_id,
@@ -363,7 +361,6 @@ async def delete_mentoring_log(
 async def generate_ai_suggestions(
     team_id: int,
     request: AISuggestionRequest,
-    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
@@ -435,15 +432,11 @@ async def generate_ai_suggestions(
         meeting_date=now
     )
     db.add(new_log)
+    # Notify the team in the same transaction (pushes go out through the outbox)
+    await NotificationService.notify_ai_suggestion_ready(db, team_id, current_user.full_name)
     await db.commit()
     await db.refresh(new_log)
     
-    # Send notification to team (in background)
-    background_tasks.add_task(
-        NotificationService.notify_ai_suggestion_ready,
-        db, team_id, current_user.full_name
-    )
-    
     return AISuggestionResponse(
         suggestions=suggestions,
         generated_at=now,
@@ -2,15 +2,21 @@
 Messages API Endpoints - Phase 3
 """
 
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, desc
 
 from app.api.deps import get_db, get_current_user
-from app.models.all_models import Message, Channel, TeamMember, User
+from app.core.config import settings
+from app.db.loaders import get_loaders
+from app.db.pagination import decode_cursors, keyset_cursors, keyset_query, keyset_rows
+from app.models.all_models import Message, User
 from app.schemas.message import MessageCreate, MessageUpdate, MessageResponse, MessageListResponse
-from app.services.socket_manager import broadcast_message, broadcast_message_updated, broadcast_message_deleted
+from app.services.membership_service import membership_service
+from app.services.notification_service import NotificationService
+from app.services.outbox import enqueue_broadcast
 
 router = APIRouter()
 
@@ -25,24 +31,17 @@ async def send_message(
     Gửi tin nhắn mới vào channel.
     Chỉ team members mới có quyền gửi.
     """
-    channel = await db.get(Channel, message_data.channel_id)
-    if not channel:
+    team_id = await membership_service.channel_team_id(db, message_data.channel_id)
+    if team_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Channel không tồn tại"
         )
 
-    member_check = await db.execute(
-        select(TeamMember).where(
-            TeamMember.team_id == channel.team_id,
-            TeamMember.user_id == current_user.user_id
-        )
+    await membership_service.require_member(
+        db, current_user.user_id, team_id,
+        detail="Bạn phải là thành viên của team mới có thể gửi tin nhắn"
     )
-    if not member_check.scalar():
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Bạn phải là thành viên của team mới có thể gửi tin nhắn"
-        )
 
     new_message = Message(
         channel_id=message_data.channel_id,
@@ -50,7 +49,7 @@ async def send_message(
         content=message_data.content
     )
     db.add(new_message)
-    await db.commit()
+    await db.flush()
     await db.refresh(new_message)
 
     response = MessageResponse(
@@ -65,7 +64,13 @@ async def send_message(
         reply_to_id=message_data.reply_to_id
     )
 
-    await broadcast_message(new_message.channel_id, response.model_dump())
+    # Broadcast goes through the outbox: committed with the message, sent after the response
+    enqueue_broadcast(db, "broadcast_message", new_message.channel_id, response.model_dump(mode="json"))
+    # Stored notifications for the other members (NOTIFICATION_MESSAGE_MODE), same transaction
+    await NotificationService.notify_new_message(
+        db, new_message.channel_id, current_user.user_id, current_user.full_name, new_message.content
+    )
+    await db.commit()
 
     return response
 
@@ -75,53 +80,74 @@ async def list_messages(
     channel_id: int,
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
+    history: bool = Query(False, description="Đọc toàn bộ lịch sử thay vì chỉ các tin nhắn gần đây"),
+    before: Optional[str] = Query(None, description="Cursor: trang tin nhắn cũ hơn (next_cursor)"),
+    after: Optional[str] = Query(None, description="Cursor: tin nhắn mới hơn (prev_cursor)"),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
     Lấy danh sách tin nhắn trong channel (có pagination).
     Sắp xếp theo thời gian mới nhất trước.
+
+    By default only the last MESSAGE_RECENT_WINDOW_DAYS are read, so the
+    query only touches the recent monthly partitions of messages; pass
+    history=true to page through older messages.
+
+    Pages deeper than the first should use before=next_cursor (keyset on
+    (sent_at, message_id): same cost at any depth, stable while new
+    messages arrive) rather than skip; after=prev_cursor fetches newer
+    messages. Cursor pages do not count the channel (total is null).
     """
-    channel = await db.get(Channel, channel_id)
-    if not channel:
+    before_cursor, after_cursor = decode_cursors(before, after)
+
+    team_id = await membership_service.channel_team_id(db, channel_id)
+    if team_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Channel không tồn tại"
         )
 
-    member_check = await db.execute(
-        select(TeamMember).where(
-            TeamMember.team_id == channel.team_id,
-            TeamMember.user_id == current_user.user_id
-        )
+    await membership_service.require_member(
+        db, current_user.user_id, team_id,
+        detail="Bạn không có quyền xem tin nhắn trong channel này"
     )
-    if not member_check.scalar():
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Bạn không có quyền xem tin nhắn trong channel này"
-        )
 
-    count_result = await db.execute(
-        select(func.count()).where(Message.channel_id == channel_id)
-    )
-    total = count_result.scalar() or 0
-
-    result = await db.execute(
-        select(Message)
-        .where(Message.channel_id == channel_id)
-        .order_by(desc(Message.sent_at))
-        .offset(skip)
-        .limit(limit + 1)
+    # sent_at bound lets Postgres prune partitions outside the window
+    filters = [Message.channel_id == channel_id]
+    window_start = None
+    if not history:
+        window_start = datetime.now(timezone.utc) - timedelta(days=settings.MESSAGE_RECENT_WINDOW_DAYS)
+        filters.append(Message.sent_at >= window_start)
+
+    total = None
+    if before_cursor or after_cursor:
+        query = keyset_query(
+            select(Message).where(*filters), Message.sent_at, Message.message_id,
+            before_cursor, after_cursor, limit
+        )
+    else:
+        count_result = await db.execute(
+            select(func.count()).select_from(Message).where(*filters)
+        )
+        total = count_result.scalar() or 0
+        query = (
+            select(Message)
+            .where(*filters)
+            .order_by(desc(Message.sent_at), desc(Message.message_id))
+            .offset(skip)
+            .limit(limit + 1)
+        )
+    messages, has_more = keyset_rows((await db.execute(query)).scalars().all(), limit, after_cursor)
+    next_cursor, prev_cursor = keyset_cursors(
+        messages, lambda msg: (msg.sent_at, msg.message_id), has_more, after_cursor
     )
-    messages = result.scalars().all()
 
-    has_more = len(messages) > limit
-    if has_more:
-        messages = messages[:limit]
+    senders = await get_loaders(db).users.load_many(msg.sender_id for msg in messages)
 
     response_messages = []
     for msg in messages:
-        sender = await db.get(User, msg.sender_id)
+        sender = senders.get(msg.sender_id)
         response_messages.append(MessageResponse(
             message_id=msg.message_id,
             channel_id=msg.channel_id,
@@ -141,7 +167,10 @@ async def list_messages(
         total=total,
         has_more=has_more,
         skip=skip,
-        limit=limit
+        limit=limit,
+        window_start=window_start,
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor
     )
 
 
@@ -199,8 +228,6 @@ async def edit_message(
         )
 
     message.content = update_data.content
-    await db.commit()
-    await db.refresh(message)
 
     response = MessageResponse(
         message_id=message.message_id,
@@ -214,7 +241,8 @@ async def edit_message(
         reply_to_id=None
     )
 
-    await broadcast_message_updated(message.channel_id, response.model_dump())
+    enqueue_broadcast(db, "broadcast_message_updated", message.channel_id, response.model_dump(mode="json"))
+    await db.commit()
 
     return response
 
@@ -244,8 +272,7 @@ async def delete_message(
 
     channel_id = message.channel_id
     await db.delete(message)
+    enqueue_broadcast(db, "broadcast_message_deleted", channel_id, message_id)
     await db.commit()
 
-    await broadcast_message_deleted(channel_id, message_id)
-
     return None
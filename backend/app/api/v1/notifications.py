@@ -1,6 +1,7 @@
 """
 FastAPI router for Notification Management.
-Endpoints: GET /notifications, POST /notifications/read, GET /notifications/stats, DELETE /notifications/{id}
+Endpoints: GET /notifications, POST /notifications/read, GET /notifications/stats, DELETE /notifications/{id},
+GET / PUT /notifications/preferences
 """
 from typing import Annotated, Optional
 
@@ -9,10 +10,21 @@ from sqlalchemy import func, select, update, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api import deps
-from app.models.all_models import User, Notification
+from app.db.pagination import decode_cursors, keyset_cursors, keyset_query, keyset_rows
+from app.models.all_models import User, Notification, NotificationPreference
+from app.services.notification_counters import counter_deltas, notification_counters
+from app.services.notification_preferences import (
+    TYPE_BITS,
+    hours_to_mask,
+    mask_to_hours,
+    mask_to_types,
+    notification_preferences,
+    types_to_mask
+)
 from app.schemas.notification import (
     NotificationListResponse,
     NotificationMarkRead,
+    NotificationPreferences,
     NotificationResponse,
     NotificationStats
 )
@@ -36,7 +48,9 @@ async def get_user_notifications(
     skip: int = Query(0, ge=0, description="Number of notifications to skip"),
     limit: int = Query(20, ge=1, le=100, description="Number of notifications to return"),
     unread_only: bool = Query(False, description="Return only unread notifications"),
-    notification_type: Optional[str] = Query(None, description="Filter by notification type")
+    notification_type: Optional[str] = Query(None, description="Filter by notification type"),
+    before: Optional[str] = Query(None, description="Cursor: older notifications (next_cursor of the previous page)"),
+    after: Optional[str] = Query(None, description="Cursor: newer notifications (prev_cursor)")
 ) -> NotificationListResponse:
     """
     Get paginated list of notifications for the current user.
@@ -46,10 +60,20 @@ async def get_user_notifications(
     - `limit`: Number of notifications per page (default: 20, max: 100)
     - `unread_only`: Show only unread notifications (default: false)
     - `notification_type`: Filter by type (SYSTEM, MILESTONE, SUBMISSION, TEAM, MENTION, TASK)
+    - `before` / `after`: Keyset cursors from `next_cursor` / `prev_cursor`,
+      used instead of `skip` (constant cost at any depth, stable when new
+      notifications arrive)
+    
+    Newest first by `updated_at`: a coalesced notification that gets another
+    event moves back to the top (and to the newer side of the cursors).
     
     Returns:
         NotificationListResponse: List of notifications with total count and unread count
+    
+    Counts come from notification_counters, not from counting rows.
     """
+    before_cursor, after_cursor = decode_cursors(before, after)
+    
     # Build base query
     query = select(Notification).where(Notification.user_id == current_user.user_id)
     
@@ -58,30 +82,36 @@ async def get_user_notifications(
         query = query.where(Notification.is_read == False)
     
     if notification_type:
-        query = query.where(Notification.type == notification_type.upper())
+        query = query.where(func.lower(Notification.notification_type) == notification_type.lower())
     
-    # Get total count
-    count_query = select(func.count()).select_from(query.subquery())
-    total_result = await db.execute(count_query)
-    total = total_result.scalar_one()
-    
-    # Get unread count
-    unread_query = select(func.count()).where(
-        Notification.user_id == current_user.user_id,
-        Notification.is_read == False
-    )
-    unread_result = await db.execute(unread_query)
-    unread_count = unread_result.scalar_one()
+    counts = await notification_counters.get(db, current_user.user_id)
+    total = counts.total_of(notification_type, unread_only)
+    unread_count = counts.unread
     
     # Get notifications with pagination
-    query = query.order_by(Notification.created_at.desc()).offset(skip).limit(limit)
-    result = await db.execute(query)
-    notifications = result.scalars().all()
+    if before_cursor or after_cursor:
+        query = keyset_query(
+            query, Notification.updated_at, Notification.notification_id,
+            before_cursor, after_cursor, limit
+        )
+    else:
+        query = (
+            query.order_by(Notification.updated_at.desc(), Notification.notification_id.desc())
+            .offset(skip)
+            .limit(limit + 1)
+        )
+    notifications, has_more = keyset_rows((await db.execute(query)).scalars().all(), limit, after_cursor)
+    next_cursor, prev_cursor = keyset_cursors(
+        notifications, lambda n: (n.updated_at, n.notification_id), has_more, after_cursor
+    )
     
     return NotificationListResponse(
         total=total,
         unread_count=unread_count,
-        notifications=[NotificationResponse.model_validate(n) for n in notifications]
+        notifications=[NotificationResponse.model_validate(n) for n in notifications],
+        has_more=has_more,
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor
     )
 
 
@@ -121,21 +151,24 @@ async def mark_notifications_as_read(
             Notification.user_id == current_user.user_id,
             Notification.is_read == False
         )
-        .values(is_read=True, read_at=func.now())
+        .values(is_read=True)
+        .returning(Notification.user_id, Notification.notification_type)
+        .execution_options(synchronize_session=False)
     )
     
-    result = await db.execute(stmt)
-    await db.commit()
-    
-    if result.rowcount == 0:
+    updated = (await db.execute(stmt)).all()
+    if not updated:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No unread notifications found with the given IDs"
         )
     
+    await notification_counters.apply(db, counter_deltas(updated, unread=-1))
+    await db.commit()
+    
     return {
-        "message": f"Marked {result.rowcount} notification(s) as read",
-        "updated_count": result.rowcount
+        "message": f"Marked {len(updated)} notification(s) as read",
+        "updated_count": len(updated)
     }
 
 
@@ -165,15 +198,18 @@ async def mark_all_notifications_as_read(
             Notification.user_id == current_user.user_id,
             Notification.is_read == False
         )
-        .values(is_read=True, read_at=func.now())
+        .values(is_read=True)
+        .returning(Notification.user_id, Notification.notification_type)
+        .execution_options(synchronize_session=False)
     )
     
-    result = await db.execute(stmt)
+    updated = (await db.execute(stmt)).all()
+    await notification_counters.apply(db, counter_deltas(updated, unread=-1))
     await db.commit()
     
     return {
-        "message": f"Marked {result.rowcount} notification(s) as read",
-        "updated_count": result.rowcount
+        "message": f"Marked {len(updated)} notification(s) as read",
+        "updated_count": len(updated)
     }
 
 
@@ -197,34 +233,13 @@ async def get_notification_stats(
     Returns:
         NotificationStats: Total count, unread count, and breakdown by type
     """
-    # Get total count
-    total_query = select(func.count()).where(Notification.user_id == current_user.user_id)
-    total_result = await db.execute(total_query)
-    total = total_result.scalar_one()
-    
-    # Get unread count
-    unread_query = select(func.count()).where(
-        Notification.user_id == current_user.user_id,
-        Notification.is_read == False
-    )
-    unread_result = await db.execute(unread_query)
-    unread = unread_result.scalar_one()
-    
-    # Get count by type
-    by_type_query = select(
-        Notification.type,
-        func.count(Notification.notification_id).label('count')
-    ).where(
-        Notification.user_id == current_user.user_id
-    ).group_by(Notification.type)
-    
-    by_type_result = await db.execute(by_type_query)
-    by_type = {row.type: row.count for row in by_type_result}
+    counts = await notification_counters.get(db, current_user.user_id)
     
     return NotificationStats(
-        total=total,
-        unread=unread,
-        by_type=by_type
+        total=counts.total,
+        unread=counts.unread,
+        by_type=counts.by_type,
+        unread_by_type=counts.unread_by_type
     )
 
 
@@ -252,19 +267,28 @@ async def delete_notification(
     Raises:
         HTTPException 404: Notification not found or doesn't belong to user
     """
-    stmt = delete(Notification).where(
-        Notification.notification_id == notification_id,
-        Notification.user_id == current_user.user_id
+    stmt = (
+        delete(Notification)
+        .where(
+            Notification.notification_id == notification_id,
+            Notification.user_id == current_user.user_id
+        )
+        .returning(Notification.user_id, Notification.notification_type, Notification.is_read)
+        .execution_options(synchronize_session=False)
     )
     
-    result = await db.execute(stmt)
-    await db.commit()
-    
-    if result.rowcount == 0:
+    deleted = (await db.execute(stmt)).all()
+    if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Notification not found"
         )
+    
+    user_id, notification_type, is_read = deleted[0]
+    await notification_counters.apply(
+        db, counter_deltas([(user_id, notification_type)], total=-1, unread=0 if is_read else -1)
+    )
+    await db.commit()
 
 
 # ==========================================
@@ -287,15 +311,101 @@ async def delete_all_read_notifications(
     Returns:
         Success message with count of deleted notifications
     """
-    stmt = delete(Notification).where(
-        Notification.user_id == current_user.user_id,
-        Notification.is_read == True
+    stmt = (
+        delete(Notification)
+        .where(
+            Notification.user_id == current_user.user_id,
+            Notification.is_read == True
+        )
+        .returning(Notification.user_id, Notification.notification_type)
+        .execution_options(synchronize_session=False)
     )
     
-    result = await db.execute(stmt)
+    deleted = (await db.execute(stmt)).all()
+    await notification_counters.apply(db, counter_deltas(deleted, total=-1))
     await db.commit()
     
     return {
-        "message": f"Deleted {result.rowcount} read notification(s)",
-        "deleted_count": result.rowcount
-    }
\ No newline at end of file
+        "message": f"Deleted {len(deleted)} read notification(s)",
+        "deleted_count": len(deleted)
+    }
+
+
+# ==========================================
+# GET / PUT /notifications/preferences - Notification Preferences
+# ==========================================
+
+
+@router.get(
+    "/notifications/preferences",
+    response_model=NotificationPreferences,
+    summary="Get notification preferences"
+)
+async def get_notification_preferences(
+    db: Annotated[AsyncSession, Depends(deps.get_db)],
+    current_user: Annotated[User, Depends(deps.get_current_user)]
+) -> NotificationPreferences:
+    """
+    Get the current user's muted types, muted channels and quiet hours.
+    
+    Returns:
+        NotificationPreferences: Everything empty when nothing was set
+    """
+    prefs = await notification_preferences.get(db, current_user.user_id)
+    
+    return NotificationPreferences(
+        muted_types=mask_to_types(prefs.muted_types),
+        muted_channel_ids=sorted(prefs.muted_channel_ids),
+        quiet_hours=mask_to_hours(prefs.quiet_hours),
+        utc_offset_minutes=prefs.utc_offset_minutes
+    )
+
+
+@router.put(
+    "/notifications/preferences",
+    response_model=NotificationPreferences,
+    summary="Replace notification preferences"
+)
+async def update_notification_preferences(
+    *,
+    db: Annotated[AsyncSession, Depends(deps.get_db)],
+    current_user: Annotated[User, Depends(deps.get_current_user)],
+    preferences: NotificationPreferences
+) -> NotificationPreferences:
+    """
+    Replace the current user's notification preferences.
+    
+    Muted types and channels stop those notifications from being created;
+    during quiet hours notifications are still stored but not pushed.
+    
+    Raises:
+        HTTPException 400: Unknown notification type or hour outside 0-23
+    """
+    unknown = [t for t in preferences.muted_types if t not in TYPE_BITS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown notification type(s): {', '.join(unknown)}. Allowed: {', '.join(TYPE_BITS)}"
+        )
+    if any(not 0 <= hour <= 23 for hour in preferences.quiet_hours):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Quiet hours must be between 0 and 23"
+        )
+    
+    row = await db.get(NotificationPreference, current_user.user_id)
+    if row is None:
+        row = NotificationPreference(user_id=current_user.user_id)
+        db.add(row)
+    row.muted_types = types_to_mask(preferences.muted_types)
+    row.muted_channel_ids = sorted(set(preferences.muted_channel_ids))
+    row.quiet_hours = hours_to_mask(preferences.quiet_hours)
+    row.utc_offset_minutes = preferences.utc_offset_minutes
+    await db.commit()
+    
+    return NotificationPreferences(
+        muted_types=mask_to_types(row.muted_types),
+        muted_channel_ids=row.muted_channel_ids,
+        quiet_hours=mask_to_hours(row.quiet_hours),
+        utc_offset_minutes=row.utc_offset_minutes
+    )
@@ -12,6 +12,7 @@ from sqlalchemy.orm import selectinload
 from app.api import deps
 from app.models.all_models import User
 from app.schemas.user_profile import UserProfileResponse, UserProfileUpdate
+from app.services.principal_cache import principal_cache
 
 router = APIRouter()
 
@@ -113,5 +114,6 @@ async def update_current_user_profile(
     # Commit changes
     await db.commit()
     await db.refresh(user)
+    await principal_cache.invalidate(user.user_id)
     
     return UserProfileResponse.model_validate(user)
\ No newline at end of file
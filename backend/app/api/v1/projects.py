@@ -10,6 +10,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.db.session import get_db
+from app.db.mutations import guarded_update
 from app.api.deps import get_current_user
 from app.models.all_models import Project, Topic, Team, User
 from app.schemas.project import (
@@ -110,34 +111,24 @@ async def claim_project(
             detail="Only students can claim projects"
         )
     
-    result = await db.execute(
-        select(Project).where(Project.project_id == project_id)
-    )
-    project = result.scalar_one_or_none()
-    
-    if not project:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found"
-        )
+    # Claim only if unclaimed; re-claiming your own project is a no-op
+    def conflict(current: Project):
+        if current.claimed_by_id == current_user.user_id:
+            return None
+        return "Project is already claimed by another student"
     
-    # Check if already claimed
-    if project.claimed_by_id:
-        if project.claimed_by_id == current_user.user_id:
-            return project # Already claimed by current user
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Project is already claimed by another student"
-        )
-        
-    # Claim it
-    project.claimed_by_id = current_user.user_id
-    project.claimed_at = datetime.now(timezone.utc)
-    project.status = "claimed"
-    
-    db.add(project)
-    await db.commit()
-    await db.refresh(project)
+    result = await guarded_update(
+        db, Project, project_id,
+        {
+            "claimed_by_id": current_user.user_id,
+            "claimed_at": datetime.now(timezone.utc),
+            "status": "claimed",
+        },
+        where=[Project.claimed_by_id.is_(None)],
+        not_found="Project not found",
+        conflict=conflict,
+    )
+    project = result.obj
     return project
 
 
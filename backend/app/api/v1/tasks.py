@@ -11,12 +11,15 @@ Description:
 """
 
 from fastapi import APIRouter, HTTPException, Depends, status
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, or_, exists, func
+from sqlalchemy.orm import aliased
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timezone
 from typing import Optional
 
 from app.db.session import get_db
+from app.db.loaders import get_loaders
+from app.db.mutations import guarded_update
 from app.api.deps import get_current_user
 from app.models.all_models import User, Sprint, Task
 from app.schemas.task import TaskCreate, TaskUpdate
@@ -281,20 +284,16 @@ async def get_tasks(
     result = await db.execute(query)
     tasks = result.scalars().all()
     
+    # Resolve assignees and creators with one batched query
+    users = await get_loaders(db).users.load_many(
+        [t.assigned_to for t in tasks] + [t.created_by for t in tasks]
+    )
+    
     tasks_response = []
     for t in tasks:
-        # Get assigned user name
-        assigned_name = None
-        if t.assigned_to:
-            user_query = select(User).where(User.user_id == t.assigned_to)
-            user_result = await db.execute(user_query)
-            assigned_user = user_result.scalar()
-            assigned_name = assigned_user.full_name if assigned_user else None
-        
-        # Get creator name
-        creator_query = select(User).where(User.user_id == t.created_by)
-        creator_result = await db.execute(creator_query)
-        creator = creator_result.scalar()
+        assigned_user = users.get(t.assigned_to)
+        assigned_name = assigned_user.full_name if assigned_user else None
+        creator = users.get(t.created_by)
         
         tasks_response.append({
             "task_id": t.task_id,
@@ -348,18 +347,11 @@ async def get_task_detail(
             detail="Task not found"
         )
     
-    # Get assigned user name
-    assigned_name = None
-    if task.assigned_to:
-        user_query = select(User).where(User.user_id == task.assigned_to)
-        user_result = await db.execute(user_query)
-        assigned_user = user_result.scalar()
-        assigned_name = assigned_user.full_name if assigned_user else None
-    
-    # Get creator name
-    creator_query = select(User).where(User.user_id == task.created_by)
-    creator_result = await db.execute(creator_query)
-    creator = creator_result.scalar()
+    # Get assignee and creator in one query
+    users = await get_loaders(db).users.load_many([task.assigned_to, task.created_by])
+    assigned_user = users.get(task.assigned_to)
+    assigned_name = assigned_user.full_name if assigned_user else None
+    creator = users.get(task.created_by)
     
     return {
         "task_id": task.task_id,
@@ -386,7 +378,8 @@ async def update_task(
 ):
     """
     Update task details (title, description, status, priority, assigned_to)
-    - Status must be one of: TODO, DOING, DONE, BLOCKED
+    - Status must be one of: TODO, DOING, REVIEW, DONE, and a change must be
+      a valid transition (see change_task_status); otherwise 409
     
     Request:
         {
@@ -407,52 +400,38 @@ async def update_task(
         }
     """
     
-    # Get task
-    query = select(Task).where(Task.task_id == task_id)
-    result = await db.execute(query)
-    task = result.scalar()
-    
-    if not task:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Task not found"
-        )
-    
-    # Update fields if provided
-    if task_update.title is not None:
-        task.title = task_update.title
-    
-    if task_update.description is not None:
-        task.description = task_update.description
+    values = {
+        field: value
+        for field in ("title", "description", "priority", "assigned_to", "blocked_reason", "depends_on")
+        if (value := getattr(task_update, field)) is not None
+    }
+    values["updated_at"] = datetime.now(timezone.utc)
     
-    # Validate status
+    # Status edits follow the same transitions as PATCH /{task_id}/status;
+    # resending the current status is not a transition
+    where, conflict = [], "Task was changed concurrently"
     if task_update.status is not None:
-        valid_statuses = ["TODO", "DOING", "DONE", "BLOCKED"]
-        if task_update.status not in valid_statuses:
+        new_status = task_update.status.upper()
+        if new_status not in STATUS_TRANSITIONS:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Status must be one of: {valid_statuses}"
+                detail=f"Status must be one of: {list(STATUS_TRANSITIONS)}"
             )
-        task.status = task_update.status
-    
-    if task_update.priority is not None:
-        task.priority = task_update.priority
-    
-    if task_update.assigned_to is not None:
-        task.assigned_to = task_update.assigned_to
-    
-    if task_update.blocked_reason is not None:
-        task.blocked_reason = task_update.blocked_reason
-        
-    if task_update.depends_on is not None:
-        task.depends_on = task_update.depends_on
-    
-    # Update timestamp
-    task.updated_at = datetime.now(timezone.utc)
-    
-    db.add(task)
-    await db.commit()
-    await db.refresh(task)
+        depends_on = task_update.depends_on if task_update.depends_on is not None else Task.depends_on
+        sources, preconditions = status_change_preconditions(new_status, depends_on)
+        where = [or_(func.upper(func.coalesce(Task.status, "TODO")) == new_status, and_(*preconditions))]
+        conflict = status_change_conflict(new_status, sources)
+        values["status"] = new_status
+    
+    # Check and update in one UPDATE ... RETURNING
+    task = (
+        await guarded_update(
+            db, Task, task_id, values,
+            where=where,
+            not_found="Task not found",
+            conflict=conflict,
+        )
+    ).obj
     
     # Get assigned user name
     assigned_name = None
@@ -539,6 +518,46 @@ def validate_status_transition(current_status: str, new_status: str) -> bool:
     return new in allowed
 
 
+def allowed_source_statuses(new_status: str) -> list:
+    """Statuses a task may move to new_status from (reverse of STATUS_TRANSITIONS)."""
+    new = new_status.upper()
+    return [current for current, allowed in STATUS_TRANSITIONS.items() if new in allowed]
+
+
+def status_change_preconditions(new_status: str, depends_on=Task.depends_on) -> tuple:
+    """
+    (allowed source statuses, UPDATE preconditions) for moving a task to new_status.
+    
+    NULL status counts as TODO; moving to DONE also needs the dependency
+    (``depends_on``: column or new value) to be DONE when it exists.
+    """
+    sources = allowed_source_statuses(new_status)
+    preconditions = [
+        or_(func.upper(Task.status).in_(sources), Task.status.is_(None))
+        if "TODO" in sources
+        else func.upper(Task.status).in_(sources)
+    ]
+    if new_status == "DONE":
+        dependency = aliased(Task)
+        preconditions.append(
+            ~exists().where(
+                dependency.task_id == depends_on,
+                or_(dependency.status.is_(None), dependency.status != "DONE"),
+            )
+        )
+    return sources, preconditions
+
+
+def status_change_conflict(new_status: str, sources: list):
+    """409 detail builder for a failed status precondition."""
+    def conflict(current: Task) -> str:
+        current_status = (current.status or "TODO").upper()
+        if current_status not in sources:
+            return f"Invalid status transition: {current_status} → {new_status}"
+        return f"Cannot complete task. Dependency task {current.depends_on} is not DONE."
+    return conflict
+
+
 # ============================================================================
 # NEW ENDPOINTS: Sprint Tasks, Status Change, Assignment
 # ============================================================================
@@ -583,15 +602,13 @@ async def get_sprint_tasks(
     result = await db.execute(query)
     tasks = result.scalars().all()
     
+    # Resolve assignees with one batched query
+    users = await get_loaders(db).users.load_many(t.assigned_to for t in tasks)
+    
     tasks_response = []
     for t in tasks:
-        # Get assigned user name
-        assigned_name = None
-        if t.assigned_to:
-            user_query = select(User).where(User.user_id == t.assigned_to)
-            user_result = await db.execute(user_query)
-            assigned_user = user_result.scalar()
-            assigned_name = assigned_user.full_name if assigned_user else None
+        assigned_user = users.get(t.assigned_to)
+        assigned_name = assigned_user.full_name if assigned_user else None
         
         tasks_response.append({
             "task_id": t.task_id,
@@ -637,48 +654,30 @@ async def change_task_status(
             "updated_at": "..."
         }
     """
-    # Get task
-    query = select(Task).where(Task.task_id == task_id)
-    result = await db.execute(query)
-    task = result.scalar()
-    
-    if not task:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Task not found"
-        )
-    
-    old_status = task.status or "TODO"
     new_status_upper = new_status.upper()
-    
-    # Validate transition
-    if not validate_status_transition(old_status, new_status_upper):
+    sources = allowed_source_statuses(new_status_upper)
+    if not sources:
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-            detail=f"Invalid status transition: {old_status} → {new_status_upper}"
+            detail=f"Invalid status: {new_status_upper}"
         )
     
+    _, preconditions = status_change_preconditions(new_status_upper)
     
-    # If moving to DONE, check dependencies
-    if new_status_upper == "DONE" and task.depends_on:
-        dep_query = select(Task).where(Task.task_id == task.depends_on)
-        dep_result = await db.execute(dep_query)
-        dep_task = dep_result.scalar()
-        if dep_task and dep_task.status != "DONE":
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Cannot complete task. Dependency task {task.depends_on} is not DONE."
-            )
-
-    # Update
-    task.status = new_status_upper
-    task.updated_at = datetime.now(timezone.utc)
+    values = {"status": new_status_upper, "updated_at": datetime.now(timezone.utc)}
     if blocked_reason is not None:
-        task.blocked_reason = blocked_reason
-    
-    db.add(task)
-    await db.commit()
-    await db.refresh(task)
+        values["blocked_reason"] = blocked_reason
+    
+    # Check and update in one UPDATE ... RETURNING
+    result = await guarded_update(
+        db, Task, task_id, values,
+        where=preconditions,
+        previous=[Task.status],
+        not_found="Task not found",
+        conflict=status_change_conflict(new_status_upper, sources),
+    )
+    task = result.obj
+    old_status = result.previous["status"] or "TODO"
     
     return {
         "task_id": task.task_id,
@@ -712,28 +711,6 @@ async def assign_task(
             "updated_at": "..."
         }
     """
-    # Get task
-    query = select(Task).where(Task.task_id == task_id)
-    result = await db.execute(query)
-    task = result.scalar()
-    
-    if not task:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Task not found"
-        )
-    
-    # Get sprint to find team_id
-    sprint_query = select(Sprint).where(Sprint.sprint_id == task.sprint_id)
-    sprint_result = await db.execute(sprint_query)
-    sprint = sprint_result.scalar()
-    
-    if not sprint:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Task is not associated with a sprint"
-        )
-    
     # Convert user_id string to UUID
     try:
         target_user_id = PyUUID(user_id)
@@ -743,38 +720,42 @@ async def assign_task(
             detail="Invalid user_id format"
         )
     
-    # Check if user is a team member
-    member_query = select(TeamMember).where(
-        and_(
-            TeamMember.team_id == sprint.team_id,
-            TeamMember.user_id == target_user_id
-        )
+    # The assignee must be a member of the team that owns the task's sprint
+    is_team_member = exists().where(
+        TeamMember.team_id == (
+            select(Sprint.team_id)
+            .where(Sprint.sprint_id == Task.sprint_id)
+            .correlate(Task)
+            .scalar_subquery()
+        ),
+        TeamMember.student_id == target_user_id,
+    )
+    assignee_name = (
+        select(User.full_name)
+        .where(User.user_id == target_user_id)
+        .scalar_subquery()
+        .label("assignee_name")
     )
-    member_result = await db.execute(member_query)
-    member = member_result.scalar()
-    
-    if not member:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User is not a member of the team"
-        )
-    
-    # Assign
-    task.assigned_to = target_user_id
-    task.updated_at = datetime.now(timezone.utc)
-    
-    db.add(task)
-    await db.commit()
-    await db.refresh(task)
     
-    # Get assigned user name
-    user_query = select(User).where(User.user_id == target_user_id)
-    user_result = await db.execute(user_query)
-    assigned_user = user_result.scalar()
+    def conflict(current: Task) -> str:
+        if current.sprint_id is None:
+            return "Task is not associated with a sprint"
+        return "User is not a member of the team"
+    
+    # Check membership, assign and resolve the assignee name in one round trip
+    result = await guarded_update(
+        db, Task, task_id,
+        {"assigned_to": target_user_id, "updated_at": datetime.now(timezone.utc)},
+        where=[is_team_member],
+        returning=[assignee_name],
+        not_found="Task not found",
+        conflict=conflict,
+    )
+    task = result.obj
     
     return {
         "task_id": task.task_id,
-        "assigned_to": assigned_user.full_name if assigned_user else str(target_user_id),
+        "assigned_to": result.extra["assignee_name"] or str(target_user_id),
         "updated_at": task.updated_at
     }
 
@@ -20,9 +20,13 @@ from typing import Optional
 import secrets
 
 from app.db.session import get_db
+from app.db.loaders import get_loaders
+from app.db.mutations import guarded_update
 from app.api.deps import get_current_user
 from app.models.all_models import User, Team, TeamMember, Project
 from app.schemas.team import TeamCreate, TeamResponse, TeamProjectSelect
+from app.services.membership_service import membership_service
+from app.services.socket_manager import team_presence
 
 router = APIRouter()
 
@@ -177,18 +181,24 @@ async def get_teams(
     result = await db.execute(query)
     teams = result.scalars().all()
     
-    teams_response = []
-    for t in teams:
-        # Count members
+    # Count members of all listed teams in one grouped query
+    team_ids = [t.team_id for t in teams]
+    member_counts = {}
+    if team_ids:
         member_count_result = await db.execute(
-            select(func.count()).where(TeamMember.team_id == t.team_id)
+            select(TeamMember.team_id, func.count())
+            .where(TeamMember.team_id.in_(team_ids))
+            .group_by(TeamMember.team_id)
         )
-        member_count = member_count_result.scalar() or 0
-        
-        # Get creator name
-        creator_query = select(User).where(User.user_id == t.created_by)
-        creator_result = await db.execute(creator_query)
-        creator = creator_result.scalar()
+        member_counts = dict(member_count_result.all())
+    
+    # Resolve creators with one batched query
+    creators = await get_loaders(db).users.load_many(t.created_by for t in teams)
+    
+    teams_response = []
+    for t in teams:
+        member_count = member_counts.get(t.team_id, 0)
+        creator = creators.get(t.created_by)
         
         teams_response.append({
             "team_id": t.team_id,
@@ -254,22 +264,20 @@ async def get_team_detail(
             detail="Team not found"
         )
     
-    # Get creator info
-    creator_query = select(User).where(User.user_id == team.created_by)
-    creator_result = await db.execute(creator_query)
-    creator = creator_result.scalar()
-    
     # Get members
     member_query = select(TeamMember).where(TeamMember.team_id == team_id)
     member_result = await db.execute(member_query)
     team_members = member_result.scalars().all()
     
+    # Resolve creator and member users with one batched query
+    users = await get_loaders(db).users.load_many(
+        [team.created_by] + [tm.user_id for tm in team_members]
+    )
+    creator = users.get(team.created_by)
+    
     members_response = []
     for tm in team_members:
-        # Get user info
-        user_query = select(User).where(User.user_id == tm.user_id)
-        user_result = await db.execute(user_query)
-        user = user_result.scalar()
+        user = users.get(tm.user_id)
         
         members_response.append({
             "user_id": tm.user_id,
@@ -292,6 +300,40 @@ async def get_team_detail(
     }
 
 
+@router.get("/{team_id}/presence")
+async def get_team_presence(
+    team_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Online state and last seen of the team's members (instead of polling:
+    load once, then apply presence_diff socket events)
+
+    Response:
+        {
+            "team_id": 1,
+            "members": [
+                {"user_id": "uuid-1", "online": true, "last_seen_at": "2026-01-28T10:00:00Z"}
+            ],
+            "online_count": 1
+        }
+    """
+    # Admins and lecturers may watch any team
+    if current_user.role_id not in (1, 4):
+        await membership_service.require_member(
+            db, current_user.user_id, team_id,
+            detail="You are not a member of this team"
+        )
+
+    members = await team_presence(db, team_id)
+    return {
+        "team_id": team_id,
+        "members": members,
+        "online_count": sum(1 for m in members if m["online"])
+    }
+
+
 @router.post("/{team_id}/join", status_code=200)
 async def join_team(
     team_id: int,
@@ -458,30 +500,13 @@ async def finalize_team(
             detail="Only lecturers or admins can finalize teams"
         )
     
-    # Get team
-    query = select(Team).where(Team.team_id == team_id)
-    result = await db.execute(query)
-    team = result.scalar()
-    
-    if not team:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Team not found"
-        )
-    
-    # Already finalized?
-    if team.is_finalized:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Team is already finalized"
-        )
-    
-    # Finalize
-    team.is_finalized = True
-    team.join_code = None  # Clear join code
-    
-    db.add(team)
-    await db.commit()
+    # Finalize = clear join code, only if not finalized yet (404 / 409 otherwise)
+    await guarded_update(
+        db, Team, team_id, {"join_code": None},
+        where=[Team.join_code.is_not(None)],
+        not_found="Team not found",
+        conflict="Team is already finalized",
+    )
     
     return {
         "team_id": team_id,
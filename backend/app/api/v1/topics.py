@@ -17,6 +17,9 @@ from datetime import datetime, timezone
 from typing import Optional
 
 from app.db.session import get_db
+from app.db.loaders import get_loaders
+from app.db.mutations import guarded_update
+from app.dao.topic_dao import topic_is_reviewable
 from app.api.deps import get_current_user
 from app.models.all_models import User, Topic, EvaluationCriterion, Evaluation
 from app.schemas.topic import (
@@ -138,12 +141,12 @@ async def get_topics(
     result = await db.execute(query)
     topics = result.scalars().all()
     
+    # Resolve creators with one batched query
+    creators = await get_loaders(db).users.load_many(t.creator_id for t in topics)
+    
     topics_response = []
     for t in topics:
-        # Get creator name
-        creator_query = select(User).where(User.user_id == t.creator_id)
-        creator_result = await db.execute(creator_query)
-        creator = creator_result.scalar()
+        creator = creators.get(t.creator_id)
         
         topics_response.append({
             "topic_id": t.topic_id,
@@ -245,28 +248,22 @@ async def approve_topic(
             detail="Only admins or heads of department can approve topics"
         )
     
-    # Get topic
-    query = select(Topic).where(Topic.topic_id == topic_id)
-    result = await db.execute(query)
-    topic = result.scalar()
-    
-    if not topic:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Topic not found"
-        )
-    
-    # Update status
-    topic.status = "APPROVED"
-    
-    db.add(topic)
-    await db.commit()
+    # Review in one guarded UPDATE ... RETURNING (404 missing, 409 already reviewed)
+    reviewed_at = datetime.now(timezone.utc)
+    result = await guarded_update(
+        db, Topic, topic_id,
+        {"status": "APPROVED", "approved_by": current_user.user_id, "approved_at": reviewed_at},
+        where=[topic_is_reviewable()],
+        not_found="Topic not found",
+        conflict=lambda current: f"Topic is already {current.status}",
+    )
+    topic = result.obj
     
     return {
         "topic_id": topic.topic_id,
         "status": topic.status,
         "approved_by": current_user.full_name,
-        "approved_at": datetime.now(timezone.utc)
+        "approved_at": topic.approved_at
     }
 
 
@@ -297,28 +294,22 @@ async def reject_topic(
             detail="Only admins or heads of department can reject topics"
         )
     
-    # Get topic
-    query = select(Topic).where(Topic.topic_id == topic_id)
-    result = await db.execute(query)
-    topic = result.scalar()
-    
-    if not topic:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Topic not found"
-        )
-    
-    # Update status
-    topic.status = "REJECTED"
-    
-    db.add(topic)
-    await db.commit()
+    # Review in one guarded UPDATE ... RETURNING (404 missing, 409 already reviewed)
+    reviewed_at = datetime.now(timezone.utc)
+    result = await guarded_update(
+        db, Topic, topic_id,
+        {"status": "REJECTED", "approved_by": current_user.user_id, "approved_at": reviewed_at},
+        where=[topic_is_reviewable()],
+        not_found="Topic not found",
+        conflict=lambda current: f"Topic is already {current.status}",
+    )
+    topic = result.obj
     
     return {
         "topic_id": topic.topic_id,
         "status": topic.status,
         "rejected_by": current_user.full_name,
-        "rejected_at": datetime.now(timezone.utc)
+        "rejected_at": topic.approved_at
     }
 
 
@@ -433,12 +424,12 @@ async def get_evaluations(
     result = await db.execute(query)
     evaluations = result.scalars().all()
     
+    # Resolve evaluators with one batched query
+    evaluators = await get_loaders(db).users.load_many(e.evaluator_id for e in evaluations)
+    
     evaluations_response = []
     for e in evaluations:
-        # Get evaluator name
-        evaluator_query = select(User).where(User.user_id == e.evaluator_id)
-        evaluator_result = await db.execute(evaluator_query)
-        evaluator = evaluator_result.scalar()
+        evaluator = evaluators.get(e.evaluator_id)
         
         evaluations_response.append({
             "evaluation_id": e.evaluation_id,
@@ -8,6 +8,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.api import deps
 from app.models.all_models import Department, User
 from app.schemas import user as user_schema
+from app.services.principal_cache import principal_cache
 
 router = APIRouter()
 
@@ -72,6 +73,7 @@ async def assign_user_department(
     user.dept_id = payload.dept_id
     await db.commit()
     await db.refresh(user)
+    await principal_cache.invalidate(user.user_id)
     return user
 
 
@@ -97,4 +99,5 @@ async def assign_user_role(
     user.role_id = payload.role_id
     await db.commit()
     await db.refresh(user)
+    await principal_cache.invalidate(user.user_id)
     return user
@@ -0,0 +1,278 @@
+"""Caching helpers: an in-process TTL/LRU map and async cache backends."""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Generic, Hashable, Optional, TypeVar
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+V = TypeVar("V")
+
+_MISSING = object()
+
+
+class TTLLRUCache(Generic[V]):
+    """
+    Bounded mapping whose entries expire after ``ttl`` seconds.
+
+    When full, the least recently used entry is evicted. Not thread-safe;
+    meant for use from the event loop.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple[float, V]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Optional[V] = None) -> Optional[V]:
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: V, ttl: Optional[float] = None) -> None:
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+class MemoryCacheBackend:
+    """
+    Async facade over a per-process TTLLRUCache.
+
+    With an invalidation bus (several workers), deletes are also published so
+    every other worker drops its copy of the entry.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, name: str = "", bus: Optional["CacheInvalidationBus"] = None):
+        self._cache: TTLLRUCache[Any] = TTLLRUCache(maxsize=maxsize, ttl=ttl)
+        self.name = name
+        self.bus = bus
+        if bus is not None:
+            bus.register(name, self._cache)
+
+    async def get(self, key: str) -> Optional[Any]:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: Any) -> None:
+        self._cache.set(key, value)
+
+    async def delete(self, key: str) -> None:
+        self._cache.delete(key)
+        if self.bus is not None:
+            await self.bus.publish(self.name, key)
+
+    def delete_nowait(self, key: str) -> None:
+        self._cache.delete(key)
+        if self.bus is not None:
+            self.bus.publish_nowait(self.name, key)
+
+    def stats(self) -> dict:
+        return {"backend": "memory", "shared_invalidation": self.bus is not None, **self._cache.stats()}
+
+
+class RedisCacheBackend:
+    """
+    JSON values in Redis under ``<prefix><key>`` with a Redis TTL, shared by
+    all workers. Redis errors behave like misses.
+
+    ``decode`` turns the loaded JSON back into the cached value (e.g. parse
+    UUID / datetime strings).
+    """
+
+    def __init__(self, url: str, prefix: str, ttl: float, decode: Optional[Callable[[Any], Any]] = None):
+        from redis import asyncio as aioredis
+
+        self._redis = aioredis.from_url(url)
+        self.prefix = prefix
+        self.ttl = int(ttl)
+        self.decode = decode
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _encode(value: Any) -> str:
+        return json.dumps(
+            value,
+            default=lambda v: v.isoformat() if isinstance(v, (date, datetime)) else str(v),
+        )
+
+    async def get(self, key: str) -> Optional[Any]:
+        try:
+            raw = await self._redis.get(self.prefix + key)
+        except Exception as e:  # Redis down: behave like a miss
+            logger.warning(f"Cache read failed for {self.prefix}{key}: {e}")
+            return None
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        value = json.loads(raw)
+        return self.decode(value) if self.decode else value
+
+    async def set(self, key: str, value: Any) -> None:
+        try:
+            await self._redis.set(self.prefix + key, self._encode(value), ex=self.ttl)
+        except Exception as e:
+            logger.warning(f"Cache write failed for {self.prefix}{key}: {e}")
+
+    async def delete(self, key: str) -> None:
+        try:
+            await self._redis.delete(self.prefix + key)
+        except Exception as e:
+            logger.error(f"Cache invalidation failed for {self.prefix}{key}: {e}")
+
+    def delete_nowait(self, key: str) -> None:
+        try:
+            asyncio.get_running_loop().create_task(self.delete(key))
+        except RuntimeError:  # no running loop (scripts)
+            pass
+
+    def stats(self) -> dict:
+        return {"backend": "redis", "hits": self.hits, "misses": self.misses}
+
+
+class CacheInvalidationBus:
+    """
+    Relays deletes of per-process caches to the other workers over Redis
+    pub/sub (one channel, messages "<origin> <cache name> <key>").
+
+    A worker only hears invalidations while subscribed. Every (re)subscribe
+    therefore clears all local caches, so nothing published while the
+    connection was down is missed; a failed publish is logged and the
+    entry on other workers lives at most its TTL.
+    """
+
+    def __init__(self, url: str, channel: str):
+        from redis import asyncio as aioredis
+
+        self._redis = aioredis.from_url(url, decode_responses=True)
+        self.channel = channel
+        self.origin = uuid.uuid4().hex
+        self._caches: Dict[str, TTLLRUCache] = {}
+        self.published = 0
+        self.received = 0
+        self.resets = 0
+
+    def register(self, name: str, cache: TTLLRUCache) -> None:
+        self._caches[name] = cache
+
+    async def publish(self, name: str, key: str) -> None:
+        try:
+            await self._redis.publish(self.channel, f"{self.origin} {name} {key}")
+            self.published += 1
+        except Exception as e:
+            logger.error(f"Cache invalidation broadcast failed for {name}{key}: {e}")
+
+    def publish_nowait(self, name: str, key: str) -> None:
+        try:
+            asyncio.get_running_loop().create_task(self.publish(name, key))
+        except RuntimeError:  # no running loop (scripts)
+            pass
+
+    def _apply(self, data: str) -> None:
+        origin, name, key = data.split(" ", 2)
+        cache = self._caches.get(name)
+        if origin != self.origin and cache is not None:
+            cache.delete(key)
+            self.received += 1
+
+    async def run(self) -> None:
+        """Listen for other workers' invalidations (started from app startup)."""
+        while True:
+            try:
+                async with self._redis.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    # Anything invalidated while not subscribed is unknown: start empty
+                    for cache in self._caches.values():
+                        cache.clear()
+                    self.resets += 1
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self._apply(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Cache invalidation listener failed, resubscribing: {e}")
+                await asyncio.sleep(1.0)
+
+    def stats(self) -> dict:
+        return {
+            "channel": self.channel,
+            "caches": sorted(self._caches),
+            "published": self.published,
+            "received": self.received,
+            "resets": self.resets,
+        }
+
+
+def create_invalidation_bus() -> Optional[CacheInvalidationBus]:
+    """Bus when workers share Redis (SOCKETIO_MANAGER = "redis"), else None."""
+    if settings.SOCKETIO_MANAGER.lower() != "redis":
+        return None
+    return CacheInvalidationBus(
+        settings.SOCKETIO_REDIS_URL or settings.REDIS_URL, settings.CACHE_INVALIDATION_CHANNEL
+    )
+
+
+# Export singleton (None with a single worker)
+invalidation_bus = create_invalidation_bus()
+
+
+def create_cache_backend(
+    kind: str,
+    *,
+    maxsize: int,
+    ttl: float,
+    redis_url: str,
+    redis_prefix: str,
+    decode: Optional[Callable[[Any], Any]] = None,
+):
+    """
+    Backend for a ``*_CACHE_BACKEND`` setting: "memory", "redis" or "none".
+
+    "memory" backends publish their deletes on the invalidation bus when
+    there are several workers; ``redis_prefix`` names the cache there.
+
+    Returns:
+        None when caching is disabled
+    """
+    kind = kind.lower()
+    if kind == "redis":
+        return RedisCacheBackend(redis_url, redis_prefix, ttl, decode=decode)
+    if kind == "memory":
+        return MemoryCacheBackend(maxsize, ttl, name=redis_prefix, bus=invalidation_bus)
+    return None
@@ -10,6 +10,9 @@ from app.core.config import settings
 # Maximum password length for bcrypt compatibility (72 bytes)
 MAX_BCRYPT_BYTES = 72
 
+# "typ" claim of access tokens (refresh tokens are opaque, see refresh_token_service)
+ACCESS_TOKEN_TYPE = "access"
+
 try:  # pragma: no cover - defensive patch for bcrypt>=4.1
     import bcrypt  # type: ignore
     from types import SimpleNamespace
@@ -18,23 +21,68 @@ try:  # pragma: no cover - defensive patch for bcrypt>=4.1
         bcrypt.__about__ = SimpleNamespace(__version__=bcrypt.__version__)
 except Exception:  # noqa: BLE001 - failing silently keeps startup resilient
     pass
+
+
+def build_pwd_context(rounds: int) -> CryptContext:
+    """
+    PBKDF2 context with the given work factor.
+
+    Hashes below ``rounds`` (or in the legacy sha256_crypt scheme used by old
+    user imports) still verify but are reported as needing an update.
+    """
+    return CryptContext(
+        schemes=["pbkdf2_sha256", "sha256_crypt"],
+        deprecated="auto",
+        pbkdf2_sha256__default_rounds=rounds,
+        pbkdf2_sha256__min_rounds=rounds,
+    )
+
+
 # Setup password hashing (PBKDF2 to avoid bcrypt wheel issues on some platforms)
-pwd_context = CryptContext(
-    schemes=["pbkdf2_sha256"],
-    deprecated="auto",
-)
+pwd_context = build_pwd_context(settings.PASSWORD_HASH_ROUNDS)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Check if plain password matches hashed password."""
+    """Check if plain password matches hashed password (blocking; prefer password_hasher in request handlers)."""
     return pwd_context.verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    """Hash a password for storing in database."""
+    """Hash a password for storing in database (blocking; prefer password_hasher in request handlers)."""
+    check_password_length(password)
+    return pwd_context.hash(password)
+
+
+def check_password_length(password: str) -> None:
     if len(password.encode("utf-8")) > MAX_BCRYPT_BYTES:
         raise ValueError("Password must be at most 72 bytes when encoded in UTF-8")
-    return pwd_context.hash(password)
+
+
+# ---- CPU-bound entry points run in the hashing process pool ----
+# (top-level functions so they can be pickled; the context is rebuilt per work factor)
+
+_contexts: dict = {}
+
+
+def _context_for(rounds: int) -> CryptContext:
+    context = _contexts.get(rounds)
+    if context is None:
+        context = _contexts[rounds] = build_pwd_context(rounds)
+    return context
+
+
+def hash_password_with_rounds(password: str, rounds: int) -> str:
+    return _context_for(rounds).hash(password)
+
+
+def verify_and_update_password(password: str, hashed_password: str, rounds: int) -> tuple[bool, str | None]:
+    """Return (matches, new_hash); new_hash is set when the stored hash is outdated."""
+    if not hashed_password:
+        return False, None
+    try:
+        return _context_for(rounds).verify_and_update(password, hashed_password)
+    except ValueError:  # unknown / malformed hash
+        return False, None
 
 
 def create_access_token(subject: Union[str, Any], expires_delta: timedelta = None) -> str:
@@ -44,11 +92,25 @@ def create_access_token(subject: Union[str, Any], expires_delta: timedelta = Non
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode = {"exp": expire, "sub": str(subject)}
+    to_encode = {"exp": expire, "sub": str(subject), "typ": ACCESS_TOKEN_TYPE}
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 
+def decode_access_token(token: str) -> dict:
+    """
+    Decode an access token.
+
+    Raises jwt.ExpiredSignatureError / jwt.JWTError when the token is invalid
+    or is not an access token. Tokens issued before the "typ" claim existed
+    are still accepted.
+    """
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    if payload.get("typ", ACCESS_TOKEN_TYPE) != ACCESS_TOKEN_TYPE:
+        raise jwt.JWTError("Not an access token")
+    return payload
+
+
 def verify_token(token: str) -> dict | None:
     """
     Verify JWT token and return payload.
@@ -61,12 +123,7 @@ def verify_token(token: str) -> dict | None:
         Token payload dict or None if invalid
     """
     try:
-        payload = jwt.decode(
-            token, 
-            settings.SECRET_KEY, 
-            algorithms=[settings.ALGORITHM]
-        )
-        return payload
+        return decode_access_token(token)
     except jwt.ExpiredSignatureError:
         return None
     except jwt.JWTError:
@@ -1,12 +1,22 @@
 from typing import List, Optional
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
+from app.db.mutations import guarded_update
 from app.models.all_models import Topic, User
 from app.schemas.topic import TopicCreate, TopicUpdate
 import datetime
 import time
 
+# Topics waiting for a HEAD_DEPT / ADMIN decision (NULL = legacy rows)
+REVIEWABLE_TOPIC_STATUSES = ("DRAFT", "PENDING")
+
+
+def topic_is_reviewable():
+    """SQL precondition: the topic can still be approved or rejected."""
+    return or_(Topic.status.in_(REVIEWABLE_TOPIC_STATUSES), Topic.status.is_(None))
+
+
 class TopicDAO:
     _cache = {}
     _cache_ttl = 0  # disabled to avoid stale status after approval
@@ -82,20 +92,29 @@ class TopicDAO:
         
         return new_topic
 
-    async def update_topic_status(self, topic: Topic, status: str, approved_by: Optional[any] = None) -> Topic:
-        topic.status = status
+    async def update_topic_status(self, topic_id: int, status: str, approved_by: Optional[any] = None) -> Topic:
+        """
+        Review a topic (APPROVED / REJECTED) with one guarded UPDATE ... RETURNING.
+
+        Only topics still waiting for review can change; 404 if the topic does
+        not exist, 409 if it was already reviewed.
+        """
+        values = {"status": status}
         if status == "APPROVED" or status == "REJECTED":
-            topic.approved_by = approved_by
-            topic.approved_at = datetime.datetime.now(datetime.timezone.utc)
-        
-        self.db.add(topic)
-        await self.db.commit()
-        await self.db.refresh(topic)
-        
+            values["approved_by"] = approved_by
+            values["approved_at"] = datetime.datetime.now(datetime.timezone.utc)
+
+        result = await guarded_update(
+            self.db, Topic, topic_id, values,
+            where=[topic_is_reviewable()],
+            not_found="Topic not found",
+            conflict=lambda current: f"Topic is already {current.status}",
+        )
+
         # Invalidate cache
         self._cache.clear()
-        
-        return topic
+
+        return result.obj
 
     async def delete_topic(self, topic: Topic) -> None:
         """Delete a topic and invalidate cache."""
@@ -0,0 +1,141 @@
+"""
+Request-scoped batched entity loaders (DataLoader style).
+
+List endpoints used to resolve related rows one at a time (one ``select(User)``
+per task, message, log...). A loader collects the keys a handler needs and
+resolves them with a single ``WHERE pk IN (...)`` query per entity type, keeping
+a per-request identity map so the same key is never fetched twice.
+
+Loaders live on ``session.info`` so they share the lifetime of the request's
+database session:
+
+    loaders = get_loaders(db)
+    users = await loaders.users.load_many(t.created_by for t in tasks)
+    creator = users.get(task.created_by)
+"""
+
+import asyncio
+from typing import Any, Dict, Generic, Hashable, Iterable, Optional, Set, Type, TypeVar
+
+from sqlalchemy import inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.all_models import User
+
+T = TypeVar("T")
+
+_SESSION_INFO_KEY = "entity_loaders"
+
+
+class EntityLoader(Generic[T]):
+    """Batch and cache lookups of one model by its single-column primary key."""
+
+    def __init__(self, session: AsyncSession, model: Type[T]):
+        self.session = session
+        self.model = model
+        primary_key = inspect(model).primary_key
+        if len(primary_key) != 1:
+            raise ValueError(f"{model.__name__} must have a single-column primary key")
+        self._pk_column = primary_key[0]
+        self._pk_attr = inspect(model).get_property_by_column(self._pk_column).key
+        # Identity map: key -> instance (None when the key does not exist)
+        self._cache: Dict[Hashable, Optional[T]] = {}
+        # Keys queued by load() and not yet dispatched
+        self._pending: Set[Hashable] = set()
+        self._batch: Optional[asyncio.Future] = None
+
+    def prime(self, instance: T) -> None:
+        """Put an already loaded instance into the identity map."""
+        self._cache[getattr(instance, self._pk_attr)] = instance
+
+    def clear(self, key: Optional[Hashable] = None) -> None:
+        """Forget one key (or everything) so the next load hits the database."""
+        if key is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(key, None)
+
+    async def load_many(self, keys: Iterable[Optional[Hashable]]) -> Dict[Hashable, Optional[T]]:
+        """
+        Resolve many keys with at most one query.
+
+        ``None`` keys are ignored. Returns a dict key -> instance (or None when
+        the row does not exist).
+        """
+        wanted = [key for key in dict.fromkeys(keys) if key is not None]
+        await self._fetch([key for key in wanted if key not in self._cache])
+        return {key: self._cache.get(key) for key in wanted}
+
+    async def load(self, key: Optional[Hashable]) -> Optional[T]:
+        """
+        Resolve a single key.
+
+        Calls made concurrently (e.g. under ``asyncio.gather``) in the same
+        event-loop tick are coalesced into one batch query.
+        """
+        if key is None:
+            return None
+        if key in self._cache:
+            return self._cache[key]
+
+        self._pending.add(key)
+        if self._batch is None:
+            loop = asyncio.get_running_loop()
+            self._batch = loop.create_future()
+            loop.call_soon(lambda: asyncio.ensure_future(self._dispatch()))
+        batch = self._batch
+        await batch
+        return self._cache.get(key)
+
+    async def _dispatch(self) -> None:
+        batch, self._batch = self._batch, None
+        keys, self._pending = list(self._pending), set()
+        try:
+            await self._fetch([key for key in keys if key not in self._cache])
+        except Exception as exc:  # noqa: BLE001 - propagate to every waiter
+            batch.set_exception(exc)
+        else:
+            batch.set_result(None)
+
+    async def _fetch(self, keys: list) -> None:
+        if not keys:
+            return
+        result = await self.session.execute(
+            select(self.model).where(self._pk_column.in_(keys))
+        )
+        for instance in result.scalars().all():
+            self.prime(instance)
+        for key in keys:
+            self._cache.setdefault(key, None)
+
+
+class LoaderRegistry:
+    """All loaders of one request, keyed by model."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self._loaders: Dict[Any, EntityLoader] = {}
+
+    def for_model(self, model: Type[T]) -> EntityLoader[T]:
+        loader = self._loaders.get(model)
+        if loader is None:
+            loader = EntityLoader(self.session, model)
+            self._loaders[model] = loader
+        return loader
+
+    @property
+    def users(self) -> EntityLoader[User]:
+        return self.for_model(User)
+
+    def clear(self) -> None:
+        for loader in self._loaders.values():
+            loader.clear()
+
+
+def get_loaders(session: AsyncSession) -> LoaderRegistry:
+    """Return the loader registry bound to this session (created on first use)."""
+    registry = session.info.get(_SESSION_INFO_KEY)
+    if registry is None:
+        registry = LoaderRegistry(session)
+        session.info[_SESSION_INFO_KEY] = registry
+    return registry
@@ -0,0 +1,144 @@
+"""
+Guarded state transitions in one round trip.
+
+Status-change endpoints used to SELECT the row, check it in Python, mutate,
+commit and refresh: three round trips, and another request could change the
+row in between. ``guarded_update`` runs the check and the write as a single
+
+    UPDATE <table> SET ... WHERE pk = :key AND <precondition> RETURNING ...
+
+and maps a zero-row result to an HTTP error:
+
+- the row does not exist          -> 404
+- the precondition does not hold  -> 409
+
+Only the failure path reads the row again (to tell 404 from 409 and build a
+useful message).
+
+    result = await guarded_update(
+        db, Task, task_id,
+        {"status": "DOING"},
+        where=[Task.status == "TODO"],
+        previous=[Task.status],
+        not_found="Task not found",
+        conflict=lambda task: f"Task is {task.status}, expected TODO",
+    )
+    task, old_status = result.obj, result.previous["status"]
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Generic, Hashable, Optional, Sequence, TypeVar, Union
+
+from fastapi import HTTPException, status
+from sqlalchemy import inspect, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+T = TypeVar("T")
+
+# Detail for the 409, or a callable building it from the current row.
+# A callable returning None accepts the current row as is (idempotent no-op).
+ConflictDetail = Union[str, Callable[[Any], Optional[str]]]
+
+
+@dataclass
+class MutationResult(Generic[T]):
+    """Outcome of a guarded update."""
+
+    obj: T
+    # Values of the ``previous`` columns before the update, keyed by attribute name
+    previous: Dict[str, Any] = field(default_factory=dict)
+    # Extra RETURNING expressions, keyed by label
+    extra: Dict[str, Any] = field(default_factory=dict)
+    # False when the conflict callback accepted the current row unchanged
+    changed: bool = True
+
+
+async def guarded_update(
+    db: AsyncSession,
+    model: type,
+    key: Hashable,
+    values: Dict[str, Any],
+    *,
+    where: Sequence[Any] = (),
+    previous: Sequence[Any] = (),
+    returning: Sequence[Any] = (),
+    not_found: str = "Not found",
+    conflict: ConflictDetail = "Conflicting state",
+    commit: bool = True,
+) -> MutationResult:
+    """
+    Apply ``values`` to the row ``key`` of ``model`` if every ``where`` holds.
+
+    Args:
+        db: Request session
+        model: Mapped class with a single-column primary key
+        key: Primary key value
+        values: Attribute name -> new value (plain values or SQL expressions)
+        where: Preconditions on the target row (may use correlated subqueries)
+        previous: Columns of ``model`` whose pre-update value should be returned.
+            They are read by a ``SELECT ... FOR UPDATE`` CTE in the same
+            statement, so they are exact even under concurrent writers.
+        returning: Extra labelled expressions to return (e.g. a scalar subquery)
+        not_found: 404 detail
+        conflict: 409 detail, or callable(current_row) -> detail / None
+        commit: Commit the transaction after a successful update
+
+    Returns:
+        MutationResult with the refreshed instance
+
+    Raises:
+        HTTPException: 404 when the row is missing, 409 when a precondition fails
+    """
+    pk_column = inspect(model).primary_key[0]
+    stmt = update(model).where(pk_column == key, *where).values(**values)
+
+    returned = [model]
+    if previous:
+        old = (
+            select(pk_column, *previous)
+            .where(pk_column == key)
+            .with_for_update()
+            .cte("old_row")
+            .prefix_with("MATERIALIZED", dialect="postgresql")
+        )
+        stmt = stmt.where(pk_column == old.c[pk_column.key])
+        returned += [old.c[col.key].label(f"old_{col.key}") for col in previous]
+    returned += list(returning)
+
+    # "fetch" syncs instances already in the identity map with the new values
+    stmt = stmt.returning(*returned).execution_options(
+        synchronize_session="fetch", populate_existing=True
+    )
+    row = (await db.execute(stmt)).first()
+
+    if row is None:
+        return await _explain_miss(db, model, pk_column, key, not_found, conflict)
+
+    if commit:
+        await db.commit()
+
+    obj, rest = row[0], list(row[1:])
+    return MutationResult(
+        obj=obj,
+        previous={col.key: rest.pop(0) for col in previous},
+        extra={expr.key: value for expr, value in zip(returning, rest)},
+    )
+
+
+async def _explain_miss(db, model, pk_column, key, not_found, conflict) -> MutationResult:
+    """Zero rows updated: tell a missing row (404) from a failed precondition (409)."""
+    current = (
+        await db.execute(
+            select(model)
+            .where(pk_column == key)
+            .execution_options(populate_existing=True)
+        )
+    ).scalar_one_or_none()
+
+    if current is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=not_found)
+
+    detail = conflict(current) if callable(conflict) else conflict
+    if detail is None:
+        return MutationResult(obj=current, changed=False)
+    raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=detail)
@@ -0,0 +1,117 @@
+"""
+Keyset (cursor) pagination for newest-first feeds.
+
+``OFFSET skip`` reads and throws away every skipped row, so page 1000 costs a
+thousand pages, and rows arriving between two requests shift the pages (the
+client sees duplicates or misses rows). A keyset page instead starts right
+after the last row the client saw:
+
+    WHERE channel_id = ? AND (sent_at, message_id) < (:ts, :id)
+    ORDER BY sent_at DESC, message_id DESC LIMIT n
+
+which is one index range scan of n rows at any depth, given an index ending
+in (timestamp, id) after the equality columns, e.g. ix_messages_channel_sent_at.
+
+Cursors are opaque to clients (base64 of the row's timestamp and id):
+
+- ``before=<cursor>``: the next older page
+- ``after=<cursor>``: rows newer than the cursor, oldest first up to the
+  limit (poll for new rows, page back towards the newest)
+
+    before, after = decode_cursors(before, after)
+    query = keyset_query(query, Message.sent_at, Message.message_id, before, after, limit)
+    rows, has_more = keyset_rows((await db.execute(query)).scalars().all(), limit, after)
+    next_cursor, prev_cursor = keyset_cursors(rows, lambda m: (m.sent_at, m.message_id), has_more, after)
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, List, NamedTuple, Optional, Sequence, Tuple, TypeVar
+
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+from sqlalchemy.sql import Select
+
+T = TypeVar("T")
+
+
+class Cursor(NamedTuple):
+    ts: datetime
+    id: int
+
+
+def encode_cursor(ts: datetime, id: int) -> str:
+    raw = json.dumps([ts.isoformat(), id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(value: Optional[str]) -> Optional[Cursor]:
+    """Cursor from its encoded form; 400 if it was not produced by encode_cursor."""
+    if not value:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+        ts, id = json.loads(raw)
+        return Cursor(datetime.fromisoformat(ts), int(id))
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor không hợp lệ"
+        )
+
+
+def decode_cursors(before: Optional[str], after: Optional[str]) -> Tuple[Optional[Cursor], Optional[Cursor]]:
+    if before and after:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Chỉ dùng một trong hai tham số before hoặc after"
+        )
+    return decode_cursor(before), decode_cursor(after)
+
+
+def keyset_query(
+    query: Select,
+    ts_column: Any,
+    id_column: Any,
+    before: Optional[Cursor] = None,
+    after: Optional[Cursor] = None,
+    limit: int = 50,
+) -> Select:
+    """Order and bound ``query`` for one page; fetches limit + 1 rows to detect more."""
+    key = tuple_(ts_column, id_column)
+    if after is not None:
+        return query.where(key > tuple_(*after)).order_by(ts_column, id_column).limit(limit + 1)
+    if before is not None:
+        query = query.where(key < tuple_(*before))
+    return query.order_by(ts_column.desc(), id_column.desc()).limit(limit + 1)
+
+
+def keyset_rows(rows: Sequence[T], limit: int, after: Optional[Cursor] = None) -> Tuple[List[T], bool]:
+    """
+    (page newest first, has_more). has_more refers to the direction of
+    travel: older rows for the default / before pages, newer rows for after.
+    """
+    rows = list(rows)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if after is not None:
+        rows.reverse()
+    return rows, has_more
+
+
+def keyset_cursors(
+    rows: Sequence[T],
+    key: Callable[[T], Tuple[datetime, int]],
+    has_more: bool,
+    after: Optional[Cursor] = None,
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    (next_cursor, prev_cursor) of a newest-first page: next_cursor pages to
+    older rows (None once there are none), prev_cursor to newer ones.
+    """
+    if not rows:
+        return None, None
+    older = has_more if after is None else True
+    next_cursor = encode_cursor(*key(rows[-1])) if older else None
+    return next_cursor, encode_cursor(*key(rows[0]))
@@ -0,0 +1,213 @@
+"""
+Connection pool telemetry for the async engine.
+
+Tells the three usual causes of stalled requests apart:
+- pool exhaustion: checkout wait histogram, overflow in use, timeouts, saturation
+- slow queries: query duration histogram
+- event-loop blocking: loop lag histogram (see monitor_event_loop_lag)
+
+Plus connection age and pre-ping failures. Exposed by GET /admin/db-pool.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, Optional, Sequence
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Bucket upper bounds in milliseconds
+DEFAULT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Share of the pool (size + max_overflow) in use that counts as saturated
+SATURATION_WARN_RATIO = 0.9
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus style) of millisecond values."""
+
+    def __init__(self, buckets_ms: Sequence[float] = DEFAULT_BUCKETS_MS):
+        self.bounds = tuple(buckets_ms)
+        self.counts = [0] * (len(self.bounds) + 1)  # last bucket is +Inf
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, value_ms: float) -> None:
+        self.count += 1
+        self.total_ms += value_ms
+        if value_ms > self.max_ms:
+            self.max_ms = value_ms
+        for i, bound in enumerate(self.bounds):
+            if value_ms <= bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+    def snapshot(self) -> dict:
+        buckets = {}
+        running = 0
+        for bound, n in zip(self.bounds, self.counts):
+            running += n
+            buckets[f"le_{bound}ms"] = running
+        buckets["le_inf"] = running + self.counts[-1]
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "buckets": buckets,
+        }
+
+
+class PoolMetrics:
+    """Counters and histograms fed by pool / engine events."""
+
+    def __init__(self):
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.pre_ping_failures = 0
+        self.checkout_timeouts = 0
+        self.checkout_wait = Histogram()
+        self.query_duration = Histogram()
+        self.loop_lag = Histogram()
+        # id(dbapi_connection) -> monotonic time the connection was opened
+        self._connected_at: Dict[int, float] = {}
+
+    # ---- pool hooks ----
+
+    def observe_checkout_wait(self, wait_ms: float) -> None:
+        self.checkout_wait.observe(wait_ms)
+
+    def attach(self, engine: Engine) -> None:
+        """Register pool and cursor event listeners on a (sync) engine."""
+        pool = engine.pool
+
+        @event.listens_for(pool, "connect")
+        def _on_connect(dbapi_connection, connection_record):
+            self.connects += 1
+            self._connected_at[id(dbapi_connection)] = time.monotonic()
+
+        @event.listens_for(pool, "close")
+        def _on_close(dbapi_connection, connection_record):
+            self._connected_at.pop(id(dbapi_connection), None)
+
+        @event.listens_for(pool, "checkout")
+        def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+            self.checkouts += 1
+
+        @event.listens_for(pool, "checkin")
+        def _on_checkin(dbapi_connection, connection_record):
+            self.checkins += 1
+
+        @event.listens_for(pool, "invalidate")
+        def _on_invalidate(dbapi_connection, connection_record, exception):
+            self.invalidations += 1
+            # A failed pre-ping surfaces as a DisconnectionError on checkout
+            if isinstance(exception, exc.DisconnectionError):
+                self.pre_ping_failures += 1
+            if dbapi_connection is not None:
+                self._connected_at.pop(id(dbapi_connection), None)
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _before_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def _after_execute(conn, cursor, statement, parameters, context, executemany):
+            starts = conn.info.get("query_start")
+            if starts:
+                self.query_duration.observe((time.perf_counter() - starts.pop()) * 1000)
+
+    # ---- reporting ----
+
+    def snapshot(self, pool) -> dict:
+        size = pool.size()
+        max_overflow = getattr(pool, "_max_overflow", 0)
+        checked_out = pool.checkedout()
+        capacity = size + max(max_overflow, 0)
+        saturation = checked_out / capacity if capacity else 0.0
+
+        now = time.monotonic()
+        ages = [now - opened for opened in self._connected_at.values()]
+
+        return {
+            "status": "saturated" if saturation >= SATURATION_WARN_RATIO else "ok",
+            "pool": {
+                "size": size,
+                "max_overflow": max_overflow,
+                "timeout_s": pool.timeout(),
+                "checked_out": checked_out,
+                "checked_in": pool.checkedin(),
+                "overflow_in_use": max(pool.overflow(), 0),
+                "saturation": round(saturation, 3),
+            },
+            "counters": {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "pre_ping_failures": self.pre_ping_failures,
+                "checkout_timeouts": self.checkout_timeouts,
+            },
+            "connection_age_s": {
+                "open": len(ages),
+                "max": round(max(ages), 1) if ages else 0.0,
+                "avg": round(sum(ages) / len(ages), 1) if ages else 0.0,
+            },
+            "checkout_wait": self.checkout_wait.snapshot(),
+            "query_duration": self.query_duration.snapshot(),
+            "event_loop_lag": self.loop_lag.snapshot(),
+        }
+
+
+# Global metrics instance shared by the engine and the admin endpoint
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records how long each checkout waited."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            pool_metrics.checkout_timeouts += 1
+            logger.warning(
+                "DB pool exhausted: checkout timed out after %.1fs (size=%d, overflow=%d)",
+                self._timeout, self.size(), self.overflow(),
+            )
+            raise
+        finally:
+            wait_ms = (time.perf_counter() - start) * 1000
+            pool_metrics.observe_checkout_wait(wait_ms)
+            if wait_ms > settings.DB_POOL_SLOW_CHECKOUT_MS:
+                logger.warning(
+                    "Slow DB checkout: waited %.0fms (checked_out=%d, overflow=%d)",
+                    wait_ms, self.checkedout(), self.overflow(),
+                )
+
+
+async def monitor_event_loop_lag(interval: float = 1.0, warn_ms: Optional[float] = 250) -> None:
+    """
+    Measure how late the event loop wakes up from a sleep.
+
+    A large lag means something is blocking the loop (CPU work, sync IO),
+    which looks like a slow database from the request's point of view.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lag_ms = max(0.0, (loop.time() - start - interval) * 1000)
+        pool_metrics.loop_lag.observe(lag_ms)
+        if warn_ms is not None and lag_ms > warn_ms:
+            logger.warning(f"Event loop blocked for {lag_ms:.0f}ms")
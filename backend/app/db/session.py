@@ -1,39 +1,116 @@
 """Database session management for async SQLAlchemy operations."""
 
+from contextvars import ContextVar
+from typing import AsyncGenerator, List, Optional, Tuple
+
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
+from app.db.pool_metrics import InstrumentedAsyncQueuePool, pool_metrics
 
 
 # Create async engine with connection pooling (Standard for Session Mode / Port 5432)
 engine: AsyncEngine = create_async_engine(
     settings.DATABASE_URL,
     echo=False,
+    poolclass=InstrumentedAsyncQueuePool,
     pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
 )
+pool_metrics.attach(engine.sync_engine)
+
+# Per-request counter of opened sessions, set by RequestSessionGuard
+_request_sessions: ContextVar[Optional[List[int]]] = ContextVar("request_sessions", default=None)
+
+
+def _track_session() -> None:
+    """Count sessions opened by the current request and fail on the second one."""
+    counter = _request_sessions.get()
+    if counter is None:
+        return
+    counter[0] += 1
+    if counter[0] > 1:
+        raise RuntimeError(
+            "Request opened more than one database session. "
+            "Depend on app.db.session.get_db (re-exported as app.api.deps.get_db) "
+            "instead of creating sessions by hand."
+        )
+
+
+class TrackedAsyncSession(AsyncSession):
+    """AsyncSession counted by RequestSessionGuard, however it is created."""
+
+    def __init__(self, *args, **kwargs):
+        _track_session()
+        super().__init__(*args, **kwargs)
+
 
 # Create async session factory
 AsyncSessionLocal = sessionmaker(
     bind=engine,
-    class_=AsyncSession,
+    class_=TrackedAsyncSession,
     expire_on_commit=False,  # Prevent automatic expiration of objects after commit
 )
 
 
-async def get_db() -> AsyncSession:
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """
-    Dependency function for FastAPI endpoints.
-    Provides an async database session and handles cleanup.
+    Dependency function for FastAPI endpoints (unit of work).
+
+    This is the only session dependency: routers and get_current_user all
+    depend on it, so FastAPI's per-request dependency cache hands every
+    consumer the same session and one request checks out one pooled
+    connection.
+
+    When settings.DB_TRANSACTION_PER_REQUEST is enabled, the request runs
+    as one transaction: it is committed when the handler returns and rolled
+    back when it raises. Handlers that commit explicitly keep working.
 
     Yields:
         AsyncSession: Database session for the request
     """
     async with AsyncSessionLocal() as session:
+        if not settings.DB_TRANSACTION_PER_REQUEST:
+            yield session
+            return
+
         try:
             yield session
+            if session.in_transaction():
+                await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+
+
+class RequestSessionGuard:
+    """
+    ASGI middleware that fails any HTTP request opening more than one session.
+
+    Enabled with settings.DB_SESSION_GUARD (meant for tests and local runs);
+    it catches handlers or dependencies that bypass get_db and double the
+    pool pressure of a request. Sessions are counted when AsyncSessionLocal
+    creates them (TrackedAsyncSession), so ``async with AsyncSessionLocal()``
+    inside a request fails too, not just a second get_db. Socket.IO
+    polling requests are not guarded: each packet's handler opens its own
+    session.
+    """
+
+    def __init__(self, app, exclude_prefixes: Tuple[str, ...] = ("/socket.io",)):
+        self.app = app
+        self.exclude_prefixes = exclude_prefixes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exclude_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        token = _request_sessions.set([0])
+        try:
+            await self.app(scope, receive, send)
         finally:
-            # Session will be automatically closed by the async context manager
-            pass
\ No newline at end of file
+            _request_sessions.reset(token)
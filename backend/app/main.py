@@ -1,10 +1,22 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
 import logging
 
+from app.core.cache import invalidation_bus
 from app.core.config import settings
 from app.api.v1.api import api_router  # Import from v1 API router
-from app.services.socket_manager import socket_app  # Socket.IO - Phase 3 BE1
+from app.services.socket_manager import socket_app, sio, manager as socket_connections  # Socket.IO - Phase 3 BE1
+from app.db.session import RequestSessionGuard
+from app.db.pool_metrics import monitor_event_loop_lag
+from app.services.message_partitions import message_partition_service
+from app.services.notification_digest import notification_digest
+from app.services.outbox import outbox_dispatcher
+from app.services.password_hasher import password_hasher
+from app.services.presence_service import presence_service
+from app.services.refresh_token_service import refresh_token_service
+from app.services.reminder_scheduler import reminder_scheduler
+from app.services.typing_aggregator import typing_aggregator
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -25,6 +37,44 @@ async def startup_event():
     db_display = db_url.replace(db_url.split('@')[0].split('://')[1], '****:****')
     logger.info(f"🗄️ DATABASE_URL: {db_display}")
     logger.info(f"📍 Using API prefix: {settings.API_V1_STR}")
+    logger.info(
+        f"🔌 DB pool: size={settings.DB_POOL_SIZE}, max_overflow={settings.DB_MAX_OVERFLOW}, "
+        f"timeout={settings.DB_POOL_TIMEOUT}s"
+    )
+    # Event-loop lag feeds /admin/db-pool so loop blocking is not mistaken for DB latency
+    app.state.loop_lag_task = asyncio.create_task(monitor_event_loop_lag())
+    # Create upcoming monthly message partitions now and once a day
+    app.state.message_partitions_task = asyncio.create_task(message_partition_service.maintenance_loop())
+    # Coalesced typing indicators (users_typing)
+    app.state.typing_task = asyncio.create_task(typing_aggregator.run(sio))
+    # Presence diffs, heartbeat expiry and batched last_seen_at writes
+    app.state.presence_task = asyncio.create_task(presence_service.run(sio))
+    # Flush merged updates of recovered sockets, disconnect slow consumers
+    app.state.backpressure_task = asyncio.create_task(sio.run_backpressure())
+    # Deliver broadcasts / notification pushes committed to the outbox
+    app.state.outbox_task = asyncio.create_task(outbox_dispatcher.run())
+    # Periodic message digests instead of per-message notifications
+    if settings.NOTIFICATION_MESSAGE_MODE == "digest":
+        app.state.notification_digest_task = asyncio.create_task(notification_digest.run())
+    # Meeting / milestone / sprint reminders
+    app.state.reminder_task = asyncio.create_task(reminder_scheduler.run())
+    # Expired / revoked refresh tokens
+    app.state.refresh_token_task = asyncio.create_task(refresh_token_service.maintenance_loop())
+    # Several workers: drop cache entries other workers invalidate (principal, membership, ...)
+    if invalidation_bus is not None:
+        app.state.cache_invalidation_task = asyncio.create_task(invalidation_bus.run())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Stop the password hashing worker processes
+    password_hasher.shutdown()
+    # Sockets of this worker go away with it: drop them from the shared registry
+    await socket_connections.close()
+    # Last seen of users still connected here
+    try:
+        await presence_service.flush_last_seen()
+    except Exception as e:
+        logger.error(f"Presence last_seen flush on shutdown failed: {e}")
 
 # Configure CORS
 app.add_middleware(
@@ -35,6 +85,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Guard against requests opening more than one DB session (tests / local runs)
+if settings.DB_SESSION_GUARD:
+    app.add_middleware(RequestSessionGuard)
+
 # Mount API routes with /api/v1 prefix
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
@@ -13,8 +13,10 @@ from app.models.all_models import (
     MentoringLog,
     Message,
     Milestone,
+    OutboxEvent,
     PeerReview,
     Project,
+    RefreshToken,
     Resource,
     Role,
     Semester,
@@ -37,6 +39,8 @@ __all__ = [
     "User",
     "SystemSetting",
     "AuditLog",
+    "RefreshToken",
+    "OutboxEvent",
     # Cluster 2: Academic Management
     "Semester",
     "Subject",
@@ -7,18 +7,24 @@ from typing import Optional
 from uuid import UUID, uuid4
 
 from sqlalchemy import (
+    DDL,
     Boolean,
     Date,
     DateTime,
     Float,
     ForeignKey,
+    Index,
     Integer,
+    BigInteger,
+    SmallInteger,
     String,
     Text,
     literal,
     func,
+    event,
+    text,
 )
-from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, UUID as PG_UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship, synonym, column_property
 
 from app.db.base import Base
@@ -77,6 +83,8 @@ class User(Base):
     dept_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("departments.dept_id"), nullable=True)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    # Written in batches by presence_service, not on every socket event
+    last_seen_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
 
     # Relationships
     role: Mapped["Role"] = relationship("Role", back_populates="users")
@@ -205,6 +213,9 @@ class AcademicClass(Base):
 
 class ClassEnrollment(Base):
     __tablename__ = "class_enrollments"
+    __table_args__ = (
+        Index("ix_class_enrollments_class_student", "class_id", "student_id"),
+    )
     enrollment_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     class_id: Mapped[int] = mapped_column(Integer, ForeignKey("academic_classes.class_id", ondelete="CASCADE"))
     student_id: Mapped[UUID] = mapped_column(PG_UUID(as_uuid=True), ForeignKey("users.user_id", ondelete="CASCADE"))
@@ -287,6 +298,10 @@ class Team(Base):
 
 class TeamMember(Base):
     __tablename__ = "team_members"
+    # PK (team_id, student_id) covers lookups by team; this one covers "my teams"
+    __table_args__ = (
+        Index("ix_team_members_student_id", "student_id"),
+    )
     # FIX: Added ondelete=CASCADE
     team_id: Mapped[int] = mapped_column(Integer, ForeignKey("teams.team_id", ondelete="CASCADE"), primary_key=True)
     student_id: Mapped[UUID] = mapped_column(PG_UUID(as_uuid=True), ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True)
@@ -306,6 +321,10 @@ class TeamMember(Base):
 
 class Sprint(Base):
     __tablename__ = "sprints"
+    __table_args__ = (
+        Index("ix_sprints_team_id", "team_id"),
+        Index("ix_sprints_end_date", "end_date"),
+    )
     sprint_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     team_id: Mapped[int] = mapped_column(Integer, ForeignKey("teams.team_id", ondelete="CASCADE"))
     name: Mapped[Optional[str]] = mapped_column(String, nullable=True) # Added/Mapped title->name? API uses name
@@ -322,6 +341,9 @@ class Sprint(Base):
 
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        Index("ix_tasks_sprint_status", "sprint_id", "status"),
+    )
     task_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     sprint_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("sprints.sprint_id", ondelete="CASCADE"), nullable=True)
     title: Mapped[Optional[str]] = mapped_column(String, nullable=True)
@@ -344,6 +366,10 @@ class Task(Base):
 
 class Meeting(Base):
     __tablename__ = "meetings"
+    __table_args__ = (
+        # Reminder look-ahead: start_time within the upcoming window
+        Index("ix_meetings_start_time", "start_time"),
+    )
     meeting_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     team_id: Mapped[int] = mapped_column(Integer, ForeignKey("teams.team_id", ondelete="CASCADE"))
     title: Mapped[Optional[str]] = mapped_column(String, nullable=True)
@@ -370,17 +396,40 @@ class Channel(Base):
 
 
 class Message(Base):
+    """
+    Chat message. The table is range-partitioned by month on sent_at
+    (see app/services/message_partitions.py), so the table primary key is
+    (message_id, sent_at); message_id alone stays unique and is the ORM identity.
+    """
     __tablename__ = "messages"
+    __table_args__ = (
+        # Channel history: WHERE channel_id = ? ORDER BY sent_at DESC
+        Index("ix_messages_channel_sent_at", "channel_id", "sent_at", "message_id"),
+        {"postgresql_partition_by": "RANGE (sent_at)"},
+    )
     message_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     channel_id: Mapped[int] = mapped_column(Integer, ForeignKey("channels.channel_id", ondelete="CASCADE"))
     sender_id: Mapped[UUID] = mapped_column(PG_UUID(as_uuid=True), ForeignKey("users.user_id"))
     content: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
-    sent_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    sent_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True, server_default=func.now())
+
+    __mapper_args__ = {"primary_key": [message_id]}
 
     channel: Mapped["Channel"] = relationship("Channel", back_populates="messages")
     sender: Mapped["User"] = relationship("User", back_populates="sent_messages")
 
 
+# create_all() builds the partitioned parent only; give rows somewhere to land
+# until message_partitions.ensure_future_partitions() adds the monthly ones.
+event.listen(
+    Message.__table__,
+    "after_create",
+    DDL("CREATE TABLE IF NOT EXISTS messages_default PARTITION OF messages DEFAULT").execute_if(
+        dialect="postgresql"
+    ),
+)
+
+
 # ==========================================
 # CLUSTER 5: MILESTONES & SUBMISSIONS
 # ==========================================
@@ -388,6 +437,9 @@ class Message(Base):
 
 class Milestone(Base):
     __tablename__ = "milestones"
+    __table_args__ = (
+        Index("ix_milestones_due_date", "due_date"),
+    )
     milestone_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     class_id: Mapped[int] = mapped_column(Integer, ForeignKey("academic_classes.class_id"))
     title: Mapped[Optional[str]] = mapped_column(String, nullable=True)
@@ -524,6 +576,26 @@ class Resource(Base):
 class Notification(Base):
     """Notification model for user notifications."""
     __tablename__ = "notifications"
+    __table_args__ = (
+        # Notification list / resume: WHERE user_id = ? ORDER BY updated_at DESC
+        # (a merge into a coalesced row moves it to the top)
+        Index("ix_notifications_user_updated_at", "user_id", "updated_at", "notification_id"),
+        # Unread list only touches unread rows
+        Index(
+            "ix_notifications_user_unread_updated_at",
+            "user_id",
+            "updated_at",
+            postgresql_where=text("is_read = false"),
+        ),
+        # One row per user and coalescing key: ON CONFLICT target for merging
+        Index(
+            "uq_notifications_user_coalesce_key",
+            "user_id",
+            "coalesce_key",
+            unique=True,
+            postgresql_where=text("coalesce_key IS NOT NULL"),
+        ),
+    )
     notification_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     user_id: Mapped[UUID] = mapped_column(PG_UUID(as_uuid=True), ForeignKey("users.user_id", ondelete="CASCADE"))
     title: Mapped[str] = mapped_column(String(255), nullable=False)
@@ -532,6 +604,107 @@ class Notification(Base):
     is_read: Mapped[bool] = mapped_column(Boolean, default=False)
     related_entity_type: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)  # task, team, message, etc.
     related_entity_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    # Same type + source within a window (e.g. "message:channel:5:<bucket>") merge into one row
+    coalesce_key: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    coalesced_count: Mapped[int] = mapped_column(Integer, default=1, server_default=text("1"), nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)  # last merge
     
-    user: Mapped["User"] = relationship("User", back_populates="notifications")
\ No newline at end of file
+    user: Mapped["User"] = relationship("User", back_populates="notifications")
+
+
+class NotificationCounter(Base):
+    """
+    Notification counts per user and type, maintained by
+    notification_counters in the same transaction as every write to
+    notifications, so the bell badge and stats never count rows.
+    """
+    __tablename__ = "notification_counters"
+    user_id: Mapped[UUID] = mapped_column(PG_UUID(as_uuid=True), ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True)
+    notification_type: Mapped[str] = mapped_column(String(50), primary_key=True)
+    total: Mapped[int] = mapped_column(Integer, default=0, server_default=text("0"), nullable=False)
+    unread: Mapped[int] = mapped_column(Integer, default=0, server_default=text("0"), nullable=False)
+
+
+class NotificationPreference(Base):
+    """
+    What a user does not want to be notified about (no row = everything).
+    Kept compact: one bit per notification type, one bit per local hour of
+    quiet time; cached by notification_preferences.
+    """
+    __tablename__ = "notification_preferences"
+    user_id: Mapped[UUID] = mapped_column(PG_UUID(as_uuid=True), ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True)
+    muted_types: Mapped[int] = mapped_column(Integer, default=0, server_default=text("0"), nullable=False)  # TYPE_BITS
+    muted_channel_ids: Mapped[list] = mapped_column(ARRAY(Integer), default=list, server_default=text("'{}'"), nullable=False)
+    quiet_hours: Mapped[int] = mapped_column(Integer, default=0, server_default=text("0"), nullable=False)  # bit h = hour h local
+    utc_offset_minutes: Mapped[int] = mapped_column(SmallInteger, default=0, server_default=text("0"), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class ReminderLog(Base):
+    """
+    Reminders already sent, one row per (source, entity, offset, due time).
+    reminder_scheduler claims a reminder by inserting its row, so it goes out
+    once across workers and restarts; a rescheduled meeting gets a new due
+    time and is reminded again.
+    """
+    __tablename__ = "reminder_log"
+    kind: Mapped[str] = mapped_column(String(20), primary_key=True)  # meeting, milestone, sprint
+    entity_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    offset_minutes: Mapped[int] = mapped_column(Integer, primary_key=True)
+    due_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    sent_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+
+class RefreshToken(Base):
+    """
+    Rotating refresh token (stored as a SHA-256 hash, never in clear).
+
+    Every refresh marks the presented token as used and issues a new one in
+    the same family; presenting a used token again revokes the whole family.
+    """
+    __tablename__ = "refresh_tokens"
+    __table_args__ = (
+        Index("ix_refresh_tokens_user_id", "user_id"),
+        Index("ix_refresh_tokens_family_id", "family_id"),
+    )
+    token_id: Mapped[UUID] = mapped_column(
+        PG_UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid4,
+        server_default=func.gen_random_uuid()
+    )
+    user_id: Mapped[UUID] = mapped_column(PG_UUID(as_uuid=True), ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
+    family_id: Mapped[UUID] = mapped_column(PG_UUID(as_uuid=True), nullable=False)  # one login = one family
+    token_hash: Mapped[str] = mapped_column(String(64), unique=True, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    used_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)  # rotated
+    revoked_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    user: Mapped["User"] = relationship("User")
+
+
+class OutboxEvent(Base):
+    """
+    Transactional outbox: realtime side effects (socket broadcasts,
+    notification pushes) written in the same transaction as the change that
+    caused them, delivered afterwards by outbox_dispatcher.
+    """
+    __tablename__ = "outbox_events"
+    __table_args__ = (
+        # Dispatcher scan: pending rows in id order
+        Index(
+            "ix_outbox_events_pending",
+            "event_id",
+            postgresql_where=text("dispatched_at IS NULL"),
+        ),
+    )
+    event_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    kind: Mapped[str] = mapped_column(String(50), nullable=False)  # broadcast function / notification push
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, server_default=text("0"), nullable=False)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    available_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)  # retry backoff
+    dispatched_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
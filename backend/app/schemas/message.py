@@ -32,7 +32,12 @@ class MessageResponse(BaseModel):
 
 class MessageListResponse(BaseModel):
     messages: List[MessageResponse]
-    total: int
+    total: Optional[int] = None  # not counted for cursor (before / after) pages
     has_more: bool
     skip: int
     limit: int
+    # Oldest sent_at covered when only recent history was read (None = full history)
+    window_start: Optional[datetime] = None
+    # Keyset cursors: before=next_cursor for older messages, after=prev_cursor for newer
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
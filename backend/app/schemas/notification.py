@@ -5,7 +5,7 @@ from datetime import datetime
 from typing import Optional
 from uuid import UUID
 
-from pydantic import BaseModel, Field
+from pydantic import AliasChoices, BaseModel, Field
 
 
 # ==========================================
@@ -15,7 +15,11 @@ from pydantic import BaseModel, Field
 
 class NotificationBase(BaseModel):
     """Base schema for notification data."""
-    type: str = Field(..., description="Notification type: SYSTEM, MILESTONE, SUBMISSION, TEAM, MENTION, TASK")
+    type: str = Field(
+        ...,
+        validation_alias=AliasChoices("type", "notification_type"),
+        description="Notification type: SYSTEM, MILESTONE, SUBMISSION, TEAM, MENTION, TASK"
+    )
     title: str = Field(..., max_length=255, description="Notification title")
     message: Optional[str] = Field(None, description="Notification message/details")
     related_entity_type: Optional[str] = Field(None, max_length=50, description="Related entity type (team, project, milestone)")
@@ -70,6 +74,12 @@ class NotificationResponse(NotificationBase):
     is_read: bool
     read_at: Optional[datetime] = None
     created_at: datetime
+    updated_at: Optional[datetime] = Field(None, description="Last merge of a coalesced notification (feed order)")
+    count: int = Field(
+        1,
+        validation_alias=AliasChoices("count", "coalesced_count"),
+        description="Events merged into this notification"
+    )
     
     class Config:
         from_attributes = True
@@ -95,6 +105,9 @@ class NotificationListResponse(BaseModel):
     total: int = Field(..., description="Total number of notifications")
     unread_count: int = Field(..., description="Number of unread notifications")
     notifications: list[NotificationResponse]
+    has_more: bool = Field(False, description="More rows in the paging direction")
+    next_cursor: Optional[str] = Field(None, description="Pass as `before` for the next (older) page")
+    prev_cursor: Optional[str] = Field(None, description="Pass as `after` for newer notifications")
     
     class Config:
         json_schema_extra = {
@@ -125,6 +138,7 @@ class NotificationStats(BaseModel):
     total: int
     unread: int
     by_type: dict[str, int] = Field(..., description="Count of notifications by type")
+    unread_by_type: dict[str, int] = Field(default_factory=dict, description="Count of unread notifications by type")
     
     class Config:
         json_schema_extra = {
@@ -137,6 +151,27 @@ class NotificationStats(BaseModel):
                     "TEAM": 8,
                     "TASK": 12,
                     "SYSTEM": 5
+                },
+                "unread_by_type": {
+                    "MILESTONE": 4,
+                    "TASK": 8
                 }
             }
-        }
\ No newline at end of file
+        }
+
+class NotificationPreferences(BaseModel):
+    """Schema for reading / replacing the current user's notification preferences."""
+    muted_types: list[str] = Field(default_factory=list, description="Notification types not to receive (system cannot be muted)")
+    muted_channel_ids: list[int] = Field(default_factory=list, description="Chat channels whose message notifications are muted")
+    quiet_hours: list[int] = Field(default_factory=list, description="Local hours (0-23) without realtime pushes")
+    utc_offset_minutes: int = Field(0, ge=-720, le=840, description="Offset of the user's local time from UTC")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "muted_types": ["message"],
+                "muted_channel_ids": [12],
+                "quiet_hours": [22, 23, 0, 1, 2, 3, 4, 5, 6],
+                "utc_offset_minutes": 420
+            }
+        }
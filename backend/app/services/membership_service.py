@@ -0,0 +1,151 @@
+"""
+Membership Service
+Kiểm tra quyền thành viên team (có cache)
+
+Chat, channel, task and mentoring endpoints, and the socket room joins,
+all ask "is this user a member of that team?". The answer comes from two
+cached maps, so a hit costs no database round trip:
+
+- user_id    -> team_ids the user is an active member of
+- channel_id -> team_id of the channel
+
+Backend follows settings.MEMBERSHIP_CACHE_BACKEND ("memory", "redis" or
+"none"). Entries are dropped after commit whenever a TeamMember or Channel
+row is added, changed or deleted in a session (join, leave, remove, and team
+deletion, which cascades to its members and channels).
+
+With several workers (SOCKETIO_MANAGER = "redis") a "memory" cache would
+let a removed member keep HTTP access and socket join_channel / join_team
+rights on the other workers until the TTL; its deletes are therefore
+broadcast to every worker (app.core.cache.invalidation_bus). Running
+several workers without the Redis socket manager leaves only the TTL, so
+use MEMBERSHIP_CACHE_BACKEND = "redis" or "none" there.
+"""
+
+from typing import Any, FrozenSet, Optional, Set
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.cache import create_cache_backend
+from app.core.config import settings
+from app.models.all_models import Channel, TeamMember
+
+_PENDING_KEY = "membership_cache_invalidations"
+
+
+def _user_key(user_id: Any) -> str:
+    return f"user:{user_id}"
+
+
+def _channel_key(channel_id: int) -> str:
+    return f"channel:{channel_id}"
+
+
+class MembershipService:
+    """Cached team membership checks for HTTP guards and socket joins"""
+
+    def __init__(self):
+        self.backend = create_cache_backend(
+            settings.MEMBERSHIP_CACHE_BACKEND,
+            maxsize=settings.MEMBERSHIP_CACHE_MAX_ENTRIES,
+            ttl=settings.MEMBERSHIP_CACHE_TTL_SECONDS,
+            redis_url=settings.REDIS_URL,
+            redis_prefix="membership:",
+        )
+
+    async def team_ids(self, db: AsyncSession, user_id: Any) -> FrozenSet[int]:
+        """Teams the user is an active member of."""
+        key = _user_key(user_id)
+        if self.backend is not None:
+            cached = await self.backend.get(key)
+            if cached is not None:
+                return frozenset(cached)
+
+        result = await db.execute(
+            select(TeamMember.team_id).where(
+                TeamMember.student_id == UUID(str(user_id)),
+                TeamMember.is_active == True,
+            )
+        )
+        team_ids = frozenset(result.scalars().all())
+        if self.backend is not None:
+            await self.backend.set(key, sorted(team_ids))
+        return team_ids
+
+    async def is_member(self, db: AsyncSession, user_id: Any, team_id: int) -> bool:
+        return team_id in await self.team_ids(db, user_id)
+
+    async def require_member(
+        self,
+        db: AsyncSession,
+        user_id: Any,
+        team_id: int,
+        detail: str = "You are not a member of this team",
+    ) -> None:
+        """Raise 403 unless the user is a member of the team."""
+        if not await self.is_member(db, user_id, team_id):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=detail)
+
+    async def channel_team_id(self, db: AsyncSession, channel_id: int) -> Optional[int]:
+        """Team owning the channel, or None if the channel does not exist."""
+        key = _channel_key(channel_id)
+        if self.backend is not None:
+            cached = await self.backend.get(key)
+            if cached is not None:
+                return cached
+
+        team_id = (
+            await db.execute(select(Channel.team_id).where(Channel.channel_id == channel_id))
+        ).scalar_one_or_none()
+        if team_id is not None and self.backend is not None:
+            await self.backend.set(key, team_id)
+        return team_id
+
+    async def can_access_channel(self, db: AsyncSession, user_id: Any, channel_id: int) -> bool:
+        team_id = await self.channel_team_id(db, channel_id)
+        return team_id is not None and await self.is_member(db, user_id, team_id)
+
+    def invalidate_user_nowait(self, user_id: Any) -> None:
+        if self.backend is not None:
+            self.backend.delete_nowait(_user_key(user_id))
+
+    def invalidate_channel_nowait(self, channel_id: int) -> None:
+        if self.backend is not None:
+            self.backend.delete_nowait(_channel_key(channel_id))
+
+    def stats(self) -> dict:
+        return self.backend.stats() if self.backend is not None else {"backend": "none"}
+
+
+# Export singleton
+membership_service = MembershipService()
+
+
+# ---- Invalidation: any committed change to memberships or channels ----
+
+@event.listens_for(Session, "after_flush")
+def _collect_membership_changes(session: Session, flush_context) -> None:
+    changed: Set[tuple] = session.info.setdefault(_PENDING_KEY, set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, TeamMember) and obj.student_id is not None:
+            changed.add(("user", obj.student_id))
+        elif isinstance(obj, Channel) and obj.channel_id is not None:
+            changed.add(("channel", obj.channel_id))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_membership_changes(session: Session) -> None:
+    for kind, key in session.info.pop(_PENDING_KEY, ()):
+        if kind == "user":
+            membership_service.invalidate_user_nowait(key)
+        else:
+            membership_service.invalidate_channel_nowait(key)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_membership_changes(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,182 @@
+"""
+Message Partition Service
+Quản lý partitions theo tháng của bảng messages
+
+messages is RANGE-partitioned on sent_at with one partition per month
+(messages_pYYYYMM) and a DEFAULT partition for stray rows. This service:
+- creates partitions ahead of time (startup + daily loop)
+- detaches old partitions into the "archive" schema (past semesters)
+"""
+
+import asyncio
+import logging
+from datetime import date, datetime, timezone
+from typing import List, NamedTuple, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.config import settings
+from app.db.session import engine
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "messages"
+DEFAULT_PARTITION = "messages_default"
+ARCHIVE_SCHEMA = "archive"
+
+# Serialises partition DDL across app instances
+_ADVISORY_LOCK_KEY = 727_301_001
+
+
+class MessagePartition(NamedTuple):
+    name: str
+    start: date  # inclusive
+    end: date  # exclusive
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(day: date, months: int) -> date:
+    index = day.year * 12 + (day.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_p{month:%Y%m}"
+
+
+def _utc_bound(day: date) -> str:
+    return f"{day.isoformat()} 00:00:00+00"
+
+
+class MessagePartitionService:
+    """Tạo / archive partitions của bảng messages"""
+
+    async def is_partitioned(self, conn: AsyncConnection) -> bool:
+        """False until the partitioning migration has run."""
+        relkind = (
+            await conn.execute(
+                text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"),
+                {"table": PARENT_TABLE},
+            )
+        ).scalar()
+        return relkind == "p"
+
+    async def list_partitions(self, conn: AsyncConnection) -> List[MessagePartition]:
+        """Monthly partitions currently attached, oldest first (DEFAULT excluded)."""
+        rows = await conn.execute(
+            text(
+                """
+                SELECT child.relname
+                FROM pg_inherits
+                JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+                JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                WHERE parent.oid = to_regclass(:table)
+                ORDER BY child.relname
+                """
+            ),
+            {"table": PARENT_TABLE},
+        )
+        partitions = []
+        prefix = f"{PARENT_TABLE}_p"
+        for (name,) in rows:
+            if not name.startswith(prefix):
+                continue
+            start = datetime.strptime(name[len(prefix):], "%Y%m").date()
+            partitions.append(MessagePartition(name, start, add_months(start, 1)))
+        return partitions
+
+    async def _create_partition(self, conn: AsyncConnection, month: date) -> None:
+        """
+        Create and attach the partition for one month.
+
+        Rows that already landed in the DEFAULT partition for that month are
+        moved first, otherwise ATTACH would fail the default's constraint check.
+        """
+        name = partition_name(month)
+        start, end = _utc_bound(month), _utc_bound(add_months(month, 1))
+        await conn.execute(text(
+            f'CREATE TABLE "{name}" (LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+        ))
+        await conn.execute(text(
+            f"""
+            WITH moved AS (
+                DELETE FROM {DEFAULT_PARTITION}
+                WHERE sent_at >= '{start}' AND sent_at < '{end}'
+                RETURNING *
+            )
+            INSERT INTO "{name}" SELECT * FROM moved
+            """
+        ))
+        await conn.execute(text(
+            f"""ALTER TABLE {PARENT_TABLE} ATTACH PARTITION "{name}" """
+            f"""FOR VALUES FROM ('{start}') TO ('{end}')"""
+        ))
+        logger.info(f"🗂️ Created message partition {name}")
+
+    async def ensure_future_partitions(self, months_ahead: Optional[int] = None) -> List[str]:
+        """
+        Make sure partitions exist from the current month to months_ahead ahead.
+
+        Returns:
+            Names of the partitions created
+        """
+        months_ahead = settings.MESSAGE_PARTITIONS_AHEAD if months_ahead is None else months_ahead
+        created = []
+        async with engine.begin() as conn:
+            if not await self.is_partitioned(conn):
+                return created
+            await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+
+            existing = {p.start for p in await self.list_partitions(conn)}
+            current = month_start(datetime.now(timezone.utc).date())
+            for offset in range(months_ahead + 1):
+                month = add_months(current, offset)
+                if month not in existing:
+                    await self._create_partition(conn, month)
+                    created.append(partition_name(month))
+        return created
+
+    async def archive_partitions_before(self, cutoff: date, dry_run: bool = False) -> List[str]:
+        """
+        Detach every monthly partition that ends on or before cutoff and move
+        it to the archive schema. Archived rows no longer show up in
+        list_messages, but stay queryable as archive.messages_pYYYYMM.
+        """
+        archived = []
+        async with engine.begin() as conn:
+            if not await self.is_partitioned(conn):
+                return archived
+            await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+            await conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+
+            for partition in await self.list_partitions(conn):
+                if partition.end > cutoff:
+                    continue
+                archived.append(partition.name)
+                if dry_run:
+                    continue
+                await conn.execute(text(
+                    f'ALTER TABLE {PARENT_TABLE} DETACH PARTITION "{partition.name}"'
+                ))
+                await conn.execute(text(
+                    f'ALTER TABLE "{partition.name}" SET SCHEMA {ARCHIVE_SCHEMA}'
+                ))
+                logger.info(f"📦 Archived message partition {partition.name}")
+        return archived
+
+    async def maintenance_loop(self, interval_seconds: float = 24 * 3600) -> None:
+        """Create upcoming partitions once a day (started from app startup)."""
+        while True:
+            try:
+                await self.ensure_future_partitions()
+            except Exception as e:
+                logger.error(f"Message partition maintenance failed: {e}")
+            await asyncio.sleep(interval_seconds)
+
+
+# Export singleton
+message_partition_service = MessagePartitionService()
@@ -0,0 +1,124 @@
+"""
+Notification Counters
+Đếm notifications theo user (tổng, chưa đọc, theo loại) không cần quét bảng
+
+The bell badge and GET /notifications/stats used to count the user's
+notifications on every poll (up to five aggregate queries). The counts now
+live in notification_counters, one row per (user, notification_type), and
+every write path applies its delta in the same transaction:
+
+    rows = await db.execute(update(Notification)...returning(Notification.user_id, Notification.notification_type))
+    await notification_counters.apply(db, counter_deltas(rows, unread=-1))
+    await db.commit()
+
+so the counts can only be as stale as the notifications themselves. Reading
+them is one primary-key range scan over a handful of rows. rebuild()
+recomputes them from notifications (backfill / repair).
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.all_models import Notification, NotificationCounter
+
+# (user_id, notification_type) -> [total delta, unread delta]
+Deltas = Dict[Tuple[UUID, str], list]
+
+
+def counter_deltas(rows: Iterable[Tuple[UUID, str]], total: int = 0, unread: int = 0) -> Deltas:
+    """The same delta for each (user_id, notification_type) row."""
+    deltas: Deltas = defaultdict(lambda: [0, 0])
+    for user_id, notification_type in rows:
+        deltas[(user_id, notification_type)][0] += total
+        deltas[(user_id, notification_type)][1] += unread
+    return deltas
+
+
+@dataclass
+class NotificationCounts:
+    total: int = 0
+    unread: int = 0
+    by_type: Dict[str, int] = field(default_factory=dict)
+    unread_by_type: Dict[str, int] = field(default_factory=dict)
+
+    def total_of(self, notification_type: Optional[str] = None, unread_only: bool = False) -> int:
+        """Count matching the list filters (type compared case-insensitively)."""
+        if notification_type is None:
+            return self.unread if unread_only else self.total
+        counts = self.unread_by_type if unread_only else self.by_type
+        return sum(n for t, n in counts.items() if t.lower() == notification_type.lower())
+
+
+class NotificationCounterService:
+    """Per-user notification counts, updated with the notifications"""
+
+    async def apply(self, db: AsyncSession, deltas: Deltas) -> None:
+        """Add deltas to the counters in one statement (caller commits)."""
+        rows = [
+            {"user_id": user_id, "notification_type": notification_type, "total": total, "unread": unread}
+            for (user_id, notification_type), (total, unread) in sorted(deltas.items(), key=lambda item: (str(item[0][0]), item[0][1]))
+            if total or unread
+        ]
+        if not rows:
+            return
+        # Sorted rows: concurrent transactions lock counter rows in the same order
+        stmt = insert(NotificationCounter).values(rows)
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[NotificationCounter.user_id, NotificationCounter.notification_type],
+                set_={
+                    "total": NotificationCounter.total + stmt.excluded.total,
+                    "unread": NotificationCounter.unread + stmt.excluded.unread,
+                },
+            )
+        )
+
+    async def get(self, db: AsyncSession, user_id: UUID) -> NotificationCounts:
+        rows = (
+            await db.execute(
+                select(NotificationCounter.notification_type, NotificationCounter.total, NotificationCounter.unread)
+                .where(NotificationCounter.user_id == user_id)
+            )
+        ).all()
+        counts = NotificationCounts()
+        for notification_type, total, unread in rows:
+            counts.total += total
+            counts.unread += unread
+            if total:
+                counts.by_type[notification_type] = total
+            if unread:
+                counts.unread_by_type[notification_type] = unread
+        return counts
+
+    async def rebuild(self, db: AsyncSession, user_id: Optional[UUID] = None) -> None:
+        """Recompute counters from notifications, for one user or everyone (caller commits)."""
+        delete_stmt = delete(NotificationCounter)
+        source = (
+            select(
+                Notification.user_id,
+                Notification.notification_type,
+                func.count(),
+                func.count().filter(Notification.is_read == False),
+            )
+            .where(Notification.user_id.isnot(None))
+            .group_by(Notification.user_id, Notification.notification_type)
+        )
+        if user_id is not None:
+            delete_stmt = delete_stmt.where(NotificationCounter.user_id == user_id)
+            source = source.where(Notification.user_id == user_id)
+        await db.execute(delete_stmt)
+        await db.execute(
+            insert(NotificationCounter).from_select(
+                ["user_id", "notification_type", "total", "unread"], source
+            )
+        )
+
+
+# Export singleton
+notification_counters = NotificationCounterService()
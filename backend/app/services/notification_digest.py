@@ -0,0 +1,168 @@
+"""
+Notification Digest
+Tóm tắt tin nhắn định kỳ: một notification cho mỗi user mỗi channel
+
+With NOTIFICATION_MESSAGE_MODE = "digest", notify_new_message writes
+nothing per message. Instead, after each NOTIFICATION_DIGEST_INTERVAL_SECONDS
+window (aligned to the epoch, so every worker agrees on the boundaries) one
+query counts that window's messages per channel and sender, and every
+active team member with messages from others gets one row:
+
+    "12 new messages in #general"
+
+keyed "digest:channel:<channel_id>:<window>". The rows are upserted with
+MERGE_REPLACE, so running a window twice (another worker, a restart) leaves
+them as they are and pushes nothing new, even for rows already read.
+Workers take a transaction advisory lock and skip a window another worker
+is already summarising.
+"""
+
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select, text
+
+from app.core.config import settings
+from app.models.all_models import Channel, Message, TeamMember
+from app.services.notification_preferences import TYPE_BITS, notification_preferences
+from app.services.notification_service import NotificationService
+
+logger = logging.getLogger(__name__)
+
+# Serialises digest runs across workers (message_partitions uses 727_301_001)
+_ADVISORY_LOCK_KEY = 727_301_002
+
+# Wait for messages committed just before the window closed
+_GRACE_SECONDS = 5.0
+
+
+class NotificationDigest:
+    """Periodic per-user, per-channel message summaries (started from app startup)"""
+
+    def __init__(self, interval_seconds: int = settings.NOTIFICATION_DIGEST_INTERVAL_SECONDS):
+        self.interval = interval_seconds
+        self.last_window: Optional[int] = None
+
+        self.runs = 0
+        self.skipped = 0
+        self.notifications = 0
+
+    def window_bounds(self, window: int) -> Tuple[datetime, datetime]:
+        start = window * self.interval
+        return (
+            datetime.fromtimestamp(start, timezone.utc),
+            datetime.fromtimestamp(start + self.interval, timezone.utc),
+        )
+
+    async def summarise(self, window: int) -> int:
+        """Write (or refresh) the digests of one window; returns the rows pushed."""
+        from app.db.session import AsyncSessionLocal
+
+        start, end = self.window_bounds(window)
+        async with AsyncSessionLocal() as db:
+            locked = (
+                await db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+            ).scalar()
+            if not locked:
+                self.skipped += 1
+                return 0
+
+            counts = (
+                await db.execute(
+                    select(Message.channel_id, Message.sender_id, func.count())
+                    .where(Message.sent_at >= start, Message.sent_at < end)
+                    .group_by(Message.channel_id, Message.sender_id)
+                )
+            ).all()
+            if not counts:
+                return 0
+
+            # channel -> total messages, (channel, sender) -> own messages
+            totals: Dict[int, int] = defaultdict(int)
+            own: Dict[Tuple[int, object], int] = {}
+            for channel_id, sender_id, count in counts:
+                totals[channel_id] += count
+                own[(channel_id, sender_id)] = count
+
+            channels = (
+                await db.execute(
+                    select(Channel.channel_id, Channel.team_id, Channel.name)
+                    .where(Channel.channel_id.in_(totals.keys()))
+                )
+            ).all()
+            members = (
+                await db.execute(
+                    select(TeamMember.team_id, TeamMember.user_id).where(
+                        TeamMember.team_id.in_({team_id for _, team_id, _ in channels}),
+                        TeamMember.is_active == True,
+                    )
+                )
+            ).all()
+            team_members: Dict[int, List] = defaultdict(list)
+            for team_id, user_id in members:
+                team_members[team_id].append(user_id)
+            prefs = await notification_preferences.get_many(db, (user_id for _, user_id in members))
+            message_bit = TYPE_BITS[NotificationService.TYPE_MESSAGE]
+
+            rows, links = [], {}
+            for channel_id, team_id, name in channels:
+                key = f"digest:channel:{channel_id}:{window}"
+                links[key] = f"/channels/{channel_id}"
+                for user_id in team_members.get(team_id, ()):
+                    unread = totals[channel_id] - own.get((channel_id, user_id), 0)
+                    if unread <= 0 or not prefs[user_id].allows(message_bit, channel_id):
+                        continue
+                    rows.append(NotificationService._row(
+                        user_id,
+                        f"{unread} new messages in #{name}",
+                        f"{unread} new messages in #{name} between "
+                        f"{start:%H:%M} and {end:%H:%M} UTC",
+                        NotificationService.TYPE_MESSAGE,
+                        coalesce_key=key,
+                        count=unread,
+                    ))
+            if not rows:
+                return 0
+
+            notifications = await NotificationService._upsert(db, rows, NotificationService.MERGE_REPLACE)
+            if notifications:
+                await NotificationService._push(db, [
+                    (n, NotificationService._payload(n, links.get(n.coalesce_key)))
+                    for n in notifications
+                ])
+            await db.commit()
+
+        self.notifications += len(notifications)
+        return len(notifications)
+
+    async def run(self) -> None:
+        """Digest loop: summarise each window once it has closed."""
+        while True:
+            current = int(time.time() // self.interval)
+            window = current - 1  # the last closed one
+            if window != self.last_window:
+                try:
+                    await self.summarise(window)
+                    self.runs += 1
+                except Exception as e:
+                    logger.error(f"Notification digest for window {window} failed: {e}")
+                self.last_window = window
+            await asyncio.sleep(max((current + 1) * self.interval - time.time(), 0) + _GRACE_SECONDS)
+
+    def stats(self) -> dict:
+        return {
+            "mode": settings.NOTIFICATION_MESSAGE_MODE,
+            "interval_seconds": self.interval,
+            "last_window": self.last_window,
+            "runs": self.runs,
+            "skipped_locked": self.skipped,
+            "notifications": self.notifications,
+        }
+
+
+# Export singleton
+notification_digest = NotificationDigest()
@@ -0,0 +1,196 @@
+"""
+Notification Preferences
+Tắt thông báo theo loại, theo channel và giờ yên lặng (có cache)
+
+send_to_team / send_to_users used to write a row (and push) for every
+member whether they cared or not. Each user's preferences are now checked
+before any row is written:
+
+- muted types: one bit per notification type (TYPE_BITS); system
+  notifications cannot be muted
+- muted channels: chat channels whose message notifications are dropped
+- quiet hours: one bit per local hour (utc_offset_minutes); the
+  notification is still stored, only the realtime push is skipped
+
+A fan-out reads the recipients' preferences from the cache and loads the
+misses with one primary-key IN query (users without a row are cached as
+"everything on"). Backend follows settings.NOTIFICATION_PREFS_CACHE_BACKEND
+("memory", "redis" or "none"); entries are dropped after a committed change.
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set
+from uuid import UUID
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.cache import create_cache_backend
+from app.core.config import settings
+from app.models.all_models import NotificationPreference
+
+_PENDING_KEY = "notification_preference_invalidations"
+
+# notification_type -> bit in NotificationPreference.muted_types
+TYPE_BITS: Dict[str, int] = {
+    "message": 1 << 0,
+    "task": 1 << 1,
+    "team": 1 << 2,
+    "meeting": 1 << 3,
+    "deadline": 1 << 4,
+    "peer_review": 1 << 5,
+    "mentoring": 1 << 6,
+}
+
+
+class Preferences(NamedTuple):
+    muted_types: int = 0
+    muted_channel_ids: frozenset = frozenset()
+    quiet_hours: int = 0
+    utc_offset_minutes: int = 0
+
+    def allows(self, type_bit: int, channel_id: Optional[int] = None) -> bool:
+        if self.muted_types & type_bit:
+            return False
+        return channel_id is None or channel_id not in self.muted_channel_ids
+
+    def is_quiet(self, now: datetime) -> bool:
+        if not self.quiet_hours:
+            return False
+        hour = (now + timedelta(minutes=self.utc_offset_minutes)).hour
+        return bool(self.quiet_hours >> hour & 1)
+
+
+def types_to_mask(types: Iterable[str]) -> int:
+    mask = 0
+    for notification_type in types:
+        mask |= TYPE_BITS[notification_type]
+    return mask
+
+
+def mask_to_types(mask: int) -> List[str]:
+    return [notification_type for notification_type, bit in TYPE_BITS.items() if mask & bit]
+
+
+def hours_to_mask(hours: Iterable[int]) -> int:
+    mask = 0
+    for hour in hours:
+        mask |= 1 << hour
+    return mask
+
+
+def mask_to_hours(mask: int) -> List[int]:
+    return [hour for hour in range(24) if mask >> hour & 1]
+
+
+def _key(user_id: Any) -> str:
+    return f"user:{user_id}"
+
+
+def _from_row(row: Optional[NotificationPreference]) -> Preferences:
+    if row is None:
+        return Preferences()
+    return Preferences(row.muted_types, frozenset(row.muted_channel_ids or ()), row.quiet_hours, row.utc_offset_minutes)
+
+
+class NotificationPreferenceService:
+    """Cached per-user preferences, applied to every notification fan-out"""
+
+    def __init__(self):
+        self.backend = create_cache_backend(
+            settings.NOTIFICATION_PREFS_CACHE_BACKEND,
+            maxsize=settings.NOTIFICATION_PREFS_CACHE_MAX_ENTRIES,
+            ttl=settings.NOTIFICATION_PREFS_CACHE_TTL_SECONDS,
+            redis_url=settings.REDIS_URL,
+            redis_prefix="notification_prefs:",
+        )
+        self.filtered = 0
+
+    async def get_many(self, db: AsyncSession, user_ids: Iterable[Any]) -> Dict[Any, Preferences]:
+        """Preferences of each user: cache first, one query for the misses."""
+        user_ids = list(dict.fromkeys(user_ids))
+        prefs: Dict[Any, Preferences] = {}
+        if self.backend is not None and user_ids:
+            cached = await asyncio.gather(*(self.backend.get(_key(user_id)) for user_id in user_ids))
+            for user_id, value in zip(user_ids, cached):
+                if value is not None:
+                    prefs[user_id] = Preferences(value[0], frozenset(value[1]), value[2], value[3])
+
+        missing = [user_id for user_id in user_ids if user_id not in prefs]
+        if missing:
+            rows = (
+                await db.execute(
+                    select(NotificationPreference)
+                    .where(NotificationPreference.user_id.in_([UUID(str(user_id)) for user_id in missing]))
+                )
+            ).scalars().all()
+            by_user = {str(row.user_id): row for row in rows}
+            for user_id in missing:
+                pref = _from_row(by_user.get(str(user_id)))
+                prefs[user_id] = pref
+                if self.backend is not None:
+                    await self.backend.set(
+                        _key(user_id),
+                        [pref.muted_types, sorted(pref.muted_channel_ids), pref.quiet_hours, pref.utc_offset_minutes],
+                    )
+        return prefs
+
+    async def get(self, db: AsyncSession, user_id: Any) -> Preferences:
+        return (await self.get_many(db, [user_id]))[user_id]
+
+    async def filter_recipients(
+        self,
+        db: AsyncSession,
+        user_ids: List[Any],
+        notification_type: str,
+        channel_id: Optional[int] = None,
+    ) -> List[Any]:
+        """Recipients who have not muted this type (or this chat channel)."""
+        type_bit = TYPE_BITS.get(notification_type, 0)
+        if not user_ids or (not type_bit and channel_id is None):
+            return user_ids
+        prefs = await self.get_many(db, user_ids)
+        allowed = [user_id for user_id in user_ids if prefs[user_id].allows(type_bit, channel_id)]
+        self.filtered += len(user_ids) - len(allowed)
+        return allowed
+
+    async def quiet_users(self, db: AsyncSession, user_ids: Iterable[Any], now: Optional[datetime] = None) -> Set[Any]:
+        """Users inside their quiet hours (no realtime push)."""
+        now = now or datetime.now(timezone.utc)
+        prefs = await self.get_many(db, user_ids)
+        return {user_id for user_id, pref in prefs.items() if pref.is_quiet(now)}
+
+    def invalidate_nowait(self, user_id: Any) -> None:
+        if self.backend is not None:
+            self.backend.delete_nowait(_key(user_id))
+
+    def stats(self) -> dict:
+        stats = self.backend.stats() if self.backend is not None else {"backend": "none"}
+        return {**stats, "filtered_recipients": self.filtered}
+
+
+# Export singleton
+notification_preferences = NotificationPreferenceService()
+
+
+# ---- Invalidation: any committed change to a user's preferences ----
+
+@event.listens_for(Session, "after_flush")
+def _collect_preference_changes(session: Session, flush_context) -> None:
+    changed: Set[Any] = session.info.setdefault(_PENDING_KEY, set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, NotificationPreference) and obj.user_id is not None:
+            changed.add(obj.user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_preference_changes(session: Session) -> None:
+    for user_id in session.info.pop(_PENDING_KEY, ()):
+        notification_preferences.invalidate_nowait(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_preference_changes(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -6,14 +6,19 @@ Author: BE1
 Created: Feb 2026
 """
 
-from typing import Optional, List
+import time
+from typing import Optional, List, Tuple
 from uuid import UUID
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import func, literal_column, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
 
+from app.core.config import settings
 from app.models.all_models import Notification, User
-from app.services.socket_manager import send_notification, sio
+from app.services.notification_counters import counter_deltas, notification_counters
+from app.services.notification_preferences import notification_preferences
+from app.services.outbox import enqueue_notifications
 import logging
 
 logger = logging.getLogger(__name__)
@@ -32,6 +37,127 @@ class NotificationService:
     TYPE_MENTORING = "mentoring"
     TYPE_SYSTEM = "system"
     
+    # How an existing row with the same coalesce_key is updated
+    MERGE_ADD = "add"  # one more event: count + 1, latest text, unread again
+    MERGE_REPLACE = "replace"  # recomputed summary (digest): count and text as given
+    
+    @staticmethod
+    def _row(
+        user_id: UUID,
+        title: str,
+        content: str,
+        notification_type: str,
+        coalesce_key: Optional[str] = None,
+        count: int = 1,
+        related_entity_type: Optional[str] = None,
+        related_entity_id: Optional[int] = None
+    ) -> dict:
+        """Column values of one notification (model: message / notification_type)."""
+        return {
+            "user_id": user_id,
+            "title": title,
+            "message": content,
+            "notification_type": notification_type,
+            "is_read": False,
+            "coalesce_key": coalesce_key,
+            "coalesced_count": count,
+            "related_entity_type": related_entity_type,
+            "related_entity_id": related_entity_id
+        }
+    
+    @staticmethod
+    def _payload(
+        notification: Notification,
+        link: Optional[str] = None,
+        metadata: Optional[dict] = None
+    ) -> dict:
+        """
+        Real-time payload of a saved notification.
+        link is only pushed, the notifications table has no column for it.
+        """
+        return {
+            "notification_id": notification.notification_id,
+            "title": notification.title,
+            "content": notification.message,
+            "type": notification.notification_type,
+            "link": link,
+            "is_read": notification.is_read,
+            "created_at": notification.created_at.isoformat() if notification.created_at else None,
+            # > 1: merged row, clients replace the notification with the same id
+            "count": notification.coalesced_count,
+            "metadata": metadata
+        }
+    
+    @staticmethod
+    async def _upsert(
+        db: AsyncSession,
+        rows: List[dict],
+        merge: str = MERGE_ADD
+    ) -> List[Notification]:
+        """
+        Insert notification rows in one statement; rows whose (user_id,
+        coalesce_key) already exists update that row in place instead
+        (rows without a key are always inserted). Returns the inserted and
+        updated rows; with MERGE_REPLACE a row that would not change is
+        left alone and not returned, so re-running a digest pushes nothing.
+        notification_counters gets the new rows and the merged rows that
+        became unread again.
+        """
+        reopened = set()
+        keyed = [(row["user_id"], row["coalesce_key"]) for row in rows if row.get("coalesce_key")]
+        if keyed and merge == NotificationService.MERGE_ADD:
+            # Lock every existing row the merge touches, read or not: a
+            # concurrent mark-read (or merge) of an unread one then waits for
+            # this transaction instead of taking unread -1 between this read
+            # and the upsert. The rows read here are the ones made unread again.
+            locked = (
+                await db.execute(
+                    select(Notification.notification_id, Notification.is_read)
+                    .where(tuple_(Notification.user_id, Notification.coalesce_key).in_(keyed))
+                    .order_by(Notification.notification_id)
+                    .with_for_update()
+                )
+            ).all()
+            reopened = {notification_id for notification_id, is_read in locked if is_read}
+        
+        stmt = insert(Notification).values(rows)
+        excluded = stmt.excluded
+        if merge == NotificationService.MERGE_REPLACE:
+            set_ = {"coalesced_count": excluded.coalesced_count}
+            where = Notification.coalesced_count != excluded.coalesced_count
+        else:
+            set_ = {"coalesced_count": Notification.coalesced_count + excluded.coalesced_count, "is_read": False}
+            where = None
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Notification.user_id, Notification.coalesce_key],
+            index_where=Notification.coalesce_key.isnot(None),
+            set_={**set_, "title": excluded.title, "message": excluded.message, "updated_at": func.now()},
+            where=where
+        )
+        result = (
+            await db.execute(
+                stmt.returning(Notification, literal_column("xmax = 0").label("inserted"))
+                .execution_options(populate_existing=True)
+            )
+        ).all()
+        
+        deltas = counter_deltas(
+            ((n.user_id, n.notification_type) for n, inserted in result if inserted), total=1, unread=1
+        )
+        for n, inserted in result:
+            if not inserted and n.notification_id in reopened:
+                deltas[(n.user_id, n.notification_type)][1] += 1
+        await notification_counters.apply(db, deltas)
+        return [notification for notification, _ in result]
+    
+    @staticmethod
+    async def _push(db: AsyncSession, deliveries: List[Tuple[Notification, dict]]) -> None:
+        """Queue realtime pushes (outbox), except to recipients inside their quiet hours."""
+        quiet = await notification_preferences.quiet_users(db, {n.user_id for n, _ in deliveries})
+        deliveries = [(n.user_id, payload) for n, payload in deliveries if n.user_id not in quiet]
+        if deliveries:
+            enqueue_notifications(db, deliveries)
+    
     @staticmethod
     async def create_and_send(
         db: AsyncSession,
@@ -41,9 +167,9 @@ class NotificationService:
         notification_type: str = "system",
         link: Optional[str] = None,
         metadata: Optional[dict] = None
-    ) -> Notification:
+    ) -> Optional[Notification]:
         """
-        Tạo notification trong DB và gửi real-time.
+        Tạo notification trong DB và gửi real-time (qua outbox, cùng transaction).
         
         Args:
             db: Database session
@@ -55,40 +181,18 @@ class NotificationService:
             metadata: Thông tin bổ sung (optional)
         
         Returns:
-            Notification object đã được tạo
+            Notification object đã được tạo (None nếu user đã tắt loại này)
         """
-        # Create notification in DB
-        notification = Notification(
-            user_id=user_id,
+        notifications = await NotificationService.send_to_users(
+            db=db,
+            user_ids=[user_id],
             title=title,
             content=content,
-            type=notification_type,
+            notification_type=notification_type,
             link=link,
-            is_read=False
+            metadata=metadata
         )
-        db.add(notification)
-        await db.commit()
-        await db.refresh(notification)
-        
-        # Send real-time notification
-        notification_data = {
-            "notification_id": notification.notification_id,
-            "title": notification.title,
-            "content": notification.content,
-            "type": notification.type,
-            "link": notification.link,
-            "is_read": notification.is_read,
-            "created_at": notification.created_at.isoformat() if notification.created_at else None,
-            "metadata": metadata
-        }
-        
-        try:
-            await send_notification(str(user_id), notification_data)
-            logger.info(f"Notification sent to user {user_id}")
-        except Exception as e:
-            logger.error(f"Failed to send real-time notification: {e}")
-        
-        return notification
+        return notifications[0] if notifications else None
     
     @staticmethod
     async def send_to_team(
@@ -97,7 +201,8 @@ class NotificationService:
         title: str,
         content: str,
         notification_type: str = "team",
-        exclude_user: Optional[UUID] = None
+        exclude_user: Optional[UUID] = None,
+        link: Optional[str] = None
     ) -> List[Notification]:
         """
         Gửi notification cho tất cả members trong team.
@@ -109,6 +214,7 @@ class NotificationService:
             content: Nội dung notification
             notification_type: Loại notification
             exclude_user: User ID để loại trừ (ví dụ: người gửi)
+            link: Link liên quan (optional)
         
         Returns:
             List of created notifications
@@ -121,19 +227,61 @@ class NotificationService:
         )
         member_ids = [row[0] for row in result.fetchall()]
         
-        notifications = []
-        for user_id in member_ids:
-            if exclude_user and user_id == exclude_user:
-                continue
-            
-            notification = await NotificationService.create_and_send(
-                db=db,
-                user_id=user_id,
-                title=title,
-                content=content,
-                notification_type=notification_type
-            )
-            notifications.append(notification)
+        return await NotificationService.send_to_users(
+            db=db,
+            user_ids=[user_id for user_id in member_ids if not (exclude_user and user_id == exclude_user)],
+            title=title,
+            content=content,
+            notification_type=notification_type,
+            link=link
+        )
+    
+    @staticmethod
+    async def send_to_users(
+        db: AsyncSession,
+        user_ids: List[UUID],
+        title: str,
+        content: str,
+        notification_type: str = "system",
+        link: Optional[str] = None,
+        metadata: Optional[dict] = None,
+        coalesce_key: Optional[str] = None,
+        channel_id: Optional[int] = None
+    ) -> List[Notification]:
+        """
+        Tạo cùng một notification cho nhiều users và gửi real-time.
+        
+        One multi-row INSERT ... RETURNING for all recipients, flushed into
+        the caller's transaction (the caller commits; the realtime pushes go
+        into the outbox with it), then one batched pass over the sockets by
+        outbox_dispatcher: one emit per user, not per socket. The same few round trips whatever the team size,
+        instead of add / commit / refresh per recipient.
+        
+        With coalesce_key, a user who already has a notification with that
+        key gets it updated in place (count + 1, latest title / content)
+        instead of a new row.
+        
+        Recipients who muted notification_type (or the chat channel_id) are
+        dropped before anything is written; those in quiet hours get the
+        row but no push.
+        """
+        # ON CONFLICT cannot update the same row twice in one statement
+        user_ids = await notification_preferences.filter_recipients(
+            db, list(dict.fromkeys(user_ids)), notification_type, channel_id
+        )
+        if not user_ids:
+            return []
+        
+        notifications = await NotificationService._upsert(db, [
+            NotificationService._row(user_id, title, content, notification_type, coalesce_key)
+            for user_id in user_ids
+        ])
+        
+        await NotificationService._push(db, [
+            (notification, NotificationService._payload(notification, link, metadata))
+            for notification in notifications
+        ])
+        await db.flush()
         
         return notifications
     
@@ -149,9 +297,25 @@ class NotificationService:
         Notify team members about new message.
         Note: Real-time broadcast is done via socket_manager.broadcast_message
         This creates persistent notifications for offline users.
+        Called by send_message before it commits (one transaction with the message).
+        
+        NOTIFICATION_MESSAGE_MODE:
+        - "each": one notification per message and recipient
+        - "coalesce": one notification per recipient and channel per
+          NOTIFICATION_COALESCE_WINDOW_SECONDS window, counting the messages
+        - "digest": nothing here; notification_digest writes one summary per
+          recipient and channel every NOTIFICATION_DIGEST_INTERVAL_SECONDS
         """
         from app.models.all_models import Channel, TeamMember
         
+        mode = settings.NOTIFICATION_MESSAGE_MODE
+        if mode == "digest":
+            return
+        coalesce_key = None
+        if mode == "coalesce":
+            window = int(time.time() // settings.NOTIFICATION_COALESCE_WINDOW_SECONDS)
+            coalesce_key = f"message:channel:{channel_id}:{window}"
+        
         # Get channel's team
         channel = await db.get(Channel, channel_id)
         if not channel:
@@ -161,20 +325,22 @@ class NotificationService:
         result = await db.execute(
             select(TeamMember.user_id).where(
                 TeamMember.team_id == channel.team_id,
-                TeamMember.user_id != sender_id
+                TeamMember.user_id != sender_id,
+                TeamMember.is_active == True
             )
         )
         member_ids = [row[0] for row in result.fetchall()]
         
-        for user_id in member_ids:
-            await NotificationService.create_and_send(
-                db=db,
-                user_id=user_id,
-                title=f"New message from {sender_name}",
-                content=message_preview[:100] + "..." if len(message_preview) > 100 else message_preview,
-                notification_type=NotificationService.TYPE_MESSAGE,
-                link=f"/channels/{channel_id}"
-            )
+        await NotificationService.send_to_users(
+            db=db,
+            user_ids=member_ids,
+            title=f"New message from {sender_name}",
+            content=message_preview[:100] + "..." if len(message_preview) > 100 else message_preview,
+            notification_type=NotificationService.TYPE_MESSAGE,
+            link=f"/channels/{channel_id}",
+            coalesce_key=coalesce_key,
+            channel_id=channel_id
+        )
     
     @staticmethod
     async def notify_task_assigned(
@@ -0,0 +1,291 @@
+"""
+Outbox
+Transactional outbox cho realtime broadcasts và notifications
+
+Endpoints used to commit and then await the socket fan-out inline: the
+response waited for it, and an error (or a crash) between the commit and
+the emit lost the event for good. Instead the side effect is now written as
+an OutboxEvent row in the same transaction as the change:
+
+    db.add(message)
+    enqueue_broadcast(db, "broadcast_message", channel_id, payload)
+    await db.commit()          # both or neither
+
+and OutboxDispatcher delivers it afterwards:
+
+- woken right after a commit that wrote outbox rows on this worker, and
+  polling every OUTBOX_POLL_INTERVAL_SECONDS for rows from other workers
+- leases up to OUTBOX_BATCH_SIZE pending rows in id order (FOR UPDATE
+  SKIP LOCKED, then available_at pushed OUTBOX_LEASE_SECONDS ahead and
+  committed), so several workers drain the table without delivering a row
+  twice, and emits with no transaction open
+- a failed delivery is retried with exponential backoff, up to
+  OUTBOX_MAX_ATTEMPTS, then kept with its last_error and not retried
+- delivered rows are deleted after OUTBOX_RETENTION_HOURS
+
+Delivery is at-least-once: a worker dying after the emit but before
+recording it leaves the batch to be sent again when the lease runs out.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterable, Tuple
+
+from sqlalchemy import and_, delete, event, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.all_models import OutboxEvent
+from app.services import socket_manager
+from app.services.socket_serializer import encode_default
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = "outbox_rows_written"
+
+KIND_NOTIFICATIONS = "send_notifications"
+
+# kind -> coroutine function called with the stored args
+HANDLERS: Dict[str, Callable[..., Awaitable[Any]]] = {
+    "broadcast_message": socket_manager.broadcast_message,
+    "broadcast_message_updated": socket_manager.broadcast_message_updated,
+    "broadcast_message_deleted": socket_manager.broadcast_message_deleted,
+    "broadcast_task_update": socket_manager.broadcast_task_update,
+    "broadcast_team_member_joined": socket_manager.broadcast_team_member_joined,
+    "broadcast_team_member_left": socket_manager.broadcast_team_member_left,
+    "broadcast_meeting_started": socket_manager.broadcast_meeting_started,
+    KIND_NOTIFICATIONS: lambda deliveries: socket_manager.send_notifications(
+        (user_id, notification) for user_id, notification in deliveries
+    ),
+}
+
+
+def enqueue(db: AsyncSession, kind: str, *args: Any) -> OutboxEvent:
+    """
+    Add an outbox row to the session; it is committed with the caller's
+    transaction. args must be JSON-encodable (datetimes and UUIDs become
+    strings).
+    """
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown outbox event kind: {kind}")
+    row = OutboxEvent(kind=kind, payload={"args": json.loads(json.dumps(list(args), default=encode_default))})
+    db.add(row)
+    return row
+
+
+def enqueue_broadcast(db: AsyncSession, broadcast: str, *args: Any) -> OutboxEvent:
+    """Queue a socket_manager.broadcast_* call, e.g. ("broadcast_message", channel_id, data)."""
+    return enqueue(db, broadcast, *args)
+
+
+def enqueue_notifications(db: AsyncSession, deliveries: Iterable[Tuple[Any, dict]]) -> OutboxEvent:
+    """Queue real-time pushes of saved notifications: (user_id, notification_data) pairs."""
+    return enqueue(db, KIND_NOTIFICATIONS, [[str(user_id), data] for user_id, data in deliveries])
+
+
+class OutboxDispatcher:
+    """Drains outbox_events in batches (started from app startup)"""
+
+    def __init__(
+        self,
+        batch_size: int = settings.OUTBOX_BATCH_SIZE,
+        poll_interval: float = settings.OUTBOX_POLL_INTERVAL_SECONDS,
+        max_attempts: int = settings.OUTBOX_MAX_ATTEMPTS,
+        retention_hours: float = settings.OUTBOX_RETENTION_HOURS,
+        lease_seconds: float = settings.OUTBOX_LEASE_SECONDS,
+    ):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retention = timedelta(hours=retention_hours)
+        self.lease_seconds = lease_seconds
+        self._wake = asyncio.Event()
+
+        self.batches = 0
+        self.delivered = 0
+        self.failed = 0
+        self.dead = 0
+        self.purged = 0
+        self.last_lag_ms = 0.0
+
+    def wake(self) -> None:
+        """Outbox rows were committed on this worker: dispatch now."""
+        self._wake.set()
+
+    async def dispatch_batch(self) -> int:
+        """
+        Deliver one batch of pending rows; returns the number claimed.
+
+        Three steps, so no row lock or pooled connection is held while the
+        sockets are written to:
+
+        1. claim: one short transaction leases the rows (available_at moves
+           OUTBOX_LEASE_SECONDS ahead, attempts + 1) and commits
+        2. emit, with no session open
+        3. record: one short transaction marks the delivered rows and
+           schedules the failed ones for a retry
+
+        A worker dying between 1 and 3 leaves its rows to be claimed again
+        once the lease runs out.
+        """
+        from app.db.session import AsyncSessionLocal
+
+        async with AsyncSessionLocal() as db:
+            claimable = (
+                select(OutboxEvent.event_id)
+                .where(
+                    OutboxEvent.dispatched_at.is_(None),
+                    OutboxEvent.available_at <= func.now(),
+                    OutboxEvent.attempts < self.max_attempts,
+                )
+                .order_by(OutboxEvent.event_id)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            rows = (
+                await db.execute(
+                    update(OutboxEvent)
+                    .where(OutboxEvent.event_id.in_(claimable))
+                    .values(
+                        available_at=func.now() + timedelta(seconds=self.lease_seconds),
+                        attempts=OutboxEvent.attempts + 1,
+                    )
+                    .returning(
+                        OutboxEvent.event_id,
+                        OutboxEvent.kind,
+                        OutboxEvent.payload,
+                        OutboxEvent.attempts,
+                        OutboxEvent.created_at,
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+            ).all()
+            await db.commit()
+        if not rows:
+            return 0
+        rows = sorted(rows, key=lambda row: row.event_id)
+
+        delivered, failed = [], []
+        for row in rows:
+            try:
+                await HANDLERS[row.kind](*row.payload.get("args", []))
+                delivered.append(row.event_id)
+            except Exception as e:
+                failed.append((row, e))
+
+        async with AsyncSessionLocal() as db:
+            if delivered:
+                await db.execute(
+                    update(OutboxEvent)
+                    .where(OutboxEvent.event_id.in_(delivered))
+                    .values(dispatched_at=func.now())
+                    .execution_options(synchronize_session=False)
+                )
+            for row, error in failed:
+                await db.execute(
+                    update(OutboxEvent)
+                    .where(OutboxEvent.event_id == row.event_id)
+                    .values(**self._failed(row, error))
+                    .execution_options(synchronize_session=False)
+                )
+            await db.commit()
+
+        self.batches += 1
+        self.delivered += len(delivered)
+        if delivered and rows[0].created_at is not None:
+            self.last_lag_ms = round((datetime.now(timezone.utc) - rows[0].created_at).total_seconds() * 1000, 1)
+        return len(rows)
+
+    def _failed(self, row, error: Exception) -> dict:
+        """Column values recording a failed delivery (attempts already counted at claim)."""
+        self.failed += 1
+        values = {"last_error": str(error)[:1000]}
+        if row.attempts >= self.max_attempts:
+            # Give up; the row stays for inspection until purged
+            values["dispatched_at"] = datetime.now(timezone.utc)
+            self.dead += 1
+            logger.error(f"Outbox event {row.event_id} ({row.kind}) dropped after {row.attempts} attempts: {error}")
+        else:
+            values["available_at"] = datetime.now(timezone.utc) + timedelta(seconds=2 ** row.attempts)
+            logger.warning(f"Outbox event {row.event_id} ({row.kind}) failed, retrying: {error}")
+        return values
+
+    async def purge(self) -> int:
+        """
+        Delete rows delivered more than OUTBOX_RETENTION_HOURS ago, and rows
+        whose last lease ran out that long ago with no attempts left (the
+        worker died mid-delivery).
+        """
+        from app.db.session import AsyncSessionLocal
+
+        cutoff = datetime.now(timezone.utc) - self.retention
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                delete(OutboxEvent).where(or_(
+                    OutboxEvent.dispatched_at < cutoff,
+                    and_(
+                        OutboxEvent.dispatched_at.is_(None),
+                        OutboxEvent.attempts >= self.max_attempts,
+                        OutboxEvent.available_at < cutoff,
+                    ),
+                ))
+            )
+            await db.commit()
+        self.purged += result.rowcount or 0
+        return result.rowcount or 0
+
+    async def run(self) -> None:
+        """Dispatch loop (started from app startup)."""
+        next_purge = time.monotonic()
+        while True:
+            try:
+                # Keep going while batches come back full
+                while await self.dispatch_batch() >= self.batch_size:
+                    pass
+                if time.monotonic() >= next_purge:
+                    next_purge = time.monotonic() + 3600
+                    await self.purge()
+            except Exception as e:
+                logger.error(f"Outbox dispatch failed: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "delivered": self.delivered,
+            "failed_attempts": self.failed,
+            "dead": self.dead,
+            "purged": self.purged,
+            "last_lag_ms": self.last_lag_ms,
+        }
+
+
+# Export singleton
+outbox_dispatcher = OutboxDispatcher()
+
+
+# ---- Wake the dispatcher once outbox rows are committed ----
+
+@event.listens_for(Session, "after_flush")
+def _collect_outbox_rows(session: Session, flush_context) -> None:
+    if any(isinstance(obj, OutboxEvent) for obj in session.new):
+        session.info[_PENDING_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_outbox_dispatcher(session: Session) -> None:
+    if session.info.pop(_PENDING_KEY, False):
+        outbox_dispatcher.wake()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_outbox_rows(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
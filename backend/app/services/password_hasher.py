@@ -0,0 +1,156 @@
+"""
+Password Hasher
+Chạy hash / verify mật khẩu ngoài event loop
+
+PBKDF2 is deliberately slow; running it on the event loop freezes every
+HTTP request and websocket of the worker during a login burst. The hasher
+sends the work to a process pool and bounds it:
+
+- at most PASSWORD_HASH_MAX_CONCURRENCY hashes run at once
+- at most PASSWORD_HASH_MAX_QUEUE more wait; beyond that the request is
+  shed with 503 + Retry-After
+
+Queue depth, latency and rejections are reported by stats()
+(GET /admin/password-hasher).
+"""
+
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from app.core import security
+from app.core.config import settings
+from app.db.pool_metrics import Histogram
+
+
+class PasswordHasher:
+    """Bounded process-pool executor for password hashing"""
+
+    def __init__(
+        self,
+        workers: int = settings.PASSWORD_HASH_WORKERS,
+        max_concurrency: int = settings.PASSWORD_HASH_MAX_CONCURRENCY,
+        max_queue: int = settings.PASSWORD_HASH_MAX_QUEUE,
+        rounds: int = settings.PASSWORD_HASH_ROUNDS,
+    ):
+        self.workers = workers
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.rounds = rounds
+        self._executor: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+        self.waiting = 0
+        self.in_flight = 0
+        self.max_waiting_seen = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_time = Histogram()
+        self.run_time = Histogram()
+
+    def _get_executor(self) -> Optional[Executor]:
+        # Created lazily so importing the module never spawns processes;
+        # None means loop.run_in_executor's default thread pool
+        if self._executor is None and self.workers > 0:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def _run(self, func, *args):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please try again",
+                headers={"Retry-After": "1"},
+            )
+
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        self.max_waiting_seen = max(self.max_waiting_seen, self.waiting)
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        started_at = time.perf_counter()
+        self.wait_time.observe((started_at - queued_at) * 1000)
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+            self.completed += 1
+            self.run_time.observe((time.perf_counter() - started_at) * 1000)
+
+    async def hash(self, password: str) -> str:
+        """Hash a password for storing (raises ValueError if it is too long)."""
+        security.check_password_length(password)
+        return await self._run(security.hash_password_with_rounds, password, self.rounds)
+
+    async def hash_many(self, passwords: Iterable[str], return_exceptions: bool = False) -> List[str]:
+        """
+        Hash several passwords concurrently.
+
+        With return_exceptions=True a failing password yields its exception
+        in the result list instead of failing the whole batch.
+        """
+        # Submit in windows of max_concurrency so a large batch (user import)
+        # never fills the shared queue and starves logins
+        passwords = list(passwords)
+        results: List[str] = []
+        for start in range(0, len(passwords), self.max_concurrency):
+            window = passwords[start:start + self.max_concurrency]
+            results += await asyncio.gather(
+                *(self.hash(p) for p in window), return_exceptions=return_exceptions
+            )
+        return results
+
+    async def verify(self, password: str, hashed_password: Optional[str]) -> Tuple[bool, Optional[str]]:
+        """
+        Check a password.
+
+        Returns:
+            (matches, new_hash): new_hash is set when the stored hash uses an
+            older work factor or scheme and should be saved instead
+        """
+        if not hashed_password:
+            return False, None
+        return await self._run(
+            security.verify_and_update_password, password, hashed_password, self.rounds
+        )
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "rounds": self.rounds,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queue_depth": self.waiting,
+            "max_queue_depth_seen": self.max_waiting_seen,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "wait": self.wait_time.snapshot(),
+            "run": self.run_time.snapshot(),
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Export singleton
+password_hasher = PasswordHasher()
@@ -0,0 +1,187 @@
+"""
+Presence Service
+Trạng thái online theo team + lưu last_seen_at theo lô
+
+A user is online while they have at least one socket on any worker (the
+connection registry). On top of that this service keeps:
+
+- per-team online sets for this worker's users (user <-> team index), so a
+  user going online or offline is announced only to their teams
+- coalesced diffs: at most once per PRESENCE_BROADCAST_INTERVAL_MS per team
+
+      presence_diff {"team_id": 1, "online": [user_id, ...], "offline": [user_id, ...]}
+
+  Clients keep a set per team: seed it from presence_snapshot (sent on
+  join_team) or GET /teams/{team_id}/presence, then apply diffs.
+- heartbeat expiry: sockets that send "heartbeat" and then go quiet for
+  PRESENCE_TIMEOUT_SECONDS are disconnected, so a frozen tab does not stay
+  online. Sockets that never sent a heartbeat (older clients) are left to
+  the Engine.IO ping timeout.
+- last_seen_at: connect, heartbeat and disconnect only record the time in
+  memory; pending values are written to users.last_seen_at in one batched
+  UPDATE every PRESENCE_LAST_SEEN_FLUSH_SECONDS (and on shutdown).
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Dict, FrozenSet, Iterable, List, Set
+from uuid import UUID
+
+from sqlalchemy import bindparam, func, update
+
+from app.core.config import settings
+from app.models.all_models import User
+from app.services.socket_rooms import RoomIndex
+
+logger = logging.getLogger(__name__)
+
+
+class PresenceService:
+    """Team-scoped presence with batched diffs and batched last-seen writes"""
+
+    def __init__(
+        self,
+        broadcast_interval_ms: float = settings.PRESENCE_BROADCAST_INTERVAL_MS,
+        timeout_seconds: float = settings.PRESENCE_TIMEOUT_SECONDS,
+        flush_interval_seconds: float = settings.PRESENCE_LAST_SEEN_FLUSH_SECONDS,
+    ):
+        self.interval = broadcast_interval_ms / 1000
+        self.timeout = timeout_seconds
+        self.flush_interval = flush_interval_seconds
+        # user_id <-> team_ids, users with a socket on this worker
+        self.teams: RoomIndex[int] = RoomIndex()
+        # sid -> monotonic time of its last heartbeat (heartbeating sockets only)
+        self._beats: Dict[str, float] = {}
+        # Pending diffs since the last broadcast
+        self._online: Dict[int, Set[str]] = {}
+        self._offline: Dict[int, Set[str]] = {}
+        # user_id -> last seen, not yet written to the database
+        self._last_seen: Dict[str, datetime] = {}
+
+        self.diffs_emitted = 0
+        self.expired_sockets = 0
+        self.last_seen_flushes = 0
+        self.last_seen_rows = 0
+
+    def _seen(self, user_id: str) -> None:
+        self._last_seen[user_id] = datetime.now(timezone.utc)
+
+    def user_connected(self, user_id: str, team_ids: Iterable[int]) -> None:
+        """First socket of the user on this worker."""
+        self._seen(user_id)
+        for team_id in team_ids:
+            self.teams.add(user_id, team_id)
+            self._offline.get(team_id, set()).discard(user_id)
+            self._online.setdefault(team_id, set()).add(user_id)
+
+    def user_disconnected(self, user_id: str, announce: bool) -> None:
+        """
+        Last socket of the user on this worker closed.
+
+        Args:
+            announce: False if the user still has sockets on other workers
+        """
+        self._seen(user_id)
+        for team_id in self.teams.remove_sid(user_id):
+            self._online.get(team_id, set()).discard(user_id)
+            if announce:
+                self._offline.setdefault(team_id, set()).add(user_id)
+
+    def beat(self, sid: str, user_id: str) -> None:
+        self._beats[sid] = time.monotonic()
+        self._seen(user_id)
+
+    def pending_last_seen(self, user_id: str):
+        """Last seen not yet written to users.last_seen_at, if any."""
+        return self._last_seen.get(user_id)
+
+    def forget_socket(self, sid: str) -> None:
+        self._beats.pop(sid, None)
+
+    def online_here(self, team_id: int) -> FrozenSet[str]:
+        """Users of the team with a socket on this worker."""
+        return frozenset(self.teams.members(team_id))
+
+    def expired_sids(self) -> List[str]:
+        deadline = time.monotonic() - self.timeout
+        return [sid for sid, beat in self._beats.items() if beat < deadline]
+
+    async def broadcast(self, sio) -> None:
+        """Emit one presence_diff per team whose online set changed."""
+        online, self._online = self._online, {}
+        offline, self._offline = self._offline, {}
+        for team_id in set(online) | set(offline):
+            came = online.get(team_id, set())
+            went = offline.get(team_id, set())
+            if not came and not went:
+                continue
+            await sio.emit('presence_diff', {
+                'team_id': team_id,
+                'online': sorted(came),
+                'offline': sorted(went),
+            }, room=f"team_{team_id}")
+            self.diffs_emitted += 1
+
+    async def flush_last_seen(self) -> int:
+        """Write pending last_seen_at values in one batched UPDATE."""
+        pending, self._last_seen = self._last_seen, {}
+        if not pending:
+            return 0
+
+        from app.db.session import AsyncSessionLocal
+
+        users = User.__table__
+        stmt = (
+            update(users)
+            .where(users.c.user_id == bindparam("b_user_id"))
+            # Several workers may write the same user: never move it backwards
+            .values(last_seen_at=func.greatest(users.c.last_seen_at, bindparam("b_seen")))
+        )
+        rows = [{"b_user_id": UUID(user_id), "b_seen": seen} for user_id, seen in pending.items()]
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(stmt, rows)
+                await db.commit()
+        except Exception:
+            # Keep the values for the next flush unless newer ones arrived
+            for user_id, seen in pending.items():
+                self._last_seen.setdefault(user_id, seen)
+            raise
+        self.last_seen_flushes += 1
+        self.last_seen_rows += len(rows)
+        return len(rows)
+
+    async def run(self, sio) -> None:
+        """Broadcast / expiry / last-seen loop (started from app startup)."""
+        next_flush = time.monotonic() + self.flush_interval
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                for sid in self.expired_sids():
+                    self._beats.pop(sid, None)
+                    self.expired_sockets += 1
+                    await sio.disconnect(sid)
+                await self.broadcast(sio)
+                if time.monotonic() >= next_flush:
+                    next_flush = time.monotonic() + self.flush_interval
+                    await self.flush_last_seen()
+            except Exception as e:
+                logger.error(f"Presence loop failed: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "users_online_here": len(self.teams.sid_rooms),
+            "teams_online_here": len(self.teams.rooms),
+            "heartbeating_sockets": len(self._beats),
+            "diffs_emitted": self.diffs_emitted,
+            "expired_sockets": self.expired_sockets,
+            "last_seen_pending": len(self._last_seen),
+            "last_seen_flushes": self.last_seen_flushes,
+            "last_seen_rows_written": self.last_seen_rows,
+        }
+
+
+# Export singleton
+presence_service = PresenceService()
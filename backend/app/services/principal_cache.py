@@ -0,0 +1,139 @@
+"""
+Principal Cache
+Cache user đã xác thực cho get_current_user
+
+get_current_user used to run ``select(User)`` on every authenticated request.
+The principal cache keeps a column snapshot of each user keyed by user_id
+(TTL + LRU), so a hit rebuilds the User without touching the database.
+
+Backends (settings.PRINCIPAL_CACHE_BACKEND):
+- "memory": per-process TTLLRUCache (default); with several workers
+            (SOCKETIO_MANAGER = "redis") every invalidation is broadcast
+            so all workers drop the entry (app.core.cache.invalidation_bus)
+- "redis":  shared across workers, uses settings.REDIS_URL
+- "none":   disabled
+
+Entries are invalidated when a user's row changes: explicitly by the
+endpoints that edit users (role, department, profile) and, as a safety net,
+by a session listener that catches any flushed change to a User
+(e.g. is_active flipping) and drops the entry after commit, on every
+worker. A deactivated user or changed role is therefore honoured by the
+next request wherever it lands; PRINCIPAL_CACHE_TTL_SECONDS only bounds
+staleness if a broadcast is lost.
+password_hash is never cached.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Optional, Set
+from uuid import UUID
+
+from sqlalchemy import event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.core.cache import create_cache_backend
+from app.core.config import settings
+from app.models.all_models import User
+
+# Columns left out of the snapshot
+_EXCLUDED_COLUMNS = {"password_hash"}
+
+_PENDING_KEY = "principal_cache_invalidations"
+
+
+def _snapshot(user: User) -> Dict[str, Any]:
+    """Column values of a loaded user (no relationships, no password hash)."""
+    state = inspect(user)
+    return {
+        attr.key: state.dict[attr.key]
+        for attr in state.mapper.column_attrs
+        if attr.key not in _EXCLUDED_COLUMNS and attr.key in state.dict
+    }
+
+
+def _decode_snapshot(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Restore UUID / datetime columns of a snapshot read back from Redis JSON."""
+    columns = inspect(User).columns
+    for key, value in data.items():
+        if value is None or key not in columns:
+            continue
+        python_type = columns[key].type.python_type
+        if python_type is UUID:
+            data[key] = UUID(value)
+        elif python_type is datetime:
+            data[key] = datetime.fromisoformat(value)
+    return data
+
+
+class PrincipalCache:
+    """Cache of authenticated users keyed by user_id"""
+
+    def __init__(self):
+        self.backend = create_cache_backend(
+            settings.PRINCIPAL_CACHE_BACKEND,
+            maxsize=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+            ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+            redis_url=settings.REDIS_URL,
+            redis_prefix="principal:",
+            decode=_decode_snapshot,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    async def get_user(self, db: AsyncSession, user_id: Any) -> Optional[User]:
+        """
+        Return the cached user attached to ``db`` (no query), or None on a miss.
+        """
+        if not self.enabled:
+            return None
+        data = await self.backend.get(str(user_id))
+        if data is None:
+            return None
+
+        user = User(**data)
+        make_transient_to_detached(user)
+        # load=False: trust the snapshot, attach without a SELECT
+        return await db.merge(user, load=False)
+
+    async def put(self, user: User) -> None:
+        if self.enabled:
+            await self.backend.set(str(user.user_id), _snapshot(user))
+
+    async def invalidate(self, user_id: Any) -> None:
+        if self.enabled:
+            await self.backend.delete(str(user_id))
+
+    def invalidate_nowait(self, user_id: Any) -> None:
+        """Sync variant for ORM event hooks (Redis delete is scheduled)."""
+        if self.enabled:
+            self.backend.delete_nowait(str(user_id))
+
+    def stats(self) -> dict:
+        return self.backend.stats() if self.enabled else {"backend": "none"}
+
+
+# Export singleton
+principal_cache = PrincipalCache()
+
+
+# ---- Safety net: drop entries of users changed in any committed session ----
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session: Session, flush_context) -> None:
+    changed: Set[Any] = session.info.setdefault(_PENDING_KEY, set())
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User) and obj.user_id is not None:
+            changed.add(obj.user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session: Session) -> None:
+    for user_id in session.info.pop(_PENDING_KEY, ()):
+        principal_cache.invalidate_nowait(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_users(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,234 @@
+"""
+Refresh Token Service
+Cấp / xoay vòng / thu hồi refresh token
+
+Access tokens stay short-lived JWTs; refresh tokens are opaque random
+strings, stored only as their SHA-256 hash, so POST /auth/refresh costs one
+indexed UPDATE instead of a PBKDF2 password check.
+
+Rotation and reuse detection:
+- every refresh marks the presented token as used and issues a new token in
+  the same family (one family per login)
+- presenting an already used token means it leaked (or a client replayed
+  it): the whole family is revoked and the user has to log in again
+
+Deactivating a user or changing their password revokes all their tokens in
+the same transaction (session listener below, whatever code path flips the
+column). Expired tokens, and tokens revoked more than a day ago, are purged
+hourly by maintenance_loop.
+"""
+
+import asyncio
+import hashlib
+import logging
+import secrets
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional, Tuple
+from uuid import UUID, uuid4
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, event, inspect, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.all_models import RefreshToken, User
+
+logger = logging.getLogger(__name__)
+
+# Revoked tokens are only kept this long (401 either way once deleted)
+_REVOKED_RETENTION = timedelta(days=1)
+
+
+def hash_refresh_token(token: str) -> str:
+    """Refresh tokens are high-entropy, so a plain SHA-256 is enough (no PBKDF2)."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _invalid_refresh_token() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+    )
+
+
+class RefreshTokenService:
+    """Rotating, revocable refresh tokens"""
+
+    async def issue(
+        self,
+        db: AsyncSession,
+        user_id: Any,
+        family_id: Optional[UUID] = None,
+        commit: bool = True,
+    ) -> str:
+        """
+        Create a refresh token for the user.
+
+        Args:
+            family_id: family of the token being rotated; None starts a new
+                family (login)
+
+        Returns:
+            The token in clear (only its hash is stored)
+        """
+        token = secrets.token_urlsafe(32)
+        db.add(RefreshToken(
+            user_id=user_id,
+            family_id=family_id or uuid4(),
+            token_hash=hash_refresh_token(token),
+            expires_at=datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        ))
+        if commit:
+            await db.commit()
+        return token
+
+    async def rotate(self, db: AsyncSession, token: str) -> Tuple[UUID, str]:
+        """
+        Consume a refresh token and issue its successor.
+
+        Returns:
+            (user_id, new refresh token)
+
+        Raises:
+            HTTPException 401 if the token is unknown, expired, revoked or
+            already used (the latter also revokes its family)
+        """
+        token_hash = hash_refresh_token(token)
+        now = datetime.now(timezone.utc)
+
+        # Check and consume in one statement: two concurrent refreshes with
+        # the same token cannot both succeed
+        consumed = (
+            await db.execute(
+                update(RefreshToken)
+                .where(
+                    RefreshToken.token_hash == token_hash,
+                    RefreshToken.used_at.is_(None),
+                    RefreshToken.revoked_at.is_(None),
+                    RefreshToken.expires_at > now,
+                )
+                .values(used_at=now)
+                .returning(RefreshToken.user_id, RefreshToken.family_id)
+            )
+        ).first()
+
+        if consumed is None:
+            await self._handle_rejected(db, token_hash, now)
+            raise _invalid_refresh_token()
+
+        user_id, family_id = consumed
+        is_active = (
+            await db.execute(select(User.is_active).where(User.user_id == user_id))
+        ).scalar_one_or_none()
+        if not is_active:
+            await self._revoke_family(db, family_id, now)
+            await db.commit()
+            raise _invalid_refresh_token()
+
+        new_token = await self.issue(db, user_id, family_id=family_id, commit=False)
+        await db.commit()
+        return user_id, new_token
+
+    async def _handle_rejected(self, db: AsyncSession, token_hash: str, now: datetime) -> None:
+        """Revoke the family when a rotated token is presented again."""
+        stored = (
+            await db.execute(
+                select(RefreshToken.family_id, RefreshToken.user_id, RefreshToken.used_at, RefreshToken.revoked_at)
+                .where(RefreshToken.token_hash == token_hash)
+            )
+        ).first()
+        if stored is None or stored.used_at is None or stored.revoked_at is not None:
+            return
+
+        logger.warning(
+            f"Refresh token reuse detected for user {stored.user_id}, revoking family {stored.family_id}"
+        )
+        await self._revoke_family(db, stored.family_id, now)
+        await db.commit()
+
+    async def _revoke_family(self, db: AsyncSession, family_id: UUID, now: datetime) -> None:
+        await db.execute(
+            update(RefreshToken)
+            .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=now)
+        )
+
+    async def revoke(self, db: AsyncSession, token: str) -> bool:
+        """
+        Log out: revoke the token's family (this device's session).
+
+        Returns:
+            False if the token is unknown
+        """
+        family_id = (
+            await db.execute(
+                select(RefreshToken.family_id).where(RefreshToken.token_hash == hash_refresh_token(token))
+            )
+        ).scalar_one_or_none()
+        if family_id is None:
+            return False
+        await self._revoke_family(db, family_id, datetime.now(timezone.utc))
+        await db.commit()
+        return True
+
+    async def revoke_all_for_user(self, db: AsyncSession, user_id: Any, commit: bool = True) -> None:
+        """Log the user out everywhere (account deactivated, password changed; see _revoke_on_user_change)."""
+        await db.execute(_revoke_all_statement([user_id]))
+        if commit:
+            await db.commit()
+
+    async def purge(self, db: AsyncSession) -> int:
+        """Delete expired tokens and tokens revoked over a day ago (caller commits)."""
+        now = datetime.now(timezone.utc)
+        result = await db.execute(
+            delete(RefreshToken).where(or_(
+                RefreshToken.expires_at < now,
+                RefreshToken.revoked_at < now - _REVOKED_RETENTION,
+            ))
+        )
+        return result.rowcount or 0
+
+    async def maintenance_loop(self, interval_seconds: float = 3600) -> None:
+        """Purge dead refresh tokens once an hour (started from app startup)."""
+        from app.db.session import AsyncSessionLocal
+
+        while True:
+            try:
+                async with AsyncSessionLocal() as db:
+                    purged = await self.purge(db)
+                    await db.commit()
+                if purged:
+                    logger.info(f"Purged {purged} refresh tokens")
+            except Exception as e:
+                logger.error(f"Refresh token purge failed: {e}")
+            await asyncio.sleep(interval_seconds)
+
+
+def _revoke_all_statement(user_ids):
+    return (
+        update(RefreshToken)
+        .where(RefreshToken.user_id.in_(user_ids), RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.now(timezone.utc))
+    )
+
+
+# Export singleton
+refresh_token_service = RefreshTokenService()
+
+
+# ---- Log out everywhere when a user is deactivated or changes password ----
+
+@event.listens_for(Session, "after_flush")
+def _revoke_on_user_change(session: Session, flush_context) -> None:
+    user_ids = []
+    for obj in session.dirty:
+        if not isinstance(obj, User) or obj.user_id is None:
+            continue
+        state = inspect(obj)
+        deactivated = state.attrs.is_active.history.has_changes() and obj.is_active is False
+        if deactivated or state.attrs.password_hash.history.has_changes():
+            user_ids.append(obj.user_id)
+    if user_ids:
+        # Same transaction as the change: committed (or rolled back) with it
+        session.execute(_revoke_all_statement(user_ids))
@@ -0,0 +1,316 @@
+"""
+Reminder Scheduler
+Nhắc lịch họp và deadline (meeting, milestone, sprint)
+
+Meetings, milestones and sprints had no reminder path at all. The scheduler
+runs in-process (started from app startup):
+
+- every REMINDER_SCAN_INTERVAL_SECONDS one look-ahead query per source
+  reads the rows whose reminders fall in the next REMINDER_LOOKAHEAD_SECONDS
+  (start_time / due_date / end_date range scans on their own index, so a
+  scan costs the upcoming rows only, not the table)
+- each reminder (one per configured offset) is put on a TimerWheel keyed
+  by (kind, entity, offset); a moved meeting replaces its timer and a
+  deleted one is cancelled at the next scan
+- every second the wheel is advanced and whatever fell due is fired as one
+  batch: one INSERT into reminder_log claims the batch, recipients are read
+  in one query per source kind, and all notification rows are written with
+  one multi-row insert; pushes go through the outbox
+
+Every worker runs a scheduler. Firing takes a transaction advisory lock, and
+reminder_log (ON CONFLICT DO NOTHING) lets only the first worker send a
+reminder, so each goes out once; restarts do not resend. A reminder whose
+time passed while no worker ran is still sent, for the smallest offset
+only, if the meeting or deadline is ahead.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from typing import Dict, Iterable, List, NamedTuple, Set, Tuple
+
+from sqlalchemy import delete, select, text
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.config import settings
+from app.models.all_models import Meeting, Milestone, ReminderLog, Sprint, Team, TeamMember
+from app.services.notification_preferences import TYPE_BITS, notification_preferences
+from app.services.notification_service import NotificationService
+from app.services.timer_wheel import TimerWheel
+
+logger = logging.getLogger(__name__)
+
+# Serialises reminder firing across workers (see message_partitions, notification_digest)
+_ADVISORY_LOCK_KEY = 727_301_003
+
+KIND_MEETING = "meeting"
+KIND_MILESTONE = "milestone"
+KIND_SPRINT = "sprint"
+
+_LINKS = {
+    KIND_MEETING: "/meetings/{}",
+    KIND_MILESTONE: "/milestones/{}",
+    KIND_SPRINT: "/sprints/{}",
+}
+
+
+class Reminder(NamedTuple):
+    kind: str
+    entity_id: int
+    offset_minutes: int
+    due_at: datetime
+    title: str
+    scope_id: int  # team_id (meeting, sprint) or class_id (milestone)
+
+    @property
+    def key(self) -> Tuple[str, int, int]:
+        return (self.kind, self.entity_id, self.offset_minutes)
+
+    @property
+    def fire_at(self) -> datetime:
+        return self.due_at - timedelta(minutes=self.offset_minutes)
+
+
+def sprint_due_at(end_date: date) -> datetime:
+    """A sprint is due at the end of its end_date (UTC)."""
+    return datetime.combine(end_date + timedelta(days=1), dt_time.min, tzinfo=timezone.utc)
+
+
+def reminder_text(reminder: Reminder, now: datetime) -> Tuple[str, str, str]:
+    """(title, content, notification type) of a reminder sent at ``now``."""
+    if reminder.kind == KIND_MEETING:
+        minutes = max(round((reminder.due_at - now).total_seconds() / 60), 0)
+        return (
+            "Meeting Starting Soon",
+            f"Meeting '{reminder.title}' starts in {minutes} minutes",
+            NotificationService.TYPE_MEETING,
+        )
+    what = "Milestone" if reminder.kind == KIND_MILESTONE else "Sprint"
+    return (
+        "Deadline Approaching",
+        f"{what} '{reminder.title}' is due at {reminder.due_at:%d/%m/%Y %H:%M} UTC",
+        NotificationService.TYPE_DEADLINE,
+    )
+
+
+class ReminderScheduler:
+    """Look-ahead scan + timer wheel + batched firing (started from app startup)"""
+
+    def __init__(
+        self,
+        lookahead_seconds: int = settings.REMINDER_LOOKAHEAD_SECONDS,
+        scan_interval_seconds: int = settings.REMINDER_SCAN_INTERVAL_SECONDS,
+        meeting_offsets: Iterable[int] = tuple(settings.reminder_meeting_offsets),
+        deadline_offsets: Iterable[int] = tuple(settings.reminder_deadline_offsets),
+    ):
+        self.lookahead = timedelta(seconds=lookahead_seconds)
+        self.scan_interval = scan_interval_seconds
+        self.meeting_offsets = sorted(set(meeting_offsets))
+        self.deadline_offsets = sorted(set(deadline_offsets))
+        self.wheel = TimerWheel(tick=1.0)
+        # (key, due_at) fired or claimed by another worker, until the due time passes
+        self._sent: Set[Tuple[Tuple[str, int, int], datetime]] = set()
+
+        self.scans = 0
+        self.last_scan_rows = 0
+        self.last_scan_ms = 0.0
+        self.batches = 0
+        self.fired = 0
+        self.notifications = 0
+
+    def _expand(self, kind: str, rows, offsets: List[int], now: datetime, horizon: datetime) -> List[Reminder]:
+        # Missed while no worker ran (not just due this second): only the
+        # smallest offset is still worth sending, not one per offset
+        stale = now - timedelta(seconds=self.scan_interval)
+        reminders = []
+        for entity_id, due_at, title, scope_id in rows:
+            if due_at is None or due_at < now or scope_id is None:
+                continue
+            for offset in offsets:
+                reminder = Reminder(kind, entity_id, offset, due_at, title or "", scope_id)
+                if reminder.fire_at >= horizon or (reminder.fire_at < stale and offset != offsets[0]):
+                    continue
+                reminders.append(reminder)
+        return reminders
+
+    async def scan(self, now: datetime) -> List[Reminder]:
+        """Reminders firing before now + lookahead whose start / due time is still ahead."""
+        from app.db.session import AsyncSessionLocal
+
+        horizon = now + self.lookahead
+        reminders: List[Reminder] = []
+        async with AsyncSessionLocal() as db:
+            if self.meeting_offsets:
+                until = horizon + timedelta(minutes=self.meeting_offsets[-1])
+                rows = (
+                    await db.execute(
+                        select(Meeting.meeting_id, Meeting.start_time, Meeting.title, Meeting.team_id)
+                        .where(Meeting.start_time >= now, Meeting.start_time < until)
+                    )
+                ).all()
+                reminders += self._expand(KIND_MEETING, rows, self.meeting_offsets, now, horizon)
+            if self.deadline_offsets:
+                until = horizon + timedelta(minutes=self.deadline_offsets[-1])
+                rows = (
+                    await db.execute(
+                        select(Milestone.milestone_id, Milestone.due_date, Milestone.title, Milestone.class_id)
+                        .where(Milestone.due_date >= now, Milestone.due_date < until)
+                    )
+                ).all()
+                reminders += self._expand(KIND_MILESTONE, rows, self.deadline_offsets, now, horizon)
+                rows = (
+                    await db.execute(
+                        select(Sprint.sprint_id, Sprint.end_date, Sprint.name, Sprint.team_id)
+                        .where(Sprint.end_date >= now.date() - timedelta(days=1), Sprint.end_date <= until.date())
+                    )
+                ).all()
+                reminders += self._expand(
+                    KIND_SPRINT,
+                    [(sprint_id, sprint_due_at(end_date), name, team_id) for sprint_id, end_date, name, team_id in rows],
+                    self.deadline_offsets, now, horizon,
+                )
+        return reminders
+
+    def reschedule(self, reminders: List[Reminder], now: datetime) -> None:
+        """Make the wheel hold exactly the scanned reminders not sent yet."""
+        self._sent = {(key, due_at) for key, due_at in self._sent if due_at >= now}
+        pending = {r.key: r for r in reminders if (r.key, r.due_at) not in self._sent}
+        for key in list(self.wheel.keys() - pending.keys()):
+            self.wheel.cancel(key)
+        for key, reminder in pending.items():
+            self.wheel.schedule(key, reminder.fire_at.timestamp(), reminder)
+
+    async def _recipients(self, db, reminders: List[Reminder]) -> Dict[Tuple[str, int], List]:
+        """(kind, scope_id) -> user ids; one query for teams, one for classes."""
+        recipients: Dict[Tuple[str, int], List] = {}
+        team_ids = {r.scope_id for r in reminders if r.kind != KIND_MILESTONE}
+        class_ids = {r.scope_id for r in reminders if r.kind == KIND_MILESTONE}
+        if team_ids:
+            rows = await db.execute(
+                select(TeamMember.team_id, TeamMember.user_id)
+                .where(TeamMember.team_id.in_(team_ids), TeamMember.is_active == True)
+            )
+            for team_id, user_id in rows:
+                recipients.setdefault(("team", team_id), []).append(user_id)
+        if class_ids:
+            rows = await db.execute(
+                select(Team.class_id, TeamMember.user_id)
+                .join(TeamMember, TeamMember.team_id == Team.team_id)
+                .where(Team.class_id.in_(class_ids), TeamMember.is_active == True)
+                .distinct()
+            )
+            for class_id, user_id in rows:
+                recipients.setdefault(("class", class_id), []).append(user_id)
+        return recipients
+
+    async def fire(self, reminders: List[Reminder]) -> int:
+        """Send a batch of due reminders; returns the notifications written."""
+        from app.db.session import AsyncSessionLocal
+
+        now = datetime.now(timezone.utc)
+        async with AsyncSessionLocal() as db:
+            await db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+            claimed = {
+                tuple(row)
+                for row in await db.execute(
+                    insert(ReminderLog)
+                    .values([
+                        {"kind": r.kind, "entity_id": r.entity_id, "offset_minutes": r.offset_minutes, "due_at": r.due_at}
+                        for r in reminders
+                    ])
+                    .on_conflict_do_nothing()
+                    .returning(ReminderLog.kind, ReminderLog.entity_id, ReminderLog.offset_minutes)
+                )
+            }
+            batch = [r for r in reminders if r.key in claimed]
+
+            notifications = []
+            if batch:
+                recipients = await self._recipients(db, batch)
+                prefs = await notification_preferences.get_many(
+                    db, (user_id for users in recipients.values() for user_id in users)
+                )
+                rows = []
+                for r in batch:
+                    title, content, notification_type = reminder_text(r, now)
+                    scope = ("class" if r.kind == KIND_MILESTONE else "team", r.scope_id)
+                    rows += [
+                        NotificationService._row(
+                            user_id, title, content, notification_type,
+                            related_entity_type=r.kind, related_entity_id=r.entity_id,
+                        )
+                        for user_id in dict.fromkeys(recipients.get(scope, ()))
+                        if prefs[user_id].allows(TYPE_BITS[notification_type])
+                    ]
+                if rows:
+                    notifications = await NotificationService._upsert(db, rows)
+                    await NotificationService._push(db, [
+                        (n, NotificationService._payload(n, _LINKS[n.related_entity_type].format(n.related_entity_id)))
+                        for n in notifications
+                    ])
+            await db.commit()
+
+        # Claimed here or by another worker: either way it is sent
+        self._sent.update((r.key, r.due_at) for r in reminders)
+        self.batches += 1
+        self.fired += len(batch)
+        self.notifications += len(notifications)
+        return len(notifications)
+
+    async def purge(self, days: int = 30) -> None:
+        """Drop reminder_log rows whose due time is long past."""
+        from app.db.session import AsyncSessionLocal
+
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                delete(ReminderLog).where(ReminderLog.due_at < datetime.now(timezone.utc) - timedelta(days=days))
+            )
+            await db.commit()
+
+    async def run(self) -> None:
+        """Scan / fire loop."""
+        next_scan = next_purge = time.monotonic()
+        while True:
+            if time.monotonic() >= next_scan:
+                next_scan = time.monotonic() + self.scan_interval
+                started = time.perf_counter()
+                now = datetime.now(timezone.utc)
+                try:
+                    reminders = await self.scan(now)
+                    self.reschedule(reminders, now)
+                    self.scans += 1
+                    self.last_scan_rows = len(reminders)
+                    self.last_scan_ms = round((time.perf_counter() - started) * 1000, 1)
+                except Exception as e:
+                    logger.error(f"Reminder scan failed: {e}")
+            if time.monotonic() >= next_purge:
+                next_purge = time.monotonic() + 3600
+                try:
+                    await self.purge()
+                except Exception as e:
+                    logger.error(f"Reminder log purge failed: {e}")
+
+            due = self.wheel.advance()
+            if due:
+                try:
+                    await self.fire(due)
+                except Exception as e:
+                    # Not marked sent: the next scan schedules them again
+                    logger.error(f"Sending {len(due)} reminders failed: {e}")
+            await asyncio.sleep(self.wheel.tick)
+
+    def stats(self) -> dict:
+        return {
+            "scheduled": len(self.wheel),
+            "scans": self.scans,
+            "last_scan_reminders": self.last_scan_rows,
+            "last_scan_ms": self.last_scan_ms,
+            "batches": self.batches,
+            "fired": self.fired,
+            "notifications": self.notifications,
+        }
+
+
+# Export singleton
+reminder_scheduler = ReminderScheduler()
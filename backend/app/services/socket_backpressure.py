@@ -0,0 +1,193 @@
+"""
+Socket Backpressure
+Giới hạn hàng đợi gửi của từng connection, xử lý client chậm
+
+Every packet for a socket goes into its Engine.IO outbound queue, which is
+unbounded: a slow client (mobile on a bad network) in a busy room keeps
+accumulating packets in memory, and bursts of typing / presence updates sit
+in front of the messages it actually needs.
+
+BackpressureServer looks at that queue depth on every send:
+
+- below SOCKETIO_OUTBOUND_SOFT_LIMIT: send as usual
+- at or above it, the socket is degraded:
+    * droppable events (typing indicators) are not queued
+    * mergeable events (presence_diff) are folded into one pending update per
+      key and sent once the queue has drained below the soft limit
+    * everything else (messages, tasks, notifications) is still queued
+- at SOCKETIO_OUTBOUND_MAX_QUEUE, or after SOCKETIO_SLOW_CONSUMER_SECONDS
+  degraded, the socket is disconnected and its backlog discarded; the client
+  reconnects and catches up with "resume" (see socket_resume)
+
+No send ever waits for a client, so emits from request handlers cost the
+same whatever the slowest socket in the room is doing. Only degraded
+sockets pay for classifying packets, once per emit.
+"""
+
+import asyncio
+import logging
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import socketio
+from socketio import packet
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Non-critical events, dropped for degraded sockets
+DROPPABLE_EVENTS = frozenset({'users_typing', 'user_typing'})
+
+
+def _merge_presence_diff(pending: dict, new: dict) -> dict:
+    online, offline = set(pending['online']), set(pending['offline'])
+    online = (online - set(new['offline'])) | set(new['online'])
+    offline = (offline - set(new['online'])) | set(new['offline'])
+    return {**new, 'online': sorted(online), 'offline': sorted(offline)}
+
+
+# event -> (merge key from payload, merge(pending, new) -> pending)
+MERGEABLE_EVENTS: Dict[str, Tuple[Callable[[dict], Any], Callable[[dict, dict], dict]]] = {
+    'presence_diff': (lambda data: data.get('team_id'), _merge_presence_diff),
+}
+
+# (namespace, event, key) -> payload
+PendingUpdates = Dict[Tuple[str, str, Any], dict]
+
+
+class BackpressureServer(socketio.AsyncServer):
+    """AsyncServer with bounded, policy-driven per-connection outbound queues"""
+
+    def __init__(
+        self,
+        *args,
+        soft_limit: int = settings.SOCKETIO_OUTBOUND_SOFT_LIMIT,
+        max_queue: int = settings.SOCKETIO_OUTBOUND_MAX_QUEUE,
+        slow_consumer_seconds: float = settings.SOCKETIO_SLOW_CONSUMER_SECONDS,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.soft_limit = soft_limit
+        self.max_queue = max_queue
+        self.slow_consumer_seconds = slow_consumer_seconds
+        # eio_sid -> monotonic time the socket became degraded
+        self._degraded_since: Dict[str, float] = {}
+        # eio_sid -> merged updates waiting for the queue to drain
+        self._pending: Dict[str, PendingUpdates] = {}
+
+        self.dropped: Counter = Counter()
+        self.merged: Counter = Counter()
+        self.pending_flushed = 0
+        self.slow_disconnects = 0
+
+    def _queue_depth(self, eio_sid: str) -> Optional[int]:
+        socket = self.eio.sockets.get(eio_sid)
+        if socket is None or socket.closed:
+            return None
+        return socket.queue.qsize()
+
+    def _classify(self, eio_pkt) -> Tuple[Optional[str], str, Any]:
+        """(event, namespace, data) of an outgoing packet, decoded once per emit."""
+        cached = getattr(eio_pkt, '_outbound_event', None)
+        if cached is None:
+            cached = (None, '/', None)
+            if isinstance(eio_pkt.data, (str, bytes)):
+                try:
+                    pkt = self.packet_class(encoded_packet=eio_pkt.data)
+                    if pkt.packet_type == packet.EVENT and pkt.data:
+                        cached = (pkt.data[0], pkt.namespace or '/', pkt.data[1] if len(pkt.data) > 1 else None)
+                except Exception:
+                    pass
+            eio_pkt._outbound_event = cached
+        return cached
+
+    async def _send_eio_packet(self, eio_sid, eio_pkt):
+        depth = self._queue_depth(eio_sid)
+        if depth is None:
+            return await super()._send_eio_packet(eio_sid, eio_pkt)
+
+        if depth < self.soft_limit:
+            self._degraded_since.pop(eio_sid, None)
+            if eio_sid in self._pending:
+                await self._flush_pending(eio_sid)
+            return await super()._send_eio_packet(eio_sid, eio_pkt)
+
+        now = time.monotonic()
+        degraded_since = self._degraded_since.setdefault(eio_sid, now)
+        if depth >= self.max_queue or now - degraded_since >= self.slow_consumer_seconds:
+            await self._disconnect_slow(eio_sid, depth)
+            return
+
+        event, namespace, data = self._classify(eio_pkt)
+        if event in DROPPABLE_EVENTS:
+            self.dropped[event] += 1
+            return
+        if event in MERGEABLE_EVENTS and isinstance(data, dict):
+            key_of, merge = MERGEABLE_EVENTS[event]
+            pending = self._pending.setdefault(eio_sid, {})
+            slot = (namespace, event, key_of(data))
+            pending[slot] = merge(pending[slot], data) if slot in pending else data
+            self.merged[event] += 1
+            return
+        await super()._send_eio_packet(eio_sid, eio_pkt)
+
+    async def _flush_pending(self, eio_sid: str) -> None:
+        for (namespace, event, _), data in self._pending.pop(eio_sid, {}).items():
+            await self._send_packet(eio_sid, self.packet_class(packet.EVENT, namespace=namespace, data=[event, data]))
+            self.pending_flushed += 1
+
+    async def _disconnect_slow(self, eio_sid: str, depth: int) -> None:
+        socket = self.eio.sockets.get(eio_sid)
+        self._degraded_since.pop(eio_sid, None)
+        self._pending.pop(eio_sid, None)
+        if socket is None or socket.closed or socket.closing:
+            return
+        self.slow_disconnects += 1
+        logger.warning(f"Disconnecting slow consumer {eio_sid} ({depth} packets queued)")
+        # Discard the backlog instead of waiting for it to drain
+        while not socket.queue.empty():
+            socket.queue.get_nowait()
+            socket.queue.task_done()
+        await socket.close(wait=False, abort=True)
+        socket.queue.put_nowait(None)  # let the writer task exit
+
+    async def sweep(self) -> None:
+        """Flush merged updates of recovered sockets, drop state of closed ones."""
+        for eio_sid in list(self._pending.keys() | self._degraded_since.keys()):
+            depth = self._queue_depth(eio_sid)
+            if depth is None:
+                self._pending.pop(eio_sid, None)
+                self._degraded_since.pop(eio_sid, None)
+            elif depth < self.soft_limit:
+                self._degraded_since.pop(eio_sid, None)
+                if eio_sid in self._pending:
+                    await self._flush_pending(eio_sid)
+            elif time.monotonic() - self._degraded_since.setdefault(eio_sid, time.monotonic()) >= self.slow_consumer_seconds:
+                await self._disconnect_slow(eio_sid, depth)
+
+    async def run_backpressure(self, interval: float = 1.0) -> None:
+        """Sweep loop (started from app startup)."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.error(f"Backpressure sweep failed: {e}")
+
+    def backpressure_stats(self) -> dict:
+        depths = [s.queue.qsize() for s in list(self.eio.sockets.values()) if not s.closed]
+        return {
+            "soft_limit": self.soft_limit,
+            "max_queue": self.max_queue,
+            "sockets": len(depths),
+            "queued_packets": sum(depths),
+            "max_queue_depth": max(depths, default=0),
+            "degraded_sockets": len(self._degraded_since),
+            "pending_merged_updates": sum(len(p) for p in self._pending.values()),
+            "dropped": dict(self.dropped),
+            "merged": dict(self.merged),
+            "pending_flushed": self.pending_flushed,
+            "slow_consumer_disconnects": self.slow_disconnects,
+        }
@@ -0,0 +1,213 @@
+"""
+Socket.IO Cluster Support
+Chạy Socket.IO trên nhiều worker / nhiều node
+
+Two pieces let realtime traffic scale past one uvicorn worker:
+
+1. Client manager (settings.SOCKETIO_MANAGER): every emit / enter_room /
+   leave_room is published so the worker that owns the target socket
+   delivers it.
+   - "local":  in-process manager, single worker only
+   - "redis":  AsyncRedisManager over SOCKETIO_REDIS_URL (or REDIS_URL)
+   - "memory": InMemoryPubSubManager, an in-process stand-in for tests that
+               run several AsyncServer instances in one process
+
+2. Connection registry: which user owns which socket, across workers
+   (send_notification, online users). Redis-backed with the "redis"
+   manager, in-process otherwise.
+
+With polling transport, multi-worker deployments also need sticky sessions
+at the load balancer (or clients restricted to the websocket transport).
+"""
+
+import asyncio
+import logging
+import pickle
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Set
+
+import socketio
+from socketio.async_pubsub_manager import AsyncPubSubManager
+
+from app.core.config import settings
+from app.services.socket_rooms import IndexedRoomsMixin
+
+logger = logging.getLogger(__name__)
+
+
+class LocalManager(IndexedRoomsMixin, socketio.AsyncManager):
+    """Single-worker manager (python-socketio default + room index)."""
+
+
+class RedisManager(IndexedRoomsMixin, socketio.AsyncRedisManager):
+    """AsyncRedisManager + room index."""
+
+
+class InMemoryPubSubManager(IndexedRoomsMixin, AsyncPubSubManager):
+    """
+    Pub/sub client manager backed by in-process queues.
+
+    Every instance on the same channel receives what the others publish,
+    like separate workers sharing a Redis channel. Messages are pickled on
+    publish so payloads that would not survive Redis fail here too.
+    """
+
+    name = "memory"
+
+    # channel -> queues of the subscribed managers
+    _subscribers: Dict[str, List[asyncio.Queue]] = defaultdict(list)
+
+    async def _publish(self, data):
+        for queue in list(self._subscribers[self.channel]):
+            queue.put_nowait(pickle.dumps(data))
+
+    async def _listen(self):
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers[self.channel].append(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._subscribers[self.channel].remove(queue)
+
+
+def create_client_manager(write_only: bool = False) -> socketio.AsyncManager:
+    """
+    Client manager selected by settings.SOCKETIO_MANAGER.
+
+    Args:
+        write_only: for processes that only emit (scripts, background jobs)
+            and never serve socket connections
+    """
+    kind = settings.SOCKETIO_MANAGER.lower()
+    if kind == "redis":
+        url = settings.SOCKETIO_REDIS_URL or settings.REDIS_URL
+        return RedisManager(url, channel=settings.SOCKETIO_CHANNEL, write_only=write_only)
+    if kind == "memory":
+        return InMemoryPubSubManager(channel=settings.SOCKETIO_CHANNEL, write_only=write_only)
+    if kind != "local":
+        raise ValueError(f"Unknown SOCKETIO_MANAGER: {settings.SOCKETIO_MANAGER}")
+    return LocalManager()
+
+
+class MemoryConnectionRegistry:
+    """user_id <-> sid registry of one process (single worker, tests)."""
+
+    def __init__(self):
+        self._user_sids: Dict[str, Set[str]] = {}
+
+    async def add(self, sid: str, user_id: str) -> None:
+        self._user_sids.setdefault(user_id, set()).add(sid)
+
+    async def remove(self, sid: str, user_id: str) -> None:
+        sids = self._user_sids.get(user_id)
+        if sids is not None:
+            sids.discard(sid)
+            if not sids:
+                del self._user_sids[user_id]
+
+    async def user_sids(self, user_id: str) -> Set[str]:
+        return set(self._user_sids.get(user_id, ()))
+
+    async def is_online(self, user_id: str) -> bool:
+        return bool(self._user_sids.get(user_id))
+
+    async def online_among(self, user_ids: List[str]) -> Set[str]:
+        return {user_id for user_id in user_ids if self._user_sids.get(user_id)}
+
+    async def online_users(self) -> List[str]:
+        return list(self._user_sids)
+
+    async def close(self) -> None:
+        pass
+
+
+class RedisConnectionRegistry:
+    """
+    user_id <-> sid registry shared by all workers.
+
+    Keys:
+        sio:user:<user_id>  set of sids of the user (any worker)
+        sio:online          set of user_ids with at least one socket
+        sio:host:<host_id>  hash sid -> user_id of this worker, used to clean
+                            up on shutdown
+    """
+
+    _PREFIX = "sio:"
+
+    # Drop the sid and, atomically, the user from the online set when it was
+    # their last socket (a concurrent connect on another worker cannot be lost)
+    _REMOVE_SCRIPT = """
+    redis.call('SREM', KEYS[1], ARGV[1])
+    redis.call('HDEL', KEYS[3], ARGV[1])
+    if redis.call('SCARD', KEYS[1]) == 0 then
+        redis.call('SREM', KEYS[2], ARGV[2])
+    end
+    return 1
+    """
+
+    def __init__(self, url: str, host_id: str):
+        from redis import asyncio as aioredis
+
+        self._redis = aioredis.from_url(url, decode_responses=True)
+        self._remove = self._redis.register_script(self._REMOVE_SCRIPT)
+        self.host_id = host_id
+
+    def _user_key(self, user_id: str) -> str:
+        return f"{self._PREFIX}user:{user_id}"
+
+    @property
+    def _online_key(self) -> str:
+        return f"{self._PREFIX}online"
+
+    @property
+    def _host_key(self) -> str:
+        return f"{self._PREFIX}host:{self.host_id}"
+
+    async def add(self, sid: str, user_id: str) -> None:
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.sadd(self._user_key(user_id), sid)
+            pipe.sadd(self._online_key, user_id)
+            pipe.hset(self._host_key, sid, user_id)
+            await pipe.execute()
+
+    async def remove(self, sid: str, user_id: str) -> None:
+        await self._remove(
+            keys=[self._user_key(user_id), self._online_key, self._host_key],
+            args=[sid, user_id],
+        )
+
+    async def user_sids(self, user_id: str) -> Set[str]:
+        return set(await self._redis.smembers(self._user_key(user_id)))
+
+    async def is_online(self, user_id: str) -> bool:
+        return bool(await self._redis.sismember(self._online_key, user_id))
+
+    async def online_among(self, user_ids: List[str]) -> Set[str]:
+        """Which of these users are online: one SMISMEMBER round trip."""
+        if not user_ids:
+            return set()
+        flags = await self._redis.smismember(self._online_key, user_ids)
+        return {user_id for user_id, flag in zip(user_ids, flags) if flag}
+
+    async def online_users(self) -> List[str]:
+        return list(await self._redis.smembers(self._online_key))
+
+    async def close(self) -> None:
+        """Forget the sockets of this worker (they die with it)."""
+        try:
+            for sid, user_id in (await self._redis.hgetall(self._host_key)).items():
+                await self.remove(sid, user_id)
+            await self._redis.delete(self._host_key)
+        except Exception as e:
+            logger.error(f"Socket registry cleanup failed: {e}")
+        await self._redis.aclose()
+
+
+def create_connection_registry(client_manager: socketio.AsyncManager):
+    """Registry matching the client manager: Redis when clustered over Redis."""
+    if settings.SOCKETIO_MANAGER.lower() == "redis":
+        host_id = getattr(client_manager, "host_id", None) or uuid.uuid4().hex
+        return RedisConnectionRegistry(settings.SOCKETIO_REDIS_URL or settings.REDIS_URL, host_id)
+    return MemoryConnectionRegistry()
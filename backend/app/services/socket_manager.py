@@ -7,19 +7,34 @@ Created: Feb 2026
 """
 
 import socketio
-from typing import Dict, Set, Optional
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 from uuid import UUID
 import json
 import logging
 
 from app.core.config import settings
+from app.services.presence_service import presence_service
+from app.services.socket_backpressure import BackpressureServer
+from app.services.socket_cluster import create_client_manager, create_connection_registry
+from app.services.socket_resume import envelope, event_log, events_from_db, now_ts
+from app.services.socket_rooms import RoomIndex
+from app.services.socket_serializer import create_serializer
+from app.services.typing_aggregator import typing_aggregator
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 # Create Socket.IO server với async mode
-sio = socketio.AsyncServer(
+# client_manager: pub/sub between workers (settings.SOCKETIO_MANAGER)
+# serializer: JSON or MessagePack packets (settings.SOCKETIO_SERIALIZER)
+client_manager = create_client_manager()
+serializer, serializer_json = create_serializer(settings.SOCKETIO_SERIALIZER)
+# BackpressureServer: bounded per-connection outbound queues (settings.SOCKETIO_OUTBOUND_*)
+sio = BackpressureServer(
     async_mode='asgi',
+    client_manager=client_manager,
+    serializer=serializer,
+    json=serializer_json,
     cors_allowed_origins=settings.cors_origins_list,
     logger=True,
     engineio_logger=False
@@ -29,18 +44,41 @@ sio = socketio.AsyncServer(
 socket_app = socketio.ASGIApp(sio)
 
 
+def user_room(user_id) -> str:
+    """Room every socket of a user joins on connect."""
+    return f"user_{user_id}"
+
+
 class ConnectionManager:
-    """Quản lý connections và rooms cho Socket.IO"""
+    """
+    Quản lý connections và rooms cho Socket.IO
+
+    The dicts below only track sockets connected to this worker. Questions
+    about users across all workers (their sockets, who is online) go
+    through the connection registry.
+    """
     
     def __init__(self):
         # user_id -> set of socket ids (một user có thể có nhiều connections)
         self.user_connections: Dict[str, Set[str]] = {}
         # socket_id -> user_id
         self.socket_to_user: Dict[str, str] = {}
-        # channel_id -> set of socket ids
-        self.channel_rooms: Dict[int, Set[str]] = {}
-        # team_id -> set of socket ids
-        self.team_rooms: Dict[int, Set[str]] = {}
+        # Cluster-wide user_id <-> sid registry
+        self.registry = create_connection_registry(client_manager)
+        # channel_id <-> socket ids (with the reverse sid -> channels index)
+        self.channels: RoomIndex[int] = RoomIndex()
+        # team_id <-> socket ids
+        self.teams: RoomIndex[int] = RoomIndex()
+
+    @property
+    def channel_rooms(self) -> Dict[int, Set[str]]:
+        """channel_id -> set of socket ids"""
+        return self.channels.rooms
+
+    @property
+    def team_rooms(self) -> Dict[int, Set[str]]:
+        """team_id -> set of socket ids"""
+        return self.teams.rooms
     
     async def connect(self, sid: str, user_id: str):
         """Register a new connection"""
@@ -48,6 +86,11 @@ class ConnectionManager:
             self.user_connections[user_id] = set()
         self.user_connections[user_id].add(sid)
         self.socket_to_user[sid] = user_id
+        await self.registry.add(sid, user_id)
+        # Personal room: notifications are one emit per user, on any worker
+        await sio.enter_room(sid, user_room(user_id))
+        if len(self.user_connections[user_id]) == 1:
+            presence_service.user_connected(user_id, await _user_team_ids(user_id))
         logger.info(f"User {user_id} connected with socket {sid}")
     
     async def disconnect(self, sid: str):
@@ -57,64 +100,73 @@ class ConnectionManager:
             self.user_connections[user_id].discard(sid)
             if not self.user_connections[user_id]:
                 del self.user_connections[user_id]
+        presence_service.forget_socket(sid)
+        if user_id:
+            await self.registry.remove(sid, user_id)
+            if user_id not in self.user_connections:
+                # Offline for the team only if no other worker has a socket of the user
+                presence_service.user_disconnected(user_id, announce=not await self.registry.is_online(user_id))
         
-        # Remove from all channel rooms
-        for channel_id, sockets in list(self.channel_rooms.items()):
-            sockets.discard(sid)
-            if not sockets:
-                del self.channel_rooms[channel_id]
-        
-        # Remove from all team rooms
-        for team_id, sockets in list(self.team_rooms.items()):
-            sockets.discard(sid)
-            if not sockets:
-                del self.team_rooms[team_id]
+        # Remove from the rooms this socket joined (reverse index, no scan)
+        self.channels.remove_sid(sid)
+        self.teams.remove_sid(sid)
         
         logger.info(f"Socket {sid} disconnected")
     
     async def join_channel(self, sid: str, channel_id: int):
         """Join a channel room"""
-        if channel_id not in self.channel_rooms:
-            self.channel_rooms[channel_id] = set()
-        self.channel_rooms[channel_id].add(sid)
+        self.channels.add(sid, channel_id)
         await sio.enter_room(sid, f"channel_{channel_id}")
         logger.info(f"Socket {sid} joined channel_{channel_id}")
     
     async def leave_channel(self, sid: str, channel_id: int):
         """Leave a channel room"""
-        if channel_id in self.channel_rooms:
-            self.channel_rooms[channel_id].discard(sid)
+        self.channels.discard(sid, channel_id)
         await sio.leave_room(sid, f"channel_{channel_id}")
         logger.info(f"Socket {sid} left channel_{channel_id}")
     
     async def join_team(self, sid: str, team_id: int):
         """Join a team room"""
-        if team_id not in self.team_rooms:
-            self.team_rooms[team_id] = set()
-        self.team_rooms[team_id].add(sid)
+        self.teams.add(sid, team_id)
         await sio.enter_room(sid, f"team_{team_id}")
         logger.info(f"Socket {sid} joined team_{team_id}")
     
     async def leave_team(self, sid: str, team_id: int):
         """Leave a team room"""
-        if team_id in self.team_rooms:
-            self.team_rooms[team_id].discard(sid)
+        self.teams.discard(sid, team_id)
         await sio.leave_room(sid, f"team_{team_id}")
         logger.info(f"Socket {sid} left team_{team_id}")
     
-    def get_user_sockets(self, user_id: str) -> Set[str]:
-        """Get all socket ids for a user"""
-        return self.user_connections.get(user_id, set())
+    async def get_user_sockets(self, user_id: str) -> Set[str]:
+        """Get all socket ids for a user (on any worker)"""
+        return await self.registry.user_sids(user_id)
     
-    def is_user_online(self, user_id: str) -> bool:
-        """Check if user has any active connections"""
-        return user_id in self.user_connections and len(self.user_connections[user_id]) > 0
+    async def is_user_online(self, user_id: str) -> bool:
+        """Check if user has any active connections (on any worker)"""
+        return await self.registry.is_online(user_id)
+
+    async def close(self):
+        """Drop this worker's sockets from the registry (app shutdown)"""
+        await self.registry.close()
 
 
 # Global connection manager instance
 manager = ConnectionManager()
 
 
+async def _user_team_ids(user_id: str) -> Set[int]:
+    """Teams whose room gets the user's presence diffs."""
+    from app.db.session import AsyncSessionLocal
+    from app.services.membership_service import membership_service
+
+    try:
+        async with AsyncSessionLocal() as db:
+            return set(await membership_service.team_ids(db, user_id))
+    except Exception as e:
+        logger.error(f"Presence: could not load teams of {user_id}: {e}")
+        return set()
+
+
 # ============ SOCKET.IO EVENT HANDLERS ============
 
 @sio.event
@@ -122,6 +174,10 @@ async def connect(sid, environ, auth):
     """
     Handle new socket connection.
     Expects auth = {"token": "jwt_token"}
+
+    Any access token works, including ones minted by POST /auth/refresh.
+    An expired token is refused with {"reason": "token_expired"} so the
+    client can refresh and reconnect instead of sending the password again.
     """
     logger.info(f"New connection attempt: {sid}")
     
@@ -135,13 +191,18 @@ async def connect(sid, environ, auth):
         return False  # Reject connection
     
     # Validate JWT token (import here to avoid circular imports)
+    from jose import jwt
+    from app.core.security import decode_access_token
+    try:
+        payload = decode_access_token(token)
+    except jwt.ExpiredSignatureError:
+        logger.info(f"Connection rejected - token expired: {sid}")
+        raise socketio.exceptions.ConnectionRefusedError({"reason": "token_expired"})
+    except jwt.JWTError:
+        logger.warning(f"Connection rejected - invalid token: {sid}")
+        return False
+
     try:
-        from app.core.security import verify_token
-        payload = verify_token(token)
-        if not payload:
-            logger.warning(f"Connection rejected - invalid token: {sid}")
-            return False
-        
         user_id = payload.get("sub")
         if not user_id:
             return False
@@ -168,14 +229,48 @@ async def disconnect(sid):
     await manager.disconnect(sid)
 
 
+async def _can_join(sid: str, channel_id: Optional[int] = None, team_id: Optional[int] = None) -> bool:
+    """
+    Room join check: team members, plus admins / lecturers (role 1, 4) who
+    follow teams they supervise. Membership is cached, so the common case
+    opens no DB connection.
+    """
+    user_id = manager.socket_to_user.get(sid)
+    if not user_id:
+        return False
+    # Import here to avoid circular imports
+    from app.db.session import AsyncSessionLocal
+    from app.models.all_models import User
+    from app.services.membership_service import membership_service
+    from app.services.principal_cache import principal_cache
+    try:
+        async with AsyncSessionLocal() as db:
+            if channel_id is not None:
+                team_id = await membership_service.channel_team_id(db, int(channel_id))
+                if team_id is None:
+                    return False
+            if await membership_service.is_member(db, user_id, int(team_id)):
+                return True
+            user = await principal_cache.get_user(db, user_id) or await db.get(User, UUID(user_id))
+            return user is not None and user.role_id in (1, 4)
+    except (TypeError, ValueError):
+        return False
+
+
 @sio.event
 async def join_channel(sid, data):
     """
-    Join a channel room.
+    Join a channel room (team members only, otherwise "join_rejected").
     data = {"channel_id": 123}
     """
     channel_id = data.get('channel_id')
     if channel_id:
+        if not await _can_join(sid, channel_id=channel_id):
+            await sio.emit('join_rejected', {
+                'channel_id': channel_id,
+                'message': 'You are not a member of this team'
+            }, room=sid)
+            return
         await manager.join_channel(sid, channel_id)
         await sio.emit('joined_channel', {
             'channel_id': channel_id,
@@ -197,17 +292,32 @@ async def leave_channel(sid, data):
 @sio.event
 async def join_team(sid, data):
     """
-    Join a team room for team-wide updates.
+    Join a team room for team-wide updates (members only, otherwise "join_rejected").
     data = {"team_id": 123}
     """
     team_id = data.get('team_id')
     if team_id:
+        if not await _can_join(sid, team_id=team_id):
+            await sio.emit('join_rejected', {
+                'team_id': team_id,
+                'message': 'You are not a member of this team'
+            }, room=sid)
+            return
         await manager.join_team(sid, team_id)
         await sio.emit('joined_team', {
             'team_id': team_id,
             'message': f'Joined team {team_id}'
         }, room=sid)
 
+        # Seed the client's online set; presence_diff keeps it current
+        from app.db.session import AsyncSessionLocal
+        async with AsyncSessionLocal() as db:
+            members = await team_presence(db, team_id)
+        await sio.emit('presence_snapshot', {
+            'team_id': team_id,
+            'online': [m['user_id'] for m in members if m['online']],
+        }, room=sid)
+
 
 @sio.event
 async def leave_team(sid, data):
@@ -220,21 +330,89 @@ async def leave_team(sid, data):
         await manager.leave_team(sid, team_id)
 
 
+@sio.event
+async def heartbeat(sid, data=None):
+    """
+    Presence heartbeat, every PRESENCE_TIMEOUT_SECONDS / 3 or so.
+    Once a socket has sent one it is disconnected after
+    PRESENCE_TIMEOUT_SECONDS without another.
+    """
+    user_id = manager.socket_to_user.get(sid)
+    if user_id:
+        presence_service.beat(sid, user_id)
+    return {'timeout_s': settings.PRESENCE_TIMEOUT_SECONDS}
+
+
 @sio.event
 async def typing(sid, data):
     """
-    Broadcast typing indicator.
+    Typing indicator.
     data = {"channel_id": 123}
+
+    Not re-broadcast per keystroke: typing_aggregator sends one coalesced
+    users_typing update per channel per interval.
     """
     channel_id = data.get('channel_id')
     user_id = manager.socket_to_user.get(sid)
     
+    # Only sockets that joined the channel room (membership checked on join)
+    if channel_id and user_id and channel_id in manager.channels.rooms_of(sid):
+        typing_aggregator.touch(channel_id, user_id, sid)
+
+
+@sio.event
+async def stop_typing(sid, data):
+    """
+    User cleared the input or left the channel.
+    data = {"channel_id": 123}
+    """
+    channel_id = data.get('channel_id')
+    user_id = manager.socket_to_user.get(sid)
     if channel_id and user_id:
-        # Broadcast to channel except sender
-        await sio.emit('user_typing', {
-            'channel_id': channel_id,
-            'user_id': user_id
-        }, room=f"channel_{channel_id}", skip_sid=sid)
+        typing_aggregator.stop(channel_id, user_id)
+
+
+@sio.event
+async def resume(sid, data):
+    """
+    Replay events missed while disconnected (call after re-joining rooms).
+    data = {"rooms": [{"room": "channel_5", "epoch": "9f2c61ab", "seq": 42, "ts": 1718000000.5}, ...]}
+    (room/epoch/seq/ts of the last event received in each room; for user
+    rooms, which are not sequenced, only room and ts)
+
+    Missed events are emitted to this socket only, in order, with their
+    original envelope. Returns (ack) per room:
+        {"status": "buffer" | "db" | "reset" | "not_joined", "replayed": n, "seq": head, "epoch": epoch}
+    "reset": the gap can no longer be replayed, refetch through the REST API.
+    """
+    joined = set(sio.rooms(sid))
+    results = {}
+    for cursor in (data or {}).get('rooms', [])[:100]:
+        room = str(cursor.get('room', ''))
+        if room not in joined:
+            results[room] = {'status': 'not_joined', 'replayed': 0}
+            continue
+
+        try:
+            entries, head, epoch = await event_log.since(room, cursor.get('epoch'), int(cursor.get('seq') or 0))
+            if entries is not None:
+                for seq, event, payload, ts in entries:
+                    await sio.emit(event, envelope(payload, room, seq, epoch, ts), to=sid)
+                results[room] = {'status': 'buffer', 'replayed': len(entries), 'seq': head, 'epoch': epoch}
+                continue
+
+            events = await events_from_db(room, cursor.get('ts'))
+            if events is None:
+                results[room] = {'status': 'reset', 'replayed': 0, 'seq': head, 'epoch': epoch}
+                continue
+            for event, payload in events:
+                await sio.emit(event, payload, to=sid)
+            results[room] = {'status': 'db', 'replayed': len(events), 'seq': head, 'epoch': epoch}
+        except Exception as e:
+            logger.error(f"Resume failed for {room}: {e}")
+            results[room] = {'status': 'reset', 'replayed': 0}
+
+    return {'rooms': results}
 
 
 @sio.event
@@ -253,34 +431,55 @@ async def new_message(sid, data):
 
 # ============ BROADCAST FUNCTIONS (called from API endpoints) ============
 
+async def emit_sequenced(event: str, payload: dict, room: str):
+    """
+    Emit a room event that a reconnecting client can have replayed.
+
+    The event is appended to the room's event log and sent with its
+    room/seq/epoch/ts envelope (see socket_resume). payload must be JSON-safe.
+    """
+    ts = now_ts()
+    try:
+        seq, epoch = await event_log.append(room, event, payload, ts)
+    except Exception as e:
+        # Log unavailable: deliver live anyway, resume will fall back
+        logger.error(f"Event log append failed for {room}: {e}")
+        await sio.emit(event, payload, room=room)
+        return
+    await sio.emit(event, envelope(payload, room, seq, epoch, ts), room=room)
+
+
 async def broadcast_message(channel_id: int, message_data: dict):
     """
     Broadcast a new message to all users in a channel.
     Called from messages API after saving message to DB.
     """
-    await sio.emit('message_received', {
+    # Sending a message ends the sender's typing state
+    if message_data.get('sender_id') is not None:
+        typing_aggregator.stop(channel_id, str(message_data['sender_id']))
+    await emit_sequenced('message_received', {
         'type': 'message:new',
         'channel_id': channel_id,
         'message': message_data
-    }, room=f"channel_{channel_id}")
+    }, f"channel_{channel_id}")
 
 
 async def broadcast_message_updated(channel_id: int, message_data: dict):
     """Broadcast when a message is edited"""
-    await sio.emit('message_updated', {
+    await emit_sequenced('message_updated', {
         'type': 'message:updated',
         'channel_id': channel_id,
         'message': message_data
-    }, room=f"channel_{channel_id}")
+    }, f"channel_{channel_id}")
 
 
 async def broadcast_message_deleted(channel_id: int, message_id: int):
     """Broadcast when a message is deleted"""
-    await sio.emit('message_deleted', {
+    await emit_sequenced('message_deleted', {
         'type': 'message:deleted',
         'channel_id': channel_id,
         'message_id': message_id
-    }, room=f"channel_{channel_id}")
+    }, f"channel_{channel_id}")
 
 
 async def broadcast_task_update(team_id: int, task_data: dict):
@@ -288,60 +487,109 @@ async def broadcast_task_update(team_id: int, task_data: dict):
     Broadcast task status change to team.
     Called from tasks API after updating task.
     """
-    await sio.emit('task_updated', {
+    await emit_sequenced('task_updated', {
         'type': 'task:updated',
         'team_id': team_id,
         'task': task_data
-    }, room=f"team_{team_id}")
+    }, f"team_{team_id}")
 
 
 async def broadcast_team_member_joined(team_id: int, member_data: dict):
     """Broadcast when new member joins team"""
-    await sio.emit('team_member_joined', {
+    await emit_sequenced('team_member_joined', {
         'type': 'team:member_joined',
         'team_id': team_id,
         'member': member_data
-    }, room=f"team_{team_id}")
+    }, f"team_{team_id}")
 
 
 async def broadcast_team_member_left(team_id: int, user_id: str):
     """Broadcast when member leaves team"""
-    await sio.emit('team_member_left', {
+    await emit_sequenced('team_member_left', {
         'type': 'team:member_left',
         'team_id': team_id,
         'user_id': user_id
-    }, room=f"team_{team_id}")
+    }, f"team_{team_id}")
 
 
 async def send_notification(user_id: str, notification_data: dict):
     """
-    Send notification to specific user.
+    Send notification to specific user (all their sockets, one emit).
     Called from notification service.
     """
-    sockets = manager.get_user_sockets(user_id)
-    for sid in sockets:
+    await sio.emit('notification', {
+        'type': 'notification:new',
+        'notification': notification_data
+    }, room=user_room(user_id))
+
+
+async def send_notifications(deliveries: Iterable[Tuple[Any, dict]]) -> int:
+    """
+    Push many notifications in one pass.
+
+    Args:
+        deliveries: (user_id, notification_data) pairs. Each one is a single
+            emit to the user's room, however many sockets the user has;
+            payloads are per user (own notification_id, count) and are not
+            shared between recipients.
+
+    Returns:
+        Number of emits
+    """
+    emits = 0
+    for user_id, notification_data in deliveries:
         await sio.emit('notification', {
             'type': 'notification:new',
             'notification': notification_data
-        }, room=sid)
+        }, room=user_room(user_id))
+        emits += 1
+    return emits
 
 
 async def broadcast_meeting_started(team_id: int, meeting_data: dict):
     """Broadcast when a meeting starts"""
-    await sio.emit('meeting_started', {
+    await emit_sequenced('meeting_started', {
         'type': 'meeting:started',
         'team_id': team_id,
         'meeting': meeting_data
-    }, room=f"team_{team_id}")
+    }, f"team_{team_id}")
 
 
 # ============ UTILITY FUNCTIONS ============
 
-def get_online_users() -> list:
-    """Get list of online user IDs"""
-    return list(manager.user_connections.keys())
+async def get_online_users() -> list:
+    """Get list of online user IDs (all workers)"""
+    return await manager.registry.online_users()
+
 
+async def is_user_online(user_id: str) -> bool:
+    """Check if a user is currently online (any worker)"""
+    return await manager.is_user_online(user_id)
 
-def is_user_online(user_id: str) -> bool:
-    """Check if a user is currently online"""
-    return manager.is_user_online(user_id)
+
+async def team_presence(db, team_id: int) -> List[dict]:
+    """
+    Online state and last seen of a team's active members (any worker).
+
+    Returns:
+        [{"user_id": "...", "online": bool, "last_seen_at": datetime | None}, ...]
+    """
+    from sqlalchemy import select
+    from app.models.all_models import TeamMember, User
+
+    result = await db.execute(
+        select(TeamMember.student_id, User.last_seen_at)
+        .join(User, User.user_id == TeamMember.student_id)
+        .where(TeamMember.team_id == team_id, TeamMember.is_active == True)
+    )
+    rows = [(str(student_id), last_seen_at) for student_id, last_seen_at in result.all()]
+    # One registry round trip for the whole team, not one per member
+    online = await manager.registry.online_among([user_id for user_id, _ in rows])
+    return [
+        {
+            'user_id': user_id,
+            'online': user_id in online,
+            'last_seen_at': presence_service.pending_last_seen(user_id) or last_seen_at,
+        }
+        for user_id, last_seen_at in rows
+    ]
@@ -0,0 +1,273 @@
+"""
+Socket Resume
+Phát lại realtime events bị lỡ khi client kết nối lại
+
+Room broadcasts (messages, tasks, team events) go through an event log that
+numbers them per room. Every payload carries an envelope:
+
+    {..., "room": "channel_5", "seq": 42, "epoch": "9f2c61ab", "ts": 1718000000.5}
+
+- seq:   monotonic per room
+- epoch: identifies the sequence; a new epoch (buffer evicted, Redis
+         flushed, single-worker restart) means older seqs are meaningless
+- ts:    server time, used for the database fallback
+
+After reconnecting and re-joining its rooms the client sends
+
+    resume {"rooms": [{"room": "channel_5", "epoch": "9f2c61ab", "seq": 42, "ts": ...}]}
+
+and only the gap is replayed to that socket, from the ring buffer when it
+still covers it, otherwise from the database (channel messages, user
+notifications) when the gap is small enough. The database can only rebuild
+new messages and notifications, not edits or deletions, so a "db" replay
+is best effort. Otherwise the room is reported as "reset" and the client
+refetches.
+
+Log backend follows settings.SOCKETIO_MANAGER: Redis when clustered over
+Redis (sequence shared by all workers), in-process otherwise.
+"""
+
+import json
+import time
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from typing import Any, Deque, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from app.core.config import settings
+
+# (seq, event, payload, ts)
+LogEntry = Tuple[int, str, dict, float]
+
+
+def _new_epoch() -> str:
+    return uuid.uuid4().hex[:8]
+
+
+class _RoomLog:
+    __slots__ = ("epoch", "seq", "entries")
+
+    def __init__(self, size: int):
+        self.epoch = _new_epoch()
+        self.seq = 0
+        self.entries: Deque[LogEntry] = deque(maxlen=size)
+
+
+class MemoryEventLog:
+    """Bounded ring buffer per room, least recently used rooms evicted."""
+
+    def __init__(self, buffer_size: int, max_rooms: int):
+        self.buffer_size = buffer_size
+        self.max_rooms = max_rooms
+        self._rooms: "OrderedDict[str, _RoomLog]" = OrderedDict()
+
+    async def append(self, room: str, event: str, payload: dict, ts: float) -> Tuple[int, str]:
+        log = self._rooms.get(room)
+        if log is None:
+            log = self._rooms[room] = _RoomLog(self.buffer_size)
+            while len(self._rooms) > self.max_rooms:
+                self._rooms.popitem(last=False)
+        self._rooms.move_to_end(room)
+        log.seq += 1
+        log.entries.append((log.seq, event, payload, ts))
+        return log.seq, log.epoch
+
+    async def since(self, room: str, epoch: Optional[str], seq: int) -> Tuple[Optional[List[LogEntry]], int, Optional[str]]:
+        """
+        Entries after seq.
+
+        Returns:
+            (entries or None when the buffer cannot cover the gap, head seq, epoch)
+        """
+        log = self._rooms.get(room)
+        if log is None:
+            return None, 0, None
+        return _entries_after(list(log.entries), log.seq, log.epoch, epoch, seq), log.seq, log.epoch
+
+
+class RedisEventLog:
+    """
+    Ring buffer per room in Redis, shared by all workers.
+
+    Keys (expire after SOCKETIO_RESUME_TTL_SECONDS without events):
+        sio:log:<room>:seq    INCR counter
+        sio:log:<room>:epoch  set once per sequence
+        sio:log:<room>:buf    list of "<seq>|<json [event, payload, ts]>", capped
+    """
+
+    _APPEND_SCRIPT = """
+    redis.call('SET', KEYS[2], ARGV[1], 'NX')
+    local seq = redis.call('INCR', KEYS[1])
+    redis.call('RPUSH', KEYS[3], seq .. '|' .. ARGV[2])
+    redis.call('LTRIM', KEYS[3], -tonumber(ARGV[3]), -1)
+    for i = 1, 3 do redis.call('EXPIRE', KEYS[i], ARGV[4]) end
+    return {seq, redis.call('GET', KEYS[2])}
+    """
+
+    def __init__(self, url: str, buffer_size: int, ttl: int):
+        from redis import asyncio as aioredis
+
+        self._redis = aioredis.from_url(url, decode_responses=True)
+        self._append = self._redis.register_script(self._APPEND_SCRIPT)
+        self.buffer_size = buffer_size
+        self.ttl = ttl
+
+    @staticmethod
+    def _keys(room: str) -> List[str]:
+        prefix = f"sio:log:{room}:"
+        return [prefix + "seq", prefix + "epoch", prefix + "buf"]
+
+    async def append(self, room: str, event: str, payload: dict, ts: float) -> Tuple[int, str]:
+        entry = json.dumps([event, payload, ts], default=str)
+        seq, epoch = await self._append(
+            keys=self._keys(room),
+            args=[_new_epoch(), entry, self.buffer_size, self.ttl],
+        )
+        return int(seq), epoch
+
+    async def since(self, room: str, epoch: Optional[str], seq: int) -> Tuple[Optional[List[LogEntry]], int, Optional[str]]:
+        seq_key, epoch_key, buf_key = self._keys(room)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.get(seq_key)
+            pipe.get(epoch_key)
+            pipe.lrange(buf_key, 0, -1)
+            head, current_epoch, raw_entries = await pipe.execute()
+        if head is None:
+            return None, 0, None
+
+        entries = []
+        for raw in raw_entries:
+            entry_seq, data = raw.split("|", 1)
+            event, payload, ts = json.loads(data)
+            entries.append((int(entry_seq), event, payload, ts))
+        return _entries_after(entries, int(head), current_epoch, epoch, seq), int(head), current_epoch
+
+
+def _entries_after(
+    entries: List[LogEntry], head: int, current_epoch: str, epoch: Optional[str], seq: int
+) -> Optional[List[LogEntry]]:
+    if epoch != current_epoch or seq > head:
+        return None
+    if seq == head:
+        return []
+    if not entries or entries[0][0] > seq + 1:
+        return None  # part of the gap was already evicted
+    return [entry for entry in entries if entry[0] > seq]
+
+
+def create_event_log():
+    if settings.SOCKETIO_MANAGER.lower() == "redis":
+        return RedisEventLog(
+            settings.SOCKETIO_REDIS_URL or settings.REDIS_URL,
+            settings.SOCKETIO_RESUME_BUFFER_SIZE,
+            settings.SOCKETIO_RESUME_TTL_SECONDS,
+        )
+    return MemoryEventLog(settings.SOCKETIO_RESUME_BUFFER_SIZE, settings.SOCKETIO_RESUME_MAX_ROOMS)
+
+
+# Export singleton
+event_log = create_event_log()
+
+
+def envelope(payload: dict, room: str, seq: int, epoch: str, ts: float) -> dict:
+    return {**payload, "room": room, "seq": seq, "epoch": epoch, "ts": ts}
+
+
+# ---- Database fallback when the buffer no longer covers the gap ----
+
+async def _channel_events_since(db, channel_id: int, since: datetime, limit: int) -> Optional[List[Tuple[str, dict]]]:
+    from app.db.loaders import get_loaders
+    from app.models.all_models import Message
+    from app.schemas.message import MessageResponse
+
+    messages = (
+        await db.execute(
+            select(Message)
+            .where(Message.channel_id == channel_id, Message.sent_at > since)
+            .order_by(Message.sent_at, Message.message_id)
+            .limit(limit + 1)
+        )
+    ).scalars().all()
+    if len(messages) > limit:
+        return None
+
+    senders = await get_loaders(db).users.load_many(msg.sender_id for msg in messages)
+    events = []
+    for msg in messages:
+        sender = senders.get(msg.sender_id)
+        message = MessageResponse(
+            message_id=msg.message_id,
+            channel_id=msg.channel_id,
+            sender_id=msg.sender_id,
+            sender_name=sender.full_name if sender else "Unknown",
+            sender_avatar=sender.avatar_url if sender else None,
+            content=msg.content,
+            sent_at=msg.sent_at,
+        )
+        events.append(('message_received', {
+            'type': 'message:new',
+            'channel_id': channel_id,
+            'message': message.model_dump(mode="json"),
+        }))
+    return events
+
+
+async def _user_events_since(db, user_id: str, since: datetime, limit: int) -> Optional[List[Tuple[str, dict]]]:
+    from app.models.all_models import Notification
+
+    notifications = (
+        await db.execute(
+            select(Notification)
+            # updated_at: merges into a coalesced row are replayed too
+            .where(Notification.user_id == uuid.UUID(user_id), Notification.updated_at > since)
+            .order_by(Notification.updated_at, Notification.notification_id)
+            .limit(limit + 1)
+        )
+    ).scalars().all()
+    if len(notifications) > limit:
+        return None
+
+    return [
+        ('notification', {
+            'type': 'notification:new',
+            'notification': {
+                "notification_id": n.notification_id,
+                "title": n.title,
+                "content": n.message,
+                "type": n.notification_type,
+                "is_read": n.is_read,
+                "created_at": n.created_at.isoformat() if n.created_at else None,
+                "count": n.coalesced_count,
+            },
+        })
+        for n in notifications
+    ]
+
+
+async def events_from_db(room: str, ts: Optional[float]) -> Optional[List[Tuple[str, dict]]]:
+    """
+    Rebuild a room's missed events from the database.
+
+    Returns:
+        None when the room has no database fallback, no ts was given, or the
+        gap is larger than SOCKETIO_RESUME_BUFFER_SIZE (client should refetch)
+    """
+    if ts is None:
+        return None
+    kind, _, key = room.partition("_")
+    loaders = {"channel": _channel_events_since, "user": _user_events_since}
+    if kind not in loaders:
+        return None
+
+    from app.db.session import AsyncSessionLocal
+
+    since = datetime.fromtimestamp(float(ts), timezone.utc)
+    async with AsyncSessionLocal() as db:
+        room_key: Any = int(key) if kind == "channel" else key
+        return await loaders[kind](db, room_key, since, settings.SOCKETIO_RESUME_BUFFER_SIZE)
+
+
+def now_ts() -> float:
+    return round(time.time(), 3)
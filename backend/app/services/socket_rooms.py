@@ -0,0 +1,108 @@
+"""
+Socket Room Indexes
+Index hai chiều room <-> socket
+
+Rooms are stored as room -> sids. Removing a socket then means scanning
+every room, and since each socket is also its own room that is
+O(sockets x rooms) work for a reconnect storm. Both helpers here keep the
+reverse sid -> rooms index so connect, join, leave and disconnect only touch
+the rooms of that socket.
+
+- RoomIndex: bookkeeping of ConnectionManager (channel / team rooms)
+- IndexedRoomsMixin: the same for python-socketio's client managers, whose
+  disconnect / get_rooms otherwise scan all rooms of the namespace
+"""
+
+from typing import Dict, Generic, Hashable, Iterator, List, Set, TypeVar
+
+R = TypeVar("R", bound=Hashable)
+
+
+class RoomIndex(Generic[R]):
+    """room -> sids and sid -> rooms, kept in sync; empty sets are dropped."""
+
+    __slots__ = ("rooms", "sid_rooms")
+
+    def __init__(self):
+        self.rooms: Dict[R, Set[str]] = {}
+        self.sid_rooms: Dict[str, Set[R]] = {}
+
+    def add(self, sid: str, room: R) -> None:
+        self.rooms.setdefault(room, set()).add(sid)
+        self.sid_rooms.setdefault(sid, set()).add(room)
+
+    def discard(self, sid: str, room: R) -> None:
+        _discard(self.rooms, room, sid)
+        _discard(self.sid_rooms, sid, room)
+
+    def remove_sid(self, sid: str) -> Set[R]:
+        """Drop a socket from all its rooms; returns the rooms it was in."""
+        rooms = self.sid_rooms.pop(sid, set())
+        for room in rooms:
+            _discard(self.rooms, room, sid)
+        return rooms
+
+    def members(self, room: R) -> Set[str]:
+        return self.rooms.get(room, set())
+
+    def rooms_of(self, sid: str) -> Set[R]:
+        return self.sid_rooms.get(sid, set())
+
+    def __contains__(self, room: R) -> bool:
+        return room in self.rooms
+
+    def __iter__(self) -> Iterator[R]:
+        return iter(self.rooms)
+
+    def __len__(self) -> int:
+        return len(self.rooms)
+
+
+def _discard(index: Dict, key: Hashable, value: Hashable) -> None:
+    values = index.get(key)
+    if values is not None:
+        values.discard(value)
+        if not values:
+            del index[key]
+
+
+class IndexedRoomsMixin:
+    """
+    Reverse sid -> rooms index for python-socketio managers.
+
+    Mix in before the manager class (``class M(IndexedRoomsMixin, AsyncManager)``).
+    Every room change goes through basic_enter_room / basic_leave_room, so
+    overriding those keeps the index exact; disconnect and get_rooms then
+    read it instead of scanning self.rooms.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # namespace -> sid -> rooms (None is the "connected" pseudo-room)
+        self.sid_rooms: Dict[str, Dict[str, Set]] = {}
+
+    def basic_enter_room(self, sid, namespace, room, eio_sid=None):
+        super().basic_enter_room(sid, namespace, room, eio_sid=eio_sid)
+        self.sid_rooms.setdefault(namespace, {}).setdefault(sid, set()).add(room)
+
+    def basic_leave_room(self, sid, namespace, room):
+        super().basic_leave_room(sid, namespace, room)
+        by_sid = self.sid_rooms.get(namespace)
+        if by_sid is not None:
+            _discard(by_sid, sid, room)
+            if not by_sid:
+                del self.sid_rooms[namespace]
+
+    def basic_disconnect(self, sid, namespace, **kwargs):
+        # Same as BaseManager.basic_disconnect minus the scan of every room
+        for room in list(self.sid_rooms.get(namespace, {}).get(sid, ())):
+            self.basic_leave_room(sid, namespace, room)
+        self.callbacks.pop(sid, None)
+        pending = self.pending_disconnect.get(namespace)
+        if pending is not None and sid in pending:
+            pending.remove(sid)
+            if not pending:
+                del self.pending_disconnect[namespace]
+
+    def get_rooms(self, sid, namespace) -> List:
+        return [room for room in self.sid_rooms.get(namespace, {}).get(sid, ()) if room is not None]
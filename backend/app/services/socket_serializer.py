@@ -0,0 +1,82 @@
+"""
+Socket Serializer
+Chọn serializer cho Socket.IO packets (JSON hoặc MessagePack)
+
+settings.SOCKETIO_SERIALIZER:
+- "json" (default): text packets, works with every Socket.IO client
+- "msgpack": binary packets via MessagePack, smaller and cheaper to encode.
+  Every client of the server must then use a msgpack parser
+  (socket.io-msgpack-parser on the frontend), so switch together with the
+  client; clients that cannot be updated stay on a "json" deployment.
+
+Both serializers accept what the broadcasts pass in, including plain
+model_dump() output: datetimes/dates become ISO 8601 strings and UUIDs
+strings, exactly as model_dump(mode="json") would, so clients see the same
+values whichever serializer is active.
+
+A room broadcast is encoded once and the same packet is sent to every
+socket of the room (python-socketio does this whenever no ack callback is
+requested), so the encoding cost is per emit, not per recipient.
+"""
+
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Optional, Tuple, Type, Union
+from uuid import UUID
+
+from socketio import packet
+
+
+def encode_default(obj: Any) -> Any:
+    """Fallback for values JSON / MessagePack cannot encode natively."""
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, UUID):
+        return str(obj)
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not serializable")
+
+
+class SafeJSON:
+    """json module stand-in for python-socketio / python-engineio (json=...)."""
+
+    @staticmethod
+    def dumps(obj: Any, **kwargs) -> str:
+        kwargs.setdefault("default", encode_default)
+        return json.dumps(obj, **kwargs)
+
+    @staticmethod
+    def loads(s: Union[str, bytes], **kwargs) -> Any:
+        return json.loads(s, **kwargs)
+
+
+def _msgpack_packet_class() -> Type[packet.Packet]:
+    # msgpack is only required when the msgpack serializer is enabled
+    import msgpack
+    from socketio.msgpack_packet import MsgPackPacket as BaseMsgPackPacket
+
+    class MsgPackPacket(BaseMsgPackPacket):
+        def encode(self):
+            return msgpack.packb(self._to_dict(), default=encode_default)
+
+    return MsgPackPacket
+
+
+def create_serializer(name: str) -> Tuple[Union[str, Type[packet.Packet]], Optional[Any]]:
+    """
+    Returns:
+        (serializer, json) keyword arguments for socketio.AsyncServer
+    """
+    name = name.lower()
+    if name == "json":
+        return "default", SafeJSON
+    if name == "msgpack":
+        return _msgpack_packet_class(), None
+    raise ValueError(f"Unknown SOCKETIO_SERIALIZER: {name!r} (expected 'json' or 'msgpack')")
@@ -0,0 +1,113 @@
+"""
+Timer Wheel
+Hierarchical timing wheel cho các timer trong process
+
+A sorted structure (heap, ordered list) costs O(log n) per timer and makes
+rescheduling or cancelling a timer awkward. A hierarchical wheel keeps timers
+in buckets instead:
+
+- level 0: one slot per tick (default 64 x 1 s)
+- level 1: one slot per full turn of level 0 (64 x 64 s)
+- level 2: one slot per full turn of level 1 (64 x ~68 min), and so on
+
+A timer goes into the lowest level whose span covers its delay. Advancing one
+tick empties one level-0 slot; when a lower level completes a turn, the next
+slot of the level above is cascaded down. Schedule, cancel and reschedule are
+O(1) (timers are keyed), and advancing costs the ticks elapsed plus the
+timers that fire or move. Timers beyond the top level wait in an overflow
+bucket that is re-placed once per full turn of the wheel.
+
+Not thread-safe; meant for use from the event loop.
+"""
+
+import math
+import time
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+# key -> (deadline tick, item)
+Bucket = Dict[Hashable, Tuple[int, Any]]
+
+
+class TimerWheel:
+    """Keyed timers in a hierarchical timing wheel"""
+
+    def __init__(self, tick: float = 1.0, wheel_sizes: Sequence[int] = (64, 64, 64), start: Optional[float] = None):
+        self.tick = tick
+        self.sizes = tuple(wheel_sizes)
+        # Ticks covered by one slot of each level
+        self.spans = [math.prod(self.sizes[:level]) for level in range(len(self.sizes))]
+        self.horizon = self.spans[-1] * self.sizes[-1]
+        self.now_tick = int((time.time() if start is None else start) // tick)
+
+        self.wheels: List[List[Bucket]] = [[{} for _ in range(size)] for size in self.sizes]
+        self.overflow: Bucket = {}
+        self._due: Bucket = {}
+        # key -> the bucket holding it
+        self._where: Dict[Hashable, Bucket] = {}
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._where
+
+    def keys(self):
+        return self._where.keys()
+
+    def _place(self, key: Hashable, deadline: int, item: Any) -> None:
+        delta = deadline - self.now_tick
+        bucket = self._due if delta <= 0 else self.overflow
+        if delta > 0:
+            for level, size in enumerate(self.sizes):
+                span = self.spans[level]
+                if delta < span * size:
+                    bucket = self.wheels[level][(deadline // span) % size]
+                    break
+        bucket[key] = (deadline, item)
+        self._where[key] = bucket
+
+    def schedule(self, key: Hashable, at: float, item: Any) -> None:
+        """Fire ``item`` at unix time ``at``; replaces a timer with the same key."""
+        self.cancel(key)
+        self._place(key, math.ceil(at / self.tick), item)
+
+    def cancel(self, key: Hashable) -> bool:
+        bucket = self._where.pop(key, None)
+        if bucket is None:
+            return False
+        del bucket[key]
+        return True
+
+    def _cascade(self, bucket: Bucket) -> None:
+        items = list(bucket.items())
+        bucket.clear()
+        for key, (deadline, item) in items:
+            self._place(key, deadline, item)
+
+    def advance(self, now: Optional[float] = None) -> List[Any]:
+        """Move the wheel to ``now`` and return the items that fell due, in deadline order."""
+        target = int((time.time() if now is None else now) // self.tick)
+        fired: List[Tuple[int, Any]] = []
+        while self.now_tick < target:
+            if not self._where:
+                self.now_tick = target
+                break
+            self.now_tick += 1
+            if self.now_tick % self.horizon == 0 and self.overflow:
+                self._cascade(self.overflow)
+            # Higher levels first, so timers cascade all the way down in one tick
+            for level in range(len(self.sizes) - 1, 0, -1):
+                span = self.spans[level]
+                if self.now_tick % span == 0:
+                    self._cascade(self.wheels[level][(self.now_tick // span) % self.sizes[level]])
+            slot = self.wheels[0][self.now_tick % self.sizes[0]]
+            for key, (deadline, item) in slot.items():
+                self._where.pop(key, None)
+                fired.append((deadline, item))
+            slot.clear()
+        for key, (deadline, item) in self._due.items():
+            self._where.pop(key, None)
+            fired.append((deadline, item))
+        self._due.clear()
+        fired.sort(key=lambda entry: entry[0])
+        return [item for _, item in fired]
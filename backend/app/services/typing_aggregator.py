@@ -0,0 +1,151 @@
+"""
+Typing Aggregator
+Gộp typing indicator theo channel
+
+Clients send "typing" on every keystroke; re-broadcasting each one to the
+whole channel room made typing most of the socket traffic. The aggregator
+keeps per-channel typing state with expiry and, at most once per
+TYPING_COALESCE_INTERVAL_MS per channel, emits one coalesced delta:
+
+    users_typing {"channel_id": 1, "started": [user_id, ...],
+                  "stopped": [user_id, ...], "ttl_ms": 5000}
+
+Events from a user who is already typing only extend the expiry and are
+dropped. Clients keep a set per channel: add "started" (for ttl_ms unless
+refreshed), remove "stopped". Deltas from several workers combine, so this
+also works with a clustered Socket.IO.
+
+With TYPING_LEGACY_EVENTS the old per-user "user_typing" event is still
+sent, once when a user starts typing, for clients not yet on users_typing.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, Set
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TypingAggregator:
+    """Per-channel typing state with coalesced, rate-limited broadcasts"""
+
+    def __init__(
+        self,
+        interval_ms: float = settings.TYPING_COALESCE_INTERVAL_MS,
+        expiry_seconds: float = settings.TYPING_EXPIRY_SECONDS,
+        legacy_events: bool = settings.TYPING_LEGACY_EVENTS,
+    ):
+        self.interval = interval_ms / 1000
+        self.expiry = expiry_seconds
+        self.legacy_events = legacy_events
+        # channel_id -> user_id -> expires at (monotonic)
+        self._typing: Dict[int, Dict[str, float]] = {}
+        # Pending deltas since the last flush; started keeps the sender sid
+        self._started: Dict[int, Dict[str, str]] = {}
+        self._stopped: Dict[int, Set[str]] = {}
+
+        self.received = 0
+        self.dropped = 0
+        self.updates_emitted = 0
+        self.legacy_emitted = 0
+
+    def touch(self, channel_id: int, user_id: str, sid: str) -> bool:
+        """
+        Record a typing event.
+
+        Returns:
+            False if the event was redundant (user already typing) and dropped
+        """
+        self.received += 1
+        now = time.monotonic()
+        users = self._typing.setdefault(channel_id, {})
+        expires_at = users.get(user_id)
+        users[user_id] = now + self.expiry
+        if expires_at is not None and expires_at > now:
+            self.dropped += 1
+            return False
+
+        stopped = self._stopped.get(channel_id)
+        if stopped:
+            stopped.discard(user_id)
+        self._started.setdefault(channel_id, {})[user_id] = sid
+        return True
+
+    def stop(self, channel_id: int, user_id: str) -> None:
+        """User stopped typing (explicit stop_typing or sent the message)."""
+        users = self._typing.get(channel_id)
+        if not users or users.pop(user_id, None) is None:
+            return
+        if not users:
+            del self._typing[channel_id]
+
+        started = self._started.get(channel_id)
+        if started and user_id in started:
+            # Started and stopped within one interval: nothing to announce
+            del started[user_id]
+        else:
+            self._stopped.setdefault(channel_id, set()).add(user_id)
+
+    def _expire(self, now: float) -> None:
+        for channel_id, users in list(self._typing.items()):
+            for user_id, expires_at in list(users.items()):
+                if expires_at <= now:
+                    self.stop(channel_id, user_id)
+
+    async def flush(self, sio) -> None:
+        """Emit one users_typing delta per channel whose typing set changed."""
+        self._expire(time.monotonic())
+        started, self._started = self._started, {}
+        stopped, self._stopped = self._stopped, {}
+
+        ttl_ms = int(self.expiry * 1000)
+        for channel_id in set(started) | set(stopped):
+            starters = started.get(channel_id, {})
+            stoppers = stopped.get(channel_id, set())
+            if not starters and not stoppers:
+                continue
+            room = f"channel_{channel_id}"
+            await sio.emit('users_typing', {
+                'channel_id': channel_id,
+                'started': list(starters),
+                'stopped': list(stoppers),
+                'ttl_ms': ttl_ms,
+            }, room=room)
+            self.updates_emitted += 1
+
+            if self.legacy_events:
+                for user_id, sid in starters.items():
+                    await sio.emit('user_typing', {
+                        'channel_id': channel_id,
+                        'user_id': user_id
+                    }, room=room, skip_sid=sid)
+                    self.legacy_emitted += 1
+
+    async def run(self, sio) -> None:
+        """Flush loop (started from app startup)."""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush(sio)
+            except Exception as e:
+                logger.error(f"Typing flush failed: {e}")
+
+    def stats(self) -> dict:
+        emitted = self.updates_emitted + self.legacy_emitted
+        return {
+            "interval_ms": int(self.interval * 1000),
+            "channels_typing": len(self._typing),
+            "events_received": self.received,
+            "events_dropped": self.dropped,
+            "updates_emitted": self.updates_emitted,
+            "legacy_events_emitted": self.legacy_emitted,
+            # Share of typing events that did not turn into a broadcast
+            "reduction": round(1 - emitted / self.received, 4) if self.received else 0.0,
+        }
+
+
+# Export singleton
+typing_aggregator = TypingAggregator()
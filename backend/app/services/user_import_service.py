@@ -7,10 +7,7 @@ from typing import List, Tuple
 
 from app.schemas.user_import import UserImportRow, UserImportStats, UserImportResultRow
 from app.models.all_models import User, Role, Department
-from passlib.context import CryptContext
-
-# Use sha256_crypt to avoid bcrypt 72-byte limit issues in this environment
-import_pwd_context = CryptContext(schemes=["sha256_crypt"], deprecated="auto")
+from app.services.password_hasher import password_hasher
 
 async def parse_import_file(file: UploadFile) -> List[UserImportRow]:
     """Parse uploaded file into list of UserImportRow objects."""
@@ -55,6 +52,11 @@ async def parse_import_file(file: UploadFile) -> List[UserImportRow]:
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error parsing file: {str(e)}")
 
+def _default_password(email: str) -> str:
+    """Default password: CollabSphere@{user_email_prefix}"""
+    return f"CollabSphere@{email.split('@')[0]}"
+
+
 async def import_users(db: AsyncSession, users: List[UserImportRow]) -> Tuple[UserImportStats, List[UserImportResultRow]]:
     """Process import of users."""
     stats = UserImportStats(total_rows=len(users))
@@ -66,6 +68,20 @@ async def import_users(db: AsyncSession, users: List[UserImportRow]) -> Tuple[Us
     
     depts = (await db.execute(select(Department))).scalars().all()
     dept_map = {d.dept_name: d.dept_id for d in depts}
+
+    # Existing emails in one query, then hash the default passwords of the new
+    # users concurrently in the hashing process pool
+    emails = {u.email for u in users}
+    existing_emails = set(
+        (await db.execute(select(User.email).where(User.email.in_(emails)))).scalars().all()
+    ) if emails else set()
+    new_emails = list(dict.fromkeys(u.email for u in users if u.email not in existing_emails))
+    hashes = dict(zip(
+        new_emails,
+        await password_hasher.hash_many(
+            (_default_password(email) for email in new_emails), return_exceptions=True
+        ),
+    ))
     
     for i, user_in in enumerate(users, start=1):
         result_row = UserImportResultRow(
@@ -75,11 +91,8 @@ async def import_users(db: AsyncSession, users: List[UserImportRow]) -> Tuple[Us
         )
         
         try:
-            # 1. Check existing email
-            stmt = select(User).where(User.email == user_in.email)
-            existing = (await db.execute(stmt)).scalars().first()
-            
-            if existing:
+            # 1. Check existing email (in DB or earlier in this file)
+            if user_in.email in existing_emails:
                 stats.skipped += 1
                 result_row.status = "skipped"
                 result_row.message = "Email already exists"
@@ -102,14 +115,14 @@ async def import_users(db: AsyncSession, users: List[UserImportRow]) -> Tuple[Us
                      raise ValueError(f"Department {user_in.dept_name} not found")
             
             # 4. Create User
-            # Default password: CollabSphere@{user_email_prefix}
-            username = user_in.email.split('@')[0]
-            password = f"CollabSphere@{username}"
-            
+            password_hash = hashes[user_in.email]
+            if isinstance(password_hash, Exception):
+                raise password_hash
+
             new_user = User(
                 email=user_in.email,
                 full_name=user_in.full_name,
-                password_hash=import_pwd_context.hash(password),
+                password_hash=password_hash,
                 role_id=role_id,
                 dept_id=dept_id,
                 phone=user_in.phone,
@@ -117,6 +130,7 @@ async def import_users(db: AsyncSession, users: List[UserImportRow]) -> Tuple[Us
             )
             db.add(new_user)
             await db.flush() # to get ID
+            existing_emails.add(user_in.email)
             
             stats.successful += 1
             result_row.status = "success"
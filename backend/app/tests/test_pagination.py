@@ -0,0 +1,129 @@
+"""Keyset pagination helpers (app.db.pagination)."""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.db.pagination import (
+    Cursor,
+    decode_cursor,
+    decode_cursors,
+    encode_cursor,
+    keyset_cursors,
+    keyset_query,
+    keyset_rows,
+)
+from app.models.all_models import Message
+
+BASE = datetime(2026, 3, 2, 9, 0, tzinfo=timezone.utc)
+
+# 23 rows, several sharing a timestamp (ids break the ties)
+ROWS = [(BASE + timedelta(seconds=i // 3), i) for i in range(1, 24)]
+
+
+def _fetch(before=None, after=None, limit=5):
+    """What keyset_query returns from ROWS (limit + 1 rows, in query order)."""
+    if after is not None:
+        rows = sorted(row for row in ROWS if row > tuple(after))
+    else:
+        rows = sorted((row for row in ROWS if before is None or row < tuple(before)), reverse=True)
+    return rows[:limit + 1]
+
+
+def _page(before=None, after=None, limit=5):
+    before_cursor, after_cursor = decode_cursors(before, after)
+    rows, has_more = keyset_rows(_fetch(before_cursor, after_cursor, limit), limit, after_cursor)
+    next_cursor, prev_cursor = keyset_cursors(rows, lambda row: row, has_more, after_cursor)
+    return rows, next_cursor, prev_cursor
+
+
+def test_cursor_round_trip():
+    ts = datetime(2026, 3, 2, 9, 0, 1, 123456, tzinfo=timezone.utc)
+
+    assert decode_cursor(encode_cursor(ts, 42)) == Cursor(ts, 42)
+    assert decode_cursor(None) is None
+    assert decode_cursor("") is None
+
+
+@pytest.mark.parametrize("value", ["not-a-cursor", "bnVsbA", "WyJ4IiwxXQ", "WzFd"])
+def test_malformed_cursor_is_400(value):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(value)
+    assert exc.value.status_code == 400
+
+
+def test_before_and_after_together_is_400():
+    cursor = encode_cursor(BASE, 1)
+    with pytest.raises(HTTPException) as exc:
+        decode_cursors(cursor, cursor)
+    assert exc.value.status_code == 400
+
+
+def test_walking_older_pages_sees_every_row_once():
+    seen, before = [], None
+    while True:
+        rows, next_cursor, _ = _page(before=before)
+        seen += rows
+        if next_cursor is None:
+            break
+        before = next_cursor
+
+    assert seen == sorted(ROWS, reverse=True)
+
+
+def test_walking_back_with_after_stitches_to_the_same_pages():
+    # Go to the oldest page, then page back to the newest with prev_cursor
+    pages, before = [], None
+    while True:
+        rows, next_cursor, prev_cursor = _page(before=before)
+        pages.append(rows)
+        if next_cursor is None:
+            break
+        before = next_cursor
+
+    seen, after = list(pages[-1]), prev_cursor
+    while True:
+        rows, _, prev_cursor = _page(after=after)
+        if not rows:
+            break
+        # Newest first within the page, and right above what was seen
+        assert rows == sorted(rows, reverse=True)
+        assert rows[-1] > seen[0]
+        seen = rows + seen
+        after = prev_cursor
+
+    assert seen == sorted(ROWS, reverse=True)
+
+
+def test_after_page_keeps_a_next_cursor_and_has_more_points_newer():
+    cursor = encode_cursor(*ROWS[2])
+    rows, next_cursor, prev_cursor = _page(after=cursor, limit=3)
+
+    assert rows == [ROWS[5], ROWS[4], ROWS[3]]
+    assert decode_cursor(next_cursor) == Cursor(*ROWS[3])
+    assert decode_cursor(prev_cursor) == Cursor(*ROWS[5])
+
+
+def test_last_page_has_no_next_cursor_and_empty_page_no_cursors():
+    _, next_cursor, _ = _page(before=encode_cursor(*ROWS[3]))
+    assert next_cursor is None
+
+    assert keyset_cursors([], lambda row: row, False) == (None, None)
+
+
+def test_keyset_query_sql():
+    cursor = Cursor(BASE, 7)
+    base = select(Message).where(Message.channel_id == 1)
+
+    before_sql = str(keyset_query(base, Message.sent_at, Message.message_id, before=cursor, limit=50)
+                     .compile(dialect=postgresql.dialect()))
+    after_sql = str(keyset_query(base, Message.sent_at, Message.message_id, after=cursor, limit=50)
+                    .compile(dialect=postgresql.dialect()))
+
+    assert "(messages.sent_at, messages.message_id) < (" in before_sql
+    assert "ORDER BY messages.sent_at DESC, messages.message_id DESC" in before_sql
+    assert "(messages.sent_at, messages.message_id) > (" in after_sql
+    assert "ORDER BY messages.sent_at, messages.message_id" in after_sql
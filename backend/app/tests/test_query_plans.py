@@ -0,0 +1,26 @@
+"""Plan regression check of the hot queries (needs a migrated PostgreSQL)."""
+
+import asyncio
+import os
+
+import pytest
+
+pytestmark = pytest.mark.skipif(
+    not os.environ.get("DATABASE_URL"),
+    reason="DATABASE_URL not set: plan check needs a migrated PostgreSQL database",
+)
+
+
+def test_hot_queries_use_indexes():
+    from app.db.session import engine
+    from scripts.check_query_plans import check_plans
+
+    async def run():
+        try:
+            async with engine.connect() as conn:
+                return await check_plans(conn)
+        finally:
+            await engine.dispose()
+
+    regressions = {name: seq_scans for name, _, seq_scans in asyncio.run(run()) if seq_scans}
+    assert regressions == {}, f"Sequential scans: {regressions}"
@@ -0,0 +1,88 @@
+"""ReminderScheduler: which reminders a scan schedules (no database)."""
+
+from datetime import date, datetime, timedelta, timezone
+
+from app.services.reminder_scheduler import (
+    KIND_MEETING,
+    KIND_SPRINT,
+    Reminder,
+    ReminderScheduler,
+    reminder_text,
+    sprint_due_at,
+)
+
+NOW = datetime(2026, 3, 2, 9, 0, tzinfo=timezone.utc)
+
+
+def _scheduler(**kwargs) -> ReminderScheduler:
+    kwargs.setdefault("lookahead_seconds", 3600)
+    kwargs.setdefault("scan_interval_seconds", 60)
+    kwargs.setdefault("meeting_offsets", (15, 60))
+    kwargs.setdefault("deadline_offsets", (1440,))
+    return ReminderScheduler(**kwargs)
+
+
+def _expand(scheduler, starts_in_minutes, offsets=None):
+    rows = [(1, NOW + timedelta(minutes=starts_in_minutes), "Standup", 5)]
+    offsets = offsets or scheduler.meeting_offsets
+    return scheduler._expand(KIND_MEETING, rows, offsets, NOW, NOW + scheduler.lookahead)
+
+
+def test_sprint_is_due_at_the_end_of_its_last_day():
+    assert sprint_due_at(date(2026, 3, 6)) == datetime(2026, 3, 7, tzinfo=timezone.utc)
+
+
+def test_one_reminder_per_offset_inside_the_lookahead():
+    reminders = _expand(_scheduler(), starts_in_minutes=90)
+
+    # 90 - 60 = in 30 minutes, 90 - 15 = in 75 minutes (beyond the hour)
+    assert [(r.offset_minutes, r.fire_at) for r in reminders] == [(60, NOW + timedelta(minutes=30))]
+
+
+def test_reminder_due_now_is_kept_for_every_offset():
+    reminders = _expand(_scheduler(), starts_in_minutes=60)
+
+    assert sorted(r.offset_minutes for r in reminders) == [15, 60]
+
+
+def test_missed_reminders_collapse_to_the_smallest_offset():
+    # Meeting in 10 minutes: both the 60 and the 15 minute reminders were
+    # missed (no worker ran); only the 15 minute one is still sent
+    reminders = _expand(_scheduler(), starts_in_minutes=10)
+
+    assert [r.offset_minutes for r in reminders] == [15]
+
+
+def test_past_or_unscoped_entities_are_skipped():
+    scheduler = _scheduler()
+    rows = [
+        (1, NOW - timedelta(minutes=1), "Over", 5),
+        (2, NOW + timedelta(minutes=30), "No team", None),
+        (3, None, "No time", 5),
+    ]
+
+    assert scheduler._expand(KIND_MEETING, rows, [15], NOW, NOW + scheduler.lookahead) == []
+
+
+def test_reschedule_cancels_removed_and_skips_sent():
+    scheduler = _scheduler()
+    moved = Reminder(KIND_MEETING, 1, 15, NOW + timedelta(minutes=40), "Standup", 5)
+    deleted = Reminder(KIND_MEETING, 2, 15, NOW + timedelta(minutes=40), "Retro", 5)
+    sent = Reminder(KIND_SPRINT, 3, 1440, NOW + timedelta(hours=23), "Sprint 1", 5)
+    scheduler.reschedule([moved, deleted, sent], NOW)
+    scheduler._sent.add((sent.key, sent.due_at))
+
+    later = moved._replace(due_at=NOW + timedelta(minutes=50))
+    scheduler.reschedule([later, sent], NOW)
+
+    assert set(scheduler.wheel.keys()) == {later.key}
+    assert scheduler.wheel.advance(later.fire_at.timestamp()) == [later]
+
+
+def test_meeting_text_counts_down_from_the_send_time():
+    reminder = Reminder(KIND_MEETING, 1, 15, NOW + timedelta(minutes=15), "Standup", 5)
+
+    title, content, notification_type = reminder_text(reminder, NOW + timedelta(minutes=3))
+
+    assert content == "Meeting 'Standup' starts in 12 minutes"
+    assert notification_type == "meeting"
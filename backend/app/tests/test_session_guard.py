@@ -0,0 +1,46 @@
+"""RequestSessionGuard: one database session per HTTP request."""
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import AsyncSessionLocal, RequestSessionGuard, get_db
+
+
+def _guarded_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(RequestSessionGuard)
+
+    async def other_dependency(db: AsyncSession = Depends(get_db)) -> AsyncSession:
+        return db
+
+    @app.get("/shared")
+    async def shared(db: AsyncSession = Depends(get_db), other: AsyncSession = Depends(other_dependency)):
+        return {"same_session": db is other}
+
+    @app.get("/bypass")
+    async def bypass(db: AsyncSession = Depends(get_db)):
+        async with AsyncSessionLocal():
+            pass
+        return {}
+
+    return app
+
+
+def test_dependencies_share_one_session():
+    with TestClient(_guarded_app()) as client:
+        response = client.get("/shared")
+    assert response.status_code == 200
+    assert response.json() == {"same_session": True}
+
+
+def test_second_session_fails_the_request():
+    with TestClient(_guarded_app()) as client:
+        with pytest.raises(RuntimeError, match="more than one database session"):
+            client.get("/bypass")
+
+
+def test_sessions_outside_requests_are_not_counted():
+    AsyncSessionLocal()
+    AsyncSessionLocal()
@@ -0,0 +1,105 @@
+"""TimerWheel: keyed timers in a hierarchical timing wheel."""
+
+import random
+
+from app.services.timer_wheel import TimerWheel
+
+START = 1_000_000.0
+
+
+def _wheel(**kwargs) -> TimerWheel:
+    return TimerWheel(tick=1.0, start=START, **kwargs)
+
+
+def test_fires_in_deadline_order():
+    wheel = _wheel()
+    for key, delay in [("c", 30), ("a", 10), ("b", 20)]:
+        wheel.schedule(key, START + delay, key)
+
+    assert wheel.advance(START + 5) == []
+    assert wheel.advance(START + 30) == ["a", "b", "c"]
+    assert len(wheel) == 0
+
+
+def test_fires_on_its_tick_not_before():
+    wheel = _wheel()
+    wheel.schedule("t", START + 7, "t")
+
+    assert wheel.advance(START + 6.9) == []
+    assert wheel.advance(START + 7) == ["t"]
+
+
+def test_past_deadline_fires_on_next_advance():
+    wheel = _wheel()
+    wheel.schedule("late", START - 60, "late")
+
+    assert wheel.advance(START) == ["late"]
+
+
+def test_cancel_and_reschedule():
+    wheel = _wheel()
+    wheel.schedule("a", START + 10, "a")
+    wheel.schedule("b", START + 10, "b")
+
+    assert wheel.cancel("a")
+    assert not wheel.cancel("a")
+    # Same key again replaces the earlier timer
+    wheel.schedule("b", START + 20, "b2")
+
+    assert wheel.advance(START + 15) == []
+    assert wheel.advance(START + 20) == ["b2"]
+    assert "b" not in wheel
+
+
+def test_cascades_across_levels():
+    # Levels of 4 x 1 s, 4 x 4 s, 4 x 16 s: 5 s lands on level 1, 40 s on level 2
+    wheel = _wheel(wheel_sizes=(4, 4, 4))
+    delays = [1, 3, 5, 15, 17, 40, 63]
+    for delay in delays:
+        wheel.schedule(delay, START + delay, delay)
+
+    fired = {}
+    for second in range(1, 70):
+        for item in wheel.advance(START + second):
+            fired[item] = second
+
+    assert fired == {delay: delay for delay in delays}
+
+
+def test_overflow_beyond_the_top_level():
+    # Horizon of 4 * 4 * 4 = 64 ticks
+    wheel = _wheel(wheel_sizes=(4, 4, 4))
+    wheel.schedule("far", START + 200, "far")
+    assert "far" in wheel.overflow
+
+    fired = {}
+    for second in range(1, 260):
+        for item in wheel.advance(START + second):
+            fired[item] = second
+
+    assert fired == {"far": 200}
+
+
+def test_random_timers_fire_exactly_once_on_time():
+    rng = random.Random(7)
+    wheel = _wheel(wheel_sizes=(8, 8, 8))
+    deadlines = {key: rng.randint(1, 1500) for key in range(300)}
+    for key, delay in deadlines.items():
+        wheel.schedule(key, START + delay, key)
+    cancelled = set(rng.sample(sorted(deadlines), 30))
+    for key in cancelled:
+        wheel.cancel(key)
+
+    fired = {}
+    now = START
+    while now < START + 1600:
+        now += rng.choice([1, 1, 3, 17])
+        for key in wheel.advance(now):
+            assert key not in fired
+            fired[key] = now
+
+    expected = {key: delay for key, delay in deadlines.items() if key not in cancelled}
+    assert fired.keys() == expected.keys()
+    for key, delay in expected.items():
+        # Fired by the first advance that reached its deadline
+        assert START + delay <= fired[key] < START + delay + 17
@@ -0,0 +1,62 @@
+"""
+Archive monthly message partitions of past semesters.
+
+Detaches every messages_pYYYYMM partition that ends on or before the cutoff
+and moves it to the "archive" schema. Archived messages no longer appear in
+the chat API but can still be queried as archive.messages_pYYYYMM.
+
+Run:
+    python -m scripts.archive_message_partitions --semester SU25 --dry-run
+    python -m scripts.archive_message_partitions --before 2025-09-01
+    python -m scripts.archive_message_partitions --ensure   # create upcoming partitions
+"""
+import argparse
+import asyncio
+from datetime import date
+
+from sqlalchemy import select
+
+from app.db.session import AsyncSessionLocal, engine
+from app.models.all_models import Semester
+from app.services.message_partitions import message_partition_service, month_start
+
+
+async def semester_cutoff(semester_code: str) -> date:
+    """First day of the month after the semester ends (partitions are monthly)."""
+    async with AsyncSessionLocal() as db:
+        semester = (
+            await db.execute(select(Semester).where(Semester.semester_code == semester_code))
+        ).scalar_one_or_none()
+    if semester is None or semester.end_date is None:
+        raise SystemExit(f"Semester {semester_code} not found or has no end_date")
+    # Keep the month the semester ends in: it may hold the next semester's first days
+    return month_start(semester.end_date)
+
+
+async def main(args: argparse.Namespace) -> None:
+    if args.ensure:
+        created = await message_partition_service.ensure_future_partitions()
+        print(f"Created partitions: {', '.join(created) or 'none'}")
+
+    cutoff = None
+    if args.semester:
+        cutoff = await semester_cutoff(args.semester)
+    elif args.before:
+        cutoff = month_start(date.fromisoformat(args.before))
+
+    if cutoff is not None:
+        archived = await message_partition_service.archive_partitions_before(cutoff, dry_run=args.dry_run)
+        verb = "Would archive" if args.dry_run else "Archived"
+        print(f"{verb} partitions ending on or before {cutoff}: {', '.join(archived) or 'none'}")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage monthly partitions of the messages table")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--semester", help="Archive partitions of semesters up to this semester_code")
+    target.add_argument("--before", help="Archive partitions ending on or before this date (YYYY-MM-DD)")
+    parser.add_argument("--ensure", action="store_true", help="Create upcoming monthly partitions")
+    parser.add_argument("--dry-run", action="store_true", help="Only list the partitions that would be archived")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,136 @@
+"""
+Microbenchmark: deep-page latency, OFFSET vs keyset cursors.
+
+Fills a temporary copy of the messages feed shape (channel_id, sent_at,
+message_id with the same (channel_id, sent_at, message_id) index) with N
+rows, three quarters of them in one channel, then times fetching page P of
+50 of that channel both ways, the
+queries built exactly as list_messages builds them:
+
+- offset:  ORDER BY sent_at DESC, message_id DESC OFFSET P*50 LIMIT 51
+- keyset:  WHERE (sent_at, message_id) < cursor ORDER BY ... LIMIT 51
+
+The keyset cursor for page P is taken from the row the previous page ended
+on, as a client walking the feed would have it. Needs PostgreSQL (the
+app's DATABASE_URL); nothing outside the temporary table is touched.
+
+Run:
+    python -m scripts.bench_keyset_pagination
+    python -m scripts.bench_keyset_pagination --rows 2000000 --pages 1 100 1000 10000 30000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+from sqlalchemy import BigInteger, Column, DateTime, Integer, MetaData, Table, desc, func, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.db.pagination import Cursor, keyset_query
+from app.db.session import engine
+
+PAGE_SIZE = 50
+CHANNEL_ID = 1
+
+metadata = MetaData()
+feed = Table(
+    "bench_feed",
+    metadata,
+    Column("channel_id", Integer, nullable=False),
+    Column("sent_at", DateTime(timezone=True), nullable=False),
+    Column("message_id", BigInteger, nullable=False),
+    prefixes=["TEMPORARY"],
+)
+
+
+async def fill(conn: AsyncConnection, rows: int) -> None:
+    await conn.run_sync(metadata.create_all)
+    # A few messages per second, several channels so the index is not trivially one range
+    await conn.execute(text(
+        """
+        INSERT INTO bench_feed (channel_id, sent_at, message_id)
+        SELECT CASE WHEN i % 4 = 0 THEN :other ELSE :channel END,
+               timestamptz '2025-01-01' + (i / 3) * interval '1 second',
+               i
+        FROM generate_series(1, :rows) AS i
+        """
+    ), {"rows": rows, "channel": CHANNEL_ID, "other": CHANNEL_ID + 1})
+    await conn.execute(text(
+        "CREATE INDEX ix_bench_feed_channel_sent_at ON bench_feed (channel_id, sent_at, message_id)"
+    ))
+    await conn.execute(text("ANALYZE bench_feed"))
+
+
+def offset_query(page: int):
+    return (
+        select(feed)
+        .where(feed.c.channel_id == CHANNEL_ID)
+        .order_by(desc(feed.c.sent_at), desc(feed.c.message_id))
+        .offset(page * PAGE_SIZE)
+        .limit(PAGE_SIZE + 1)
+    )
+
+
+async def cursor_for(conn: AsyncConnection, page: int) -> Cursor:
+    """The last row of page - 1 (what next_cursor would carry)."""
+    row = (
+        await conn.execute(
+            select(feed.c.sent_at, feed.c.message_id)
+            .where(feed.c.channel_id == CHANNEL_ID)
+            .order_by(desc(feed.c.sent_at), desc(feed.c.message_id))
+            .offset(page * PAGE_SIZE - 1)
+            .limit(1)
+        )
+    ).first()
+    return Cursor(row.sent_at, row.message_id)
+
+
+async def time_query(conn: AsyncConnection, query, repeat: int) -> float:
+    """Median milliseconds per execution."""
+    samples: List[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        (await conn.execute(query)).all()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+async def main(args: argparse.Namespace) -> None:
+    async with engine.connect() as conn:
+        print(f"Filling {args.rows:,} rows...")
+        await fill(conn, args.rows)
+        in_channel = (
+            await conn.execute(select(func.count()).select_from(feed).where(feed.c.channel_id == CHANNEL_ID))
+        ).scalar()
+        print(f"{in_channel:,} rows in the benchmarked channel, {PAGE_SIZE} per page\n")
+        print(f"  {'page':>8} {'offset ms':>10} {'keyset ms':>10} {'speedup':>8}")
+
+        for page in args.pages:
+            if page * PAGE_SIZE >= in_channel:
+                print(f"  {page:>8} (beyond the last page)")
+                continue
+            offset_ms = await time_query(conn, offset_query(page), args.repeat)
+            keyset_ms = offset_ms
+            if page > 0:
+                cursor = await cursor_for(conn, page)
+                keyset_ms = await time_query(
+                    conn,
+                    keyset_query(
+                        select(feed).where(feed.c.channel_id == CHANNEL_ID),
+                        feed.c.sent_at, feed.c.message_id, before=cursor, limit=PAGE_SIZE,
+                    ),
+                    args.repeat,
+                )
+            print(f"  {page:>8} {offset_ms:10.2f} {keyset_ms:10.2f} {offset_ms / max(keyset_ms, 1e-6):7.1f}x")
+
+        await conn.rollback()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark OFFSET vs keyset pagination")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--pages", type=int, nargs="+", default=[0, 10, 100, 1_000, 10_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
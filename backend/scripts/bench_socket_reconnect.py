@@ -0,0 +1,120 @@
+"""
+Microbenchmark: reconnect storm of Socket.IO sockets.
+
+Simulates N sockets (default 10k) that each sit in their own room, a few
+channel rooms and one team room, then disconnect and reconnect all at once
+(what a deploy does). Compares, for both layers of room bookkeeping, the
+old full scan on disconnect against the reverse sid -> rooms index:
+
+- python-socketio client manager: AsyncManager vs LocalManager
+- ConnectionManager channel/team rooms: dict scan vs RoomIndex
+
+Run:
+    python -m scripts.bench_socket_reconnect
+    python -m scripts.bench_socket_reconnect --sockets 20000 --channels 5000
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import Dict, List, Set, Tuple
+
+import socketio
+
+from app.services.socket_cluster import LocalManager
+from app.services.socket_rooms import RoomIndex
+
+NAMESPACE = "/"
+
+
+class ScanRooms:
+    """The previous ConnectionManager bookkeeping: disconnect scans every room."""
+
+    def __init__(self):
+        self.rooms: Dict[int, Set[str]] = {}
+
+    def add(self, sid: str, room: int) -> None:
+        self.rooms.setdefault(room, set()).add(sid)
+
+    def remove_sid(self, sid: str) -> None:
+        for room, sockets in list(self.rooms.items()):
+            sockets.discard(sid)
+            if not sockets:
+                del self.rooms[room]
+
+
+def make_memberships(args) -> List[Tuple[List[int], int]]:
+    rng = random.Random(42)
+    return [
+        (rng.sample(range(args.channels), args.channels_per_socket), rng.randrange(args.teams))
+        for _ in range(args.sockets)
+    ]
+
+
+async def bench_client_manager(manager_class, memberships) -> Tuple[float, float]:
+    """Returns (seconds to connect+join all, seconds to disconnect+reconnect+rejoin all)."""
+    manager = manager_class()
+    socketio.AsyncServer(async_mode="asgi", client_manager=manager)
+
+    async def join_all(prefix: str) -> List[str]:
+        sids = []
+        for i, (channels, team) in enumerate(memberships):
+            sid = await manager.connect(f"{prefix}{i}", NAMESPACE)
+            for channel_id in channels:
+                await manager.enter_room(sid, NAMESPACE, f"channel_{channel_id}")
+            await manager.enter_room(sid, NAMESPACE, f"team_{team}")
+            sids.append(sid)
+        return sids
+
+    started = time.perf_counter()
+    sids = await join_all("a")
+    joined = time.perf_counter()
+    for sid in sids:
+        await manager.disconnect(sid, NAMESPACE)
+    await join_all("b")
+    return joined - started, time.perf_counter() - joined
+
+
+def bench_bookkeeping(index_class, memberships) -> float:
+    """Seconds to disconnect and rejoin every socket's channel and team rooms."""
+    channels, teams = index_class(), index_class()
+    for i, (channel_ids, team) in enumerate(memberships):
+        for channel_id in channel_ids:
+            channels.add(f"a{i}", channel_id)
+        teams.add(f"a{i}", team)
+
+    started = time.perf_counter()
+    for i, (channel_ids, team) in enumerate(memberships):
+        channels.remove_sid(f"a{i}")
+        teams.remove_sid(f"a{i}")
+    for i, (channel_ids, team) in enumerate(memberships):
+        for channel_id in channel_ids:
+            channels.add(f"b{i}", channel_id)
+        teams.add(f"b{i}", team)
+    return time.perf_counter() - started
+
+
+async def main(args: argparse.Namespace) -> None:
+    memberships = make_memberships(args)
+    print(
+        f"{args.sockets} sockets, {args.channels} channels ({args.channels_per_socket} per socket), "
+        f"{args.teams} teams\n"
+    )
+
+    print("python-socketio client manager (connect+join / reconnect storm):")
+    for label, manager_class in (("AsyncManager (scan)", socketio.AsyncManager), ("LocalManager (index)", LocalManager)):
+        join_s, storm_s = await bench_client_manager(manager_class, memberships)
+        print(f"  {label:<24} {join_s * 1000:9.1f} ms / {storm_s * 1000:9.1f} ms")
+
+    print("\nConnectionManager channel/team rooms (reconnect storm):")
+    for label, index_class in (("dict scan", ScanRooms), ("RoomIndex", RoomIndex)):
+        print(f"  {label:<24} {bench_bookkeeping(index_class, memberships) * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark a Socket.IO reconnect storm")
+    parser.add_argument("--sockets", type=int, default=10_000)
+    parser.add_argument("--channels", type=int, default=2_000)
+    parser.add_argument("--channels-per-socket", type=int, default=3)
+    parser.add_argument("--teams", type=int, default=2_500)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,105 @@
+"""
+Microbenchmark: Socket.IO serializers for room broadcasts.
+
+Broadcasts a typical new-message payload (MessageResponse.model_dump(), with
+datetimes and UUIDs) to a room of N sockets, 1k times, through the real
+python-socketio server and LocalManager, counting the bytes handed to
+Engine.IO and the CPU time spent. Compared:
+
+- json, one emit per socket (how per-recipient sending loops behaved)
+- json, one emit per room (packet encoded once, reused for every socket)
+- msgpack, one emit per room
+
+Run:
+    python -m scripts.bench_socket_serializer
+    python -m scripts.bench_socket_serializer --broadcasts 5000 --sockets 200
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Tuple
+
+import socketio
+
+from app.schemas.message import MessageResponse
+from app.services.socket_cluster import LocalManager
+from app.services.socket_serializer import create_serializer
+
+NAMESPACE = "/"
+ROOM = "channel_1"
+
+
+def make_payload() -> dict:
+    message = MessageResponse(
+        message_id=123456,
+        channel_id=1,
+        sender_id=uuid.uuid4(),
+        sender_name="Nguyễn Văn An",
+        sender_avatar="https://cdn.example.com/avatars/3f1c2a.png",
+        content="Mình vừa push bản sửa cho task #42, mọi người review giúp nhé. " * 2,
+        sent_at=datetime.now(timezone.utc),
+    )
+    return {"type": "message:new", "channel_id": 1, "message": message.model_dump()}
+
+
+async def make_server(serializer_name: str, sockets: int) -> Tuple[socketio.AsyncServer, list, list]:
+    serializer, serializer_json = create_serializer(serializer_name)
+    manager = LocalManager()
+    sio = socketio.AsyncServer(
+        async_mode="asgi", client_manager=manager, serializer=serializer, json=serializer_json
+    )
+    wire = [0, 0]  # bytes, packets
+
+    async def send_eio_packet(eio_sid, eio_pkt):
+        # Engine.IO encodes each queued packet once per socket before writing it
+        wire[0] += len(eio_pkt.encode())
+        wire[1] += 1
+
+    sio._send_eio_packet = send_eio_packet
+    sids = []
+    for i in range(sockets):
+        sid = await manager.connect(f"eio{i}", NAMESPACE)
+        await manager.enter_room(sid, NAMESPACE, ROOM)
+        sids.append(sid)
+    return sio, sids, wire
+
+
+async def run_case(serializer_name: str, per_socket: bool, args) -> Tuple[float, int, int]:
+    sio, sids, wire = await make_server(serializer_name, args.sockets)
+    payload = make_payload()
+
+    started = time.process_time()
+    for _ in range(args.broadcasts):
+        if per_socket:
+            for sid in sids:
+                await sio.emit("message_received", payload, to=sid)
+        else:
+            await sio.emit("message_received", payload, room=ROOM)
+        await asyncio.sleep(0)  # let the send tasks run
+    await asyncio.sleep(0)
+    return time.process_time() - started, wire[0], wire[1]
+
+
+async def main(args: argparse.Namespace) -> None:
+    print(f"{args.broadcasts} broadcasts to a room of {args.sockets} sockets\n")
+    print(f"  {'case':<28} {'bytes/packet':>12} {'MB on wire':>11} {'CPU ms / 1k':>12}")
+    cases = (
+        ("json, emit per socket", "json", True),
+        ("json, emit per room", "json", False),
+        ("msgpack, emit per room", "msgpack", False),
+    )
+    for label, serializer_name, per_socket in cases:
+        cpu, total_bytes, packets = await run_case(serializer_name, per_socket, args)
+        print(
+            f"  {label:<28} {total_bytes / max(packets, 1):12.0f} {total_bytes / 1e6:11.2f} "
+            f"{cpu * 1000 / (args.broadcasts / 1000):12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Socket.IO serializers")
+    parser.add_argument("--broadcasts", type=int, default=1_000)
+    parser.add_argument("--sockets", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,162 @@
+"""
+Plan regression check for the app's hot queries.
+
+Runs EXPLAIN (FORMAT JSON) on a catalogue of the queries the endpoints issue
+and fails if any of them plans a sequential scan. Run it against a migrated,
+seeded database:
+
+    python -m scripts.check_query_plans
+
+The same check runs in the test suite (app/tests/test_query_plans.py)
+whenever DATABASE_URL is set in the environment.
+
+Sequential scans are disabled for the session (enable_seqscan = off), so on a
+small seeded database the planner still picks an index when one is usable;
+a Seq Scan left in the plan means no index matches the query.
+Exits with status 1 when a plan regresses.
+"""
+import asyncio
+import json
+import sys
+from datetime import datetime, timezone
+from typing import Callable, List, Tuple
+from uuid import uuid4
+
+from sqlalchemy import desc, func, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql import Select
+
+from app.db.pagination import Cursor, keyset_query
+from app.db.session import engine
+from app.models.all_models import (
+    ClassEnrollment,
+    Message,
+    Notification,
+    Sprint,
+    Task,
+    TeamMember,
+    User,
+)
+
+SEQ_SCAN_NODES = {"Seq Scan", "Parallel Seq Scan"}
+
+
+class Sample:
+    """Key values picked from the seeded data (placeholders when a table is empty)."""
+
+    channel_id = 1
+    user_id = uuid4()
+    sprint_id = 1
+    team_id = 1
+    class_id = 1
+    email = "student@example.com"
+    cursor = Cursor(datetime(2026, 1, 1, tzinfo=timezone.utc), 1_000_000)
+
+
+def build_catalogue(s: Sample) -> List[Tuple[str, Select]]:
+    """Queries as the endpoints build them (messages, notifications, tasks, teams...)."""
+    return [
+        ("messages.list", select(Message)
+            .where(Message.channel_id == s.channel_id)
+            .order_by(desc(Message.sent_at))
+            .limit(50)),
+        ("messages.list_keyset", keyset_query(
+            select(Message).where(Message.channel_id == s.channel_id),
+            Message.sent_at, Message.message_id, before=s.cursor, limit=50)),
+        ("messages.count", select(func.count()).select_from(Message)
+            .where(Message.channel_id == s.channel_id)),
+        ("notifications.list", select(Notification)
+            .where(Notification.user_id == s.user_id)
+            .order_by(Notification.updated_at.desc())
+            .limit(20)),
+        ("notifications.list_keyset", keyset_query(
+            select(Notification).where(Notification.user_id == s.user_id),
+            Notification.updated_at, Notification.notification_id, before=s.cursor, limit=20)),
+        ("notifications.unread_list", select(Notification)
+            .where(Notification.user_id == s.user_id, Notification.is_read == False)  # noqa: E712
+            .order_by(Notification.updated_at.desc())
+            .limit(20)),
+        ("notifications.unread_count", select(func.count()).select_from(Notification)
+            .where(Notification.user_id == s.user_id, Notification.is_read == False)),  # noqa: E712
+        ("tasks.by_sprint_status", select(Task)
+            .where(Task.sprint_id == s.sprint_id, Task.status == "TODO")),
+        ("tasks.by_sprint", select(Task).where(Task.sprint_id == s.sprint_id)),
+        ("team_members.my_teams", select(TeamMember.team_id)
+            .where(TeamMember.student_id == s.user_id)),
+        ("team_members.is_member", select(TeamMember)
+            .where(TeamMember.team_id == s.team_id, TeamMember.student_id == s.user_id)),
+        ("class_enrollments.is_enrolled", select(ClassEnrollment)
+            .where(ClassEnrollment.class_id == s.class_id, ClassEnrollment.student_id == s.user_id)),
+        ("class_enrollments.by_class", select(ClassEnrollment)
+            .where(ClassEnrollment.class_id == s.class_id)),
+        ("sprints.by_team", select(Sprint).where(Sprint.team_id == s.team_id)),
+        ("users.by_email", select(User).where(User.email == s.email)),
+    ]
+
+
+def find_seq_scans(plan: dict) -> List[str]:
+    """Walk a JSON plan tree and return the relations read by a sequential scan."""
+    found = []
+    if plan.get("Node Type") in SEQ_SCAN_NODES:
+        found.append(plan.get("Relation Name", "?"))
+    for child in plan.get("Plans", []):
+        found.extend(find_seq_scans(child))
+    return found
+
+
+async def load_samples(conn) -> Sample:
+    sample = Sample()
+    lookups: List[Tuple[str, Callable]] = [
+        ("channel_id", lambda: select(Message.channel_id).limit(1)),
+        ("user_id", lambda: select(Notification.user_id).limit(1)),
+        ("sprint_id", lambda: select(Task.sprint_id).where(Task.sprint_id.is_not(None)).limit(1)),
+        ("team_id", lambda: select(Sprint.team_id).limit(1)),
+        ("class_id", lambda: select(ClassEnrollment.class_id).limit(1)),
+        ("email", lambda: select(User.email).limit(1)),
+    ]
+    for attr, query in lookups:
+        value = (await conn.execute(query())).scalar()
+        if value is not None:
+            setattr(sample, attr, value)
+    return sample
+
+
+async def check_plans(conn) -> List[Tuple[str, str, List[str]]]:
+    """(query name, top plan node, relations read by a sequential scan) per catalogue query."""
+    sample = await load_samples(conn)
+    await conn.execute(text("SET enable_seqscan = off"))
+
+    results = []
+    for name, stmt in build_catalogue(sample):
+        sql = str(stmt.compile(
+            dialect=postgresql.dialect(),
+            compile_kwargs={"literal_binds": True},
+        ))
+        raw = (await conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))).scalar()
+        plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]["Plan"]
+        results.append((name, plan["Node Type"], find_seq_scans(plan)))
+    return results
+
+
+async def main() -> int:
+    async with engine.connect() as conn:
+        results = await check_plans(conn)
+    await engine.dispose()
+
+    failures = 0
+    for name, node_type, seq_scans in results:
+        if seq_scans:
+            failures += 1
+            print(f"❌ {name}: sequential scan on {', '.join(seq_scans)}")
+        else:
+            print(f"✅ {name}: {node_type}")
+
+    if failures:
+        print(f"\n{failures} query plan(s) fell back to a sequential scan")
+        return 1
+    print("\nAll query plans use indexes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))